@@ -0,0 +1,243 @@
+"""
+Incrementally maintained score aggregates.
+
+RoomAggregate and PlayerTotal rows are updated in the same transaction as
+the score write that changes them, so reading a room summary costs one row
+per player no matter how many rounds have been played. Player writes
+recount the room's active players the same way.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from . import sharding
+from .models import Player, PlayerTotal, RoomAggregate, Score
+
+
+def _adjust_player(player_id, room_id, total, count):
+    updated = PlayerTotal.objects.filter(player_id=player_id).update(
+        total=F("total") + total, score_count=F("score_count") + count
+    )
+    if not updated and count >= 0:
+        # Players inserted without save() (e.g. bulk_create) have no row yet.
+        rebuild_player(player_id, room_id)
+
+
+def _adjust_room(room_id, count, total_rounds):
+    updated = RoomAggregate.objects.filter(room_id=room_id).update(
+        score_count=F("score_count") + count, total_rounds=total_rounds
+    )
+    if not updated and count > 0:
+        rebuild_room(room_id)
+
+
+def _round_count(room_id):
+    return (
+        Score.objects.filter(room_id=room_id)
+        .values("round_number")
+        .distinct()
+        .count()
+    )
+
+
+def _active_players(room_id):
+    return Player.objects.filter(room_id=room_id, is_active=True).count()
+
+
+def count_players(room_id):
+    """Recount a room's active players into its aggregate, in one UPDATE."""
+    active = (
+        Player.objects.filter(room_id=OuterRef("room_id"), is_active=True)
+        .order_by()
+        .values("room")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    RoomAggregate.objects.filter(room_id=room_id).update(
+        player_count=Coalesce(Subquery(active), 0)
+    )
+
+
+def _add(score):
+    _adjust_player(score.player_id, score.room_id, score.score_value, 1)
+    opens_round = (
+        not Score.objects.filter(room_id=score.room_id, round_number=score.round_number)
+        .exclude(pk=score.pk)
+        .exists()
+    )
+    _adjust_room(score.room_id, 1, F("total_rounds") + int(opens_round))
+
+
+def score_saved(score, previous):
+    """Fold a created or updated score into the aggregates.
+
+    ``previous`` holds the row's ``player_id``, ``round_number`` and
+    ``score_value`` before the update, or None for a new score.
+    """
+    if previous is None:
+        _add(score)
+        return
+    if (
+        previous["player_id"] == score.player_id
+        and previous["round_number"] == score.round_number
+    ):
+        delta = score.score_value - previous["score_value"]
+        if delta:
+            _adjust_player(score.player_id, score.room_id, delta, 0)
+        return
+    # The score moved to another player or round.
+    _adjust_player(previous["player_id"], score.room_id, -previous["score_value"], -1)
+    _adjust_player(score.player_id, score.room_id, score.score_value, 1)
+    _adjust_room(score.room_id, 0, _round_count(score.room_id))
+
+
+def score_deleted(score):
+    """Take a deleted score out of the aggregates."""
+    _adjust_player(score.player_id, score.room_id, -score.score_value, -1)
+    _adjust_room(score.room_id, -1, _round_count(score.room_id))
+
+
+def scores_upserted(room_id, changes, opened_rounds):
+    """Fold a batch of created and updated scores into the aggregates.
+
+    ``changes`` pairs each saved score with its previous value (None for a
+    new score); ``opened_rounds`` counts rounds the room had no scores for.
+    """
+    per_player = defaultdict(lambda: [0, 0])
+    added = 0
+    for score, previous in changes:
+        entry = per_player[score.player_id]
+        if previous is None:
+            entry[0] += score.score_value
+            entry[1] += 1
+            added += 1
+        else:
+            entry[0] += score.score_value - previous
+    changed = {pid: entry for pid, entry in per_player.items() if any(entry)}
+    if changed:
+        # One UPDATE for the whole batch rather than one per player.
+        updated = PlayerTotal.objects.filter(player_id__in=changed).update(
+            total=F("total")
+            + Case(
+                *(When(player_id=pid, then=Value(t)) for pid, (t, _) in changed.items()),
+                output_field=BigIntegerField(),
+            ),
+            score_count=F("score_count")
+            + Case(
+                *(When(player_id=pid, then=Value(c)) for pid, (_, c) in changed.items()),
+                output_field=IntegerField(),
+            ),
+        )
+        if updated != len(changed):
+            present = set(
+                PlayerTotal.objects.filter(player_id__in=changed).values_list(
+                    "player_id", flat=True
+                )
+            )
+            for player_id in changed.keys() - present:
+                rebuild_player(player_id, room_id)
+    if added:
+        _adjust_room(room_id, added, F("total_rounds") + opened_rounds)
+
+
+def _computed_totals(room_id, player_id=None):
+    scores = Score.objects.filter(room_id=room_id)
+    if player_id is not None:
+        scores = scores.filter(player_id=player_id)
+    return {
+        row["player_id"]: (row["total"], row["score_count"])
+        for row in scores.order_by()
+        .values("player_id")
+        .annotate(total=Sum("score_value"), score_count=Count("id"))
+    }
+
+
+def rebuild_player(player_id, room_id):
+    """Recompute one player's total from their scores."""
+    total, count = _computed_totals(room_id, player_id).get(player_id, (0, 0))
+    PlayerTotal.objects.update_or_create(
+        player_id=player_id,
+        defaults={"room_id": room_id, "total": total, "score_count": count},
+    )
+
+
+def rebuild_room(room_id):
+    """Recompute a room's aggregate and every player total from scratch."""
+    with sharding.use_room(room_id) as db, transaction.atomic(using=db):
+        totals = _computed_totals(room_id)
+        RoomAggregate.objects.update_or_create(
+            room_id=room_id,
+            defaults={
+                "score_count": sum(count for _, count in totals.values()),
+                "total_rounds": _round_count(room_id),
+                "player_count": _active_players(room_id),
+            },
+        )
+        for player_id in Player.objects.filter(room_id=room_id).values_list(
+            "pk", flat=True
+        ):
+            total, count = totals.get(player_id, (0, 0))
+            PlayerTotal.objects.update_or_create(
+                player_id=player_id,
+                defaults={"room_id": room_id, "total": total, "score_count": count},
+            )
+
+
+def verify_room(room_id):
+    """Compare stored aggregates against the scores; return a list of problems."""
+    problems = []
+    totals = _computed_totals(room_id)
+    expected_rounds = _round_count(room_id)
+    expected_count = sum(count for _, count in totals.values())
+    expected_players = _active_players(room_id)
+
+    aggregate = RoomAggregate.objects.filter(room_id=room_id).first()
+    if aggregate is None:
+        problems.append("missing room aggregate")
+    elif (aggregate.score_count, aggregate.total_rounds) != (
+        expected_count,
+        expected_rounds,
+    ):
+        problems.append(
+            f"room has {aggregate.score_count} scores / {aggregate.total_rounds} "
+            f"rounds, expected {expected_count} / {expected_rounds}"
+        )
+    if aggregate is not None and aggregate.player_count != expected_players:
+        problems.append(
+            f"room has {aggregate.player_count} active players, "
+            f"expected {expected_players}"
+        )
+
+    stored = {
+        player_id: (total, count)
+        for player_id, total, count in PlayerTotal.objects.filter(
+            room_id=room_id
+        ).values_list("player_id", "total", "score_count")
+    }
+    for player_id in Player.objects.filter(room_id=room_id).values_list(
+        "pk", flat=True
+    ):
+        expected = totals.get(player_id, (0, 0))
+        actual = stored.get(player_id)
+        if actual is None:
+            problems.append(f"player {player_id}: missing total")
+        elif actual != expected:
+            problems.append(
+                f"player {player_id}: total {actual[0]} over {actual[1]} scores, "
+                f"expected {expected[0]} over {expected[1]}"
+            )
+    return problems
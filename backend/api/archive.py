@@ -0,0 +1,313 @@
+"""
+Streaming export and import of rooms.
+
+An export is a stream of records: each room, followed by its players and
+its scores, as NDJSON (one JSON object per line) or as CSV (one row per
+record, with a ``type`` column and the union of the record fields). Rows
+are read with ``QuerySet.iterator()`` and written as they are read, so
+memory use does not grow with the size of the export.
+
+Imports read the same formats line by line and upsert on the record ids,
+so importing an archive twice leaves one copy. Rows are written in batched
+transactions of IMPORT_BATCH_SIZE records; a failed import keeps the
+batches before the failure, and can simply be run again. Imported rows go
+around the model layer, so each room's version, aggregates, history
+snapshot, shard directory entry and cached code lookup are brought up to
+date once its records are in.
+"""
+
+import csv
+import json
+from datetime import date, datetime, time
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import aggregates, code_cache, history, sharding
+from .models import Player, Room, Score
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+
+MODELS = {"room": Room, "player": Player, "score": Score}
+
+# The fields of each record type, in the order they are written.
+RECORD_FIELDS = {
+    "room": ["id", "name", "game_type", "room_code", "created_at", "is_active"],
+    "player": ["id", "room", "name", "joined_at", "is_active"],
+    "score": [
+        "id",
+        "room",
+        "player",
+        "round_number",
+        "category",
+        "score_value",
+        "notes",
+        "created_at",
+    ],
+}
+
+CSV_COLUMNS = ["type"] + list(
+    dict.fromkeys(name for fields in RECORD_FIELDS.values() for name in fields)
+)
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class ArchiveError(ValueError):
+    """An import record that cannot be read or written."""
+
+
+def _rows(queryset, kind):
+    fields = RECORD_FIELDS[kind]
+    attnames = [MODELS[kind]._meta.get_field(name).attname for name in fields]
+    for values in queryset.values_list(*attnames).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {"type": kind, **dict(zip(fields, values))}
+
+
+def export_records(rooms):
+    """Yield the records of ``rooms`` (a Room queryset), room by room.
+
+    With sharding on, every shard's share of the queryset is exported in
+    turn.
+    """
+    aliases = sharding.shard_aliases() if sharding.enabled() else [None]
+    for alias in aliases:
+        room_rows = rooms.using(alias).order_by("created_at", "pk")
+        for room in _rows(room_rows, "room"):
+            yield room
+            room_id = room["id"]
+            db = sharding.room_db(room_id)
+            yield from _rows(
+                Player.objects.using(db)
+                .filter(room_id=room_id)
+                .order_by("joined_at", "pk"),
+                "player",
+            )
+            yield from _rows(
+                Score.objects.using(db)
+                .filter(room_id=room_id)
+                .order_by("round_number", "created_at", "pk"),
+                "score",
+            )
+
+
+def rooms_between(start=None, end=None):
+    """Rooms created from ``start`` up to (not including) ``end``.
+
+    Either bound may be a date, a datetime or an ISO 8601 string of one.
+    """
+    rooms = Room.objects.all()
+    if start:
+        rooms = rooms.filter(created_at__gte=_as_datetime(start))
+    if end:
+        rooms = rooms.filter(created_at__lt=_as_datetime(end))
+    return rooms
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        parsed = parse_datetime(value) or parse_date(value)
+        if parsed is None:
+            raise ValueError(f"{value!r} is not an ISO 8601 date or datetime")
+        value = parsed
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_lines(records):
+    """Encode records as NDJSON lines (bytes)."""
+    for record in records:
+        if orjson is not None:
+            yield orjson.dumps(record, default=_json_default) + b"\n"
+        else:
+            yield (
+                json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+            ).encode()
+
+
+class _Line:
+    """A file-like target that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(records):
+    """Encode records as CSV rows (bytes), after a header row."""
+    writer = csv.writer(_Line())
+    yield writer.writerow(CSV_COLUMNS).encode()
+    for record in records:
+        yield writer.writerow(
+            [_csv_value(record.get(column)) for column in CSV_COLUMNS]
+        ).encode()
+
+
+def encode(records, as_format):
+    """Encode records in ``as_format`` ("ndjson" or "csv")."""
+    return csv_lines(records) if as_format == "csv" else ndjson_lines(records)
+
+
+def read_ndjson(lines):
+    """Decode NDJSON lines (bytes or str) into records, skipping blank lines."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ArchiveError(f"line {number}: {exc}") from exc
+        if not isinstance(record, dict):
+            raise ArchiveError(f"line {number}: expected a JSON object")
+        yield record
+
+
+def read_csv(lines):
+    """Decode CSV lines (bytes or str) with a header row into records."""
+    text = (line.decode() if isinstance(line, bytes) else line for line in lines)
+    for record in csv.DictReader(text):
+        yield {
+            name: value
+            for name, value in record.items()
+            if name in RECORD_FIELDS.get(record.get("type"), ()) or name == "type"
+        }
+
+
+def decode(lines, as_format):
+    """Decode ``as_format`` ("ndjson" or "csv") lines into records."""
+    return read_csv(lines) if as_format == "csv" else read_ndjson(lines)
+
+
+def _instance(record):
+    """Build an unsaved model instance from an import record."""
+    kind = record.get("type")
+    model = MODELS.get(kind)
+    if model is None:
+        raise ArchiveError(f"unknown record type {kind!r}")
+    values = {}
+    for name in RECORD_FIELDS[kind]:
+        field = model._meta.get_field(name)
+        value = record.get(name)
+        if value == "" and field.null:
+            value = None
+        try:
+            value = field.to_python(value)
+        except ValidationError as exc:
+            raise ArchiveError(f"{kind} {name}: {' '.join(exc.messages)}") from exc
+        if value is None and not field.null:
+            raise ArchiveError(f"{kind} {name} is required")
+        values[field.attname] = value
+    return kind, model(**values)
+
+
+def _write_batch(room_id, batch, counts):
+    """Upsert one room's pending rows in a transaction."""
+    try:
+        with sharding.use_room(room_id) as db, transaction.atomic(using=db):
+            # Writing the room (or bumping its version) first takes the
+            # write lock; the version marks the rows for delta sync.
+            _upsert(db, "room", batch, counts)
+            try:
+                version = Room.next_version(room_id)
+            except Room.DoesNotExist:
+                raise ArchiveError(f"room {room_id} is neither imported nor known")
+            for kind in ("player", "score"):
+                for row in batch[kind]:
+                    row.room_version = version
+            # An overwritten score moves to a new version, so that writes
+            # expecting its pre-import version are refused.
+            current = dict(
+                Score.objects.using(db)
+                .filter(pk__in=[row.pk for row in batch["score"]])
+                .values_list("pk", "version")
+            )
+            for row in batch["score"]:
+                if row.pk in current:
+                    row.version = current[row.pk] + 1
+            _upsert(db, "player", batch, counts, ["room_version"])
+            _upsert(db, "score", batch, counts, ["room_version", "version"])
+    except IntegrityError as exc:
+        raise ArchiveError(f"room {room_id}: {exc}") from exc
+
+
+def _upsert(db, kind, batch, counts, extra_fields=()):
+    rows = batch[kind]
+    if rows:
+        MODELS[kind].objects.using(db).bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=[*RECORD_FIELDS[kind][1:], *extra_fields],
+        )
+        counts[kind] += len(rows)
+        rows.clear()
+
+
+def _finish_room(room_id):
+    """Rebuild what depends on a room's rows once they are imported."""
+    aggregates.rebuild_room(room_id)
+    history.rebase(room_id)
+    db = sharding.room_db(room_id)
+    room = Room.objects.using(db).get(pk=room_id)
+    if sharding.enabled():
+        sharding.register(room, db)
+    code_cache.forget(room.room_code, db)
+
+
+def import_records(records, batch_size=IMPORT_BATCH_SIZE):
+    """Upsert exported records in batched transactions; return counts by type.
+
+    Records of a room must follow the room's own record (as they do in an
+    export), or belong to a room that already exists.
+    """
+    counts = {kind: 0 for kind in MODELS}
+    batch = {kind: [] for kind in MODELS}
+    room_id = None
+    pending = 0
+    for number, record in enumerate(records, 1):
+        try:
+            kind, instance = _instance(record)
+        except ArchiveError as exc:
+            raise ArchiveError(f"record {number}: {exc}") from exc
+        record_room = instance.pk if kind == "room" else instance.room_id
+        if record_room != room_id:
+            if room_id is not None:
+                _write_batch(room_id, batch, counts)
+                _finish_room(room_id)
+            room_id, pending = record_room, 0
+        batch[kind].append(instance)
+        pending += 1
+        if pending >= batch_size:
+            _write_batch(room_id, batch, counts)
+            pending = 0
+    if room_id is not None:
+        _write_batch(room_id, batch, counts)
+        _finish_room(room_id)
+    return counts
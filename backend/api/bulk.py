@@ -0,0 +1,69 @@
+"""
+Bulk score submission.
+
+A whole round (or a whole imported game) is written with one lookup of the
+rows it touches and one INSERT ... ON CONFLICT statement.
+"""
+
+from django.db import transaction
+
+from . import aggregates, history, sharding
+from .models import Room, Score
+
+
+def upsert_scores(room, items):
+    """Create or update many scores of one room in a single transaction.
+
+    ``items`` are validated dicts with a ``player`` instance, ``round_number``,
+    ``score_value``, ``category`` and ``notes`` (None keeps existing notes).
+    Scores are matched on (player, round_number, category). NULL categories
+    never conflict in a unique index, so existing rows are looked up first
+    and the write upserts on the primary key instead. Returns the saved
+    scores and the set of ids that were newly created.
+    """
+    rounds = {item["round_number"] for item in items}
+    with transaction.atomic(using=sharding.room_db(room.pk)):
+        version = Room.next_version(room.pk)
+        existing = {
+            (score.player_id, score.round_number, score.category): score
+            for score in Score.objects.filter(room=room, round_number__in=rounds)
+        }
+        opened_rounds = len(rounds - {key[1] for key in existing})
+
+        scores = []
+        changes = []
+        writes = []
+        for item in items:
+            player = item["player"]
+            category = item.get("category")
+            current = existing.get((player.pk, item["round_number"], category))
+            score = Score(
+                player=player,
+                room=room,
+                round_number=item["round_number"],
+                category=category,
+                score_value=item["score_value"],
+                notes=item.get("notes") or "",
+                room_version=version,
+            )
+            if current is not None:
+                score.pk = current.pk
+                score.created_at = current.created_at
+                score.version = current.version + 1
+                if item.get("notes") is None:
+                    score.notes = current.notes
+            scores.append(score)
+            changes.append((score, current.score_value if current else None))
+            writes.append((score, current and history.score_state(current)))
+
+        Score.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["score_value", "notes", "room_version", "version"],
+        )
+        aggregates.scores_upserted(room.pk, changes, opened_rounds)
+        history.scores_written(room.pk, writes)
+
+    created = {score.pk for score, previous in changes if previous is None}
+    return scores, created
@@ -0,0 +1,158 @@
+"""
+Cached room code lookups.
+
+Every join starts by resolving a room code, and many of the codes sent are
+mistyped or guessed. An in-process LRU maps codes to (room id, is_active)
+for ROOM_CODE_CACHE_TTL seconds and remembers codes no room has for
+ROOM_CODE_NEGATIVE_TTL seconds, so repeated guesses stop reaching the
+database. With ROOM_CODE_SHARED_CACHE naming one of CACHES, local misses
+are looked up there before the database, so workers share their entries.
+
+A room's code is forgotten whenever the room is saved (created,
+deactivated, ...) or deleted, now and again when the write commits. Other
+workers only see that through the shared cache; without one, their
+entries are at most a TTL out of date. Writes that skip the model's
+save() (QuerySet.update()) are not seen at all.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import sharding
+from .metrics import registry
+
+LOOKUPS = "scorecard_room_code_lookups_total"
+
+# Stands for "no room has this code" in the shared cache, which cannot
+# tell a cached None from a missing key.
+_NO_ROOM = ()
+
+
+class RoomCodeCache:
+    """A thread-safe LRU of room code lookups with per-entry expiry.
+
+    Values are (room id, is_active) tuples, or None for codes no room has,
+    which expire after ``negative_ttl`` instead of ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize, ttl, negative_ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, code):
+        """Return (found, value); expired entries are not found."""
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires <= self.clock():
+                del self._entries[code]
+                return False, None
+            self._entries.move_to_end(code)
+            return True, value
+
+    def set(self, code, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[code] = (self.clock() + ttl, value)
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, code):
+        with self._lock:
+            self._entries.pop(code, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local = RoomCodeCache(
+    settings.ROOM_CODE_CACHE_SIZE,
+    settings.ROOM_CODE_CACHE_TTL,
+    settings.ROOM_CODE_NEGATIVE_TTL,
+)
+
+
+def _shared_cache():
+    alias = settings.ROOM_CODE_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _key(code):
+    return f"room-code:{code}"
+
+
+def _load(code):
+    """Read a code's room from the database: (room id, is_active) or None."""
+    from .models import Room
+
+    if sharding.enabled():
+        room_id = sharding.room_for_code(code)
+        if room_id is None:
+            return None
+        rooms = Room.objects.using(sharding.room_db(room_id)).filter(pk=room_id)
+    else:
+        rooms = Room.objects.filter(room_code=code)
+    return rooms.order_by().values_list("pk", "is_active").first()
+
+
+def lookup(code):
+    """Return (room id, is_active) for a room code, or None if no room has it."""
+    found, value = _local.get(code)
+    if found:
+        registry.increment(LOOKUPS, {"result": "hit" if value else "negative_hit"})
+        return value
+
+    shared = _shared_cache()
+    if shared is not None:
+        cached = shared.get(_key(code))
+        if cached is not None:
+            value = tuple(cached) or None
+            _local.set(code, value)
+            registry.increment(LOOKUPS, {"result": "shared_hit"})
+            return value
+
+    registry.increment(LOOKUPS, {"result": "miss"})
+    value = _load(code)
+    _local.set(code, value)
+    if shared is not None:
+        timeout = settings.ROOM_CODE_CACHE_TTL if value else settings.ROOM_CODE_NEGATIVE_TTL
+        shared.set(_key(code), value or _NO_ROOM, timeout)
+    return value
+
+
+def _delete(code):
+    _local.delete(code)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_key(code))
+
+
+def forget(code, using=None):
+    """Drop a room code's entries now and again when the current write commits."""
+    if not code:
+        return
+    _delete(code)
+    transaction.on_commit(lambda: _delete(code), using=using)
+
+
+def clear():
+    """Drop every entry of the process cache."""
+    _local.clear()
@@ -0,0 +1,123 @@
+"""
+Room code allocation without probing the database.
+
+Codes are produced by running a monotonically increasing sequence through a
+keyed bijective permutation of the 36**8 code space, so two sequence values
+can never map to the same code and no SELECT is needed to check for clashes.
+Sequence values are reserved from the database in blocks, which keeps
+concurrent creators (threads or worker processes) on disjoint ranges.
+"""
+
+import hashlib
+import hmac
+import string
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 8
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH
+
+
+def encode(value):
+    """Render an integer in [0, CODE_SPACE) as an 8-character room code."""
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, index = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+class FeistelPermutation:
+    """A keyed bijection over ``range(domain)``.
+
+    A balanced Feistel network permutes the smallest even-width bit space
+    covering the domain; values that land outside the domain are fed through
+    again (cycle walking) until they fall inside it.
+    """
+
+    def __init__(self, key, domain, rounds=4):
+        self.domain = domain
+        bits = (domain - 1).bit_length()
+        self.half_bits = (bits + 1) // 2
+        self.mask = (1 << self.half_bits) - 1
+        self.round_keys = [
+            hmac.new(key, f"round-{n}".encode(), hashlib.sha256).digest()
+            for n in range(rounds)
+        ]
+
+    def _feistel(self, value):
+        left, right = value >> self.half_bits, value & self.mask
+        for round_key in self.round_keys:
+            digest = hashlib.blake2b(
+                right.to_bytes(8, "big"), key=round_key, digest_size=8
+            ).digest()
+            left, right = right, left ^ (int.from_bytes(digest, "big") & self.mask)
+        return (left << self.half_bits) | right
+
+    def __call__(self, value):
+        if not 0 <= value < self.domain:
+            raise ValueError(f"{value} is outside the permutation domain")
+        value = self._feistel(value)
+        while value >= self.domain:
+            value = self._feistel(value)
+        return value
+
+
+class RoomCodeAllocator:
+    """Hand out unique room codes from blocks of a database-backed sequence."""
+
+    def __init__(self, block_size=None, key=None):
+        self.block_size = block_size or settings.ROOM_CODE_BLOCK_SIZE
+        secret = key or settings.ROOM_CODE_KEY or settings.SECRET_KEY
+        self.permutation = FeistelPermutation(
+            hmac.new(secret.encode(), b"room-codes", hashlib.sha256).digest(),
+            CODE_SPACE,
+        )
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def _reserve_block(self):
+        """Claim the next ``block_size`` sequence values.
+
+        If the caller's transaction rolls back, so does the claim, and the
+        block can be handed out again elsewhere; Room.save retries with a new
+        code when that rare overlap hits the unique index.
+        """
+        from .models import RoomCodeSequence
+
+        with transaction.atomic():
+            sequence = RoomCodeSequence.objects.filter(pk=RoomCodeSequence.SINGLETON)
+            if not sequence.update(next_value=F("next_value") + self.block_size):
+                RoomCodeSequence.objects.get_or_create(pk=RoomCodeSequence.SINGLETON)
+                sequence.update(next_value=F("next_value") + self.block_size)
+            end = sequence.values_list("next_value", flat=True).get()
+        if end > CODE_SPACE:
+            raise RuntimeError("The room code space is exhausted")
+        self._next, self._end = end - self.block_size, end
+
+    def allocate(self):
+        """Return a room code no other allocator has handed out."""
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block()
+            value = self._next
+            self._next += 1
+        return encode(self.permutation(value))
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def allocate_room_code():
+    """Allocate a room code from the process-wide allocator."""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = RoomCodeAllocator()
+    return _allocator.allocate()
@@ -0,0 +1,166 @@
+"""
+In-process pub/sub broker for live room updates.
+
+Views publish score and player events once their transaction commits and
+every open event stream for the room receives them. The broker lives in
+process memory, so each worker only fans out the writes it handled itself;
+run a single ASGI worker (or put a shared broker in front) when scaling out.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .sharding import room_db
+
+
+class Subscription:
+    """A single subscriber's queue of events for one room."""
+
+    def __init__(self, broker, room_id, maxsize, loop=None):
+        self.broker = broker
+        self.room_id = str(room_id)
+        self._loop = loop
+        if loop is None:
+            self._queue = queue.Queue(maxsize=maxsize)
+        else:
+            self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        """Queue an event for this subscriber (safe to call from any thread)."""
+        if self._loop is None:
+            self._put(event)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's event loop has gone away.
+            self.close()
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except (queue.Full, asyncio.QueueFull):
+            # A slow consumer has fallen behind: drop what is queued and ask
+            # the client to refetch the room instead of growing without bound.
+            self._drain()
+            self._queue.put_nowait(
+                {"id": event["id"], "type": "resync", "data": {"room": self.room_id}}
+            )
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except (queue.Empty, asyncio.QueueEmpty):
+                return
+
+    def get(self, timeout=None):
+        """Block until the next event arrives; return None on timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        """Await the next event; return None on timeout."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        """Stop receiving events."""
+        self.broker.unsubscribe(self)
+
+
+class RoomEventBroker:
+    """Fan events out to every subscriber of a room."""
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, room_id, loop=None):
+        """Register a new subscriber for a room."""
+        maxsize = self.queue_size or settings.EVENT_STREAM_QUEUE_SIZE
+        subscription = Subscription(self, room_id, maxsize, loop=loop)
+        with self._lock:
+            self._subscribers[subscription.room_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscriber; unknown subscribers are ignored."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.room_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.room_id]
+
+    def subscriber_count(self, room_id):
+        """Return the number of open subscriptions for a room."""
+        with self._lock:
+            return len(self._subscribers.get(str(room_id), ()))
+
+    def publish(self, room_id, event_type, data, version):
+        """Deliver an event to all current subscribers of a room.
+
+        The event id is the room version the change produced, so clients can
+        catch up through the room's ``changes`` endpoint after a gap.
+        """
+        event = {"id": version, "type": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(room_id), ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+
+broker = RoomEventBroker()
+
+
+def publish_on_commit(room_id, event_type, data, version):
+    """Publish an event once the current transaction commits."""
+    transaction.on_commit(
+        lambda: broker.publish(room_id, event_type, data, version),
+        using=room_db(room_id),
+    )
+
+
+def format_sse(event):
+    """Encode an event as a Server-Sent Events message."""
+    payload = json.dumps(event["data"], cls=JSONEncoder, separators=(",", ":"))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n".encode()
+
+
+def stream_room_events(room_id, keepalive):
+    """Yield SSE messages for a room from a blocking (WSGI) worker thread."""
+    subscription = broker.subscribe(room_id)
+    try:
+        yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n".encode()
+        while True:
+            event = subscription.get(timeout=keepalive)
+            yield b": keepalive\n\n" if event is None else format_sse(event)
+    finally:
+        subscription.close()
+
+
+async def astream_room_events(room_id, keepalive):
+    """Yield SSE messages for a room from an ASGI event loop."""
+    subscription = broker.subscribe(room_id, loop=asyncio.get_running_loop())
+    try:
+        yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n".encode()
+        while True:
+            event = await subscription.aget(timeout=keepalive)
+            yield b": keepalive\n\n" if event is None else format_sse(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,149 @@
+"""
+Serializer-free responses for hot read endpoints.
+
+Instantiating DRF fields for every player and score dominates the CPU cost
+of large room reads. With FAST_SERIALIZATION on, those endpoints fetch
+``.values()`` rows and turn them into the serializers' exact output through
+a field mapping compiled once from the serializer classes.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import Player, Score
+from .serializers import PlayerSerializer, RoomSerializer, ScoreSerializer
+
+# Fields whose database value already is their representation.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.UUIDField,
+)
+
+
+class RowPlan:
+    """Map ``.values()`` rows to a serializer's output.
+
+    ``deferred`` names fields the caller supplies when building a row
+    (nested serializers, method fields); they keep their place in the
+    serializer's field order.
+    """
+
+    def __init__(self, serializer_class, deferred=()):
+        model = serializer_class.Meta.model
+        self.columns = []
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in deferred:
+                self.fields.append((name, None, None))
+                continue
+            if isinstance(
+                field,
+                (
+                    serializers.BaseSerializer,
+                    serializers.SerializerMethodField,
+                ),
+            ):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} must be deferred"
+                )
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                lookup = model._meta.get_field(field.source).attname
+            else:
+                lookup = "__".join(field.source_attrs)
+            self.columns.append(lookup)
+            self.fields.append((name, lookup, _converter(field)))
+
+    def __call__(self, row, tz, **deferred):
+        """Build one row's data; ``tz`` is the timezone datetimes render in."""
+        data = {}
+        for name, lookup, convert in self.fields:
+            if lookup is None:
+                data[name] = deferred[name]
+                continue
+            value = row[lookup]
+            if value is not None and convert is not None:
+                value = convert(value, tz)
+            data[name] = value
+        return data
+
+
+def _iso_datetime(value, tz):
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _converter(field):
+    """Return ``convert(value, tz)`` for a field, or None to pass values through.
+
+    Default ISO 8601 datetime fields are converted inline, mirroring
+    DateTimeField.to_representation without resolving the current timezone
+    for every row; anything else unusual goes through the field itself.
+    """
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    if (
+        type(field) is serializers.DateTimeField
+        and settings.USE_TZ
+        and not hasattr(field, "timezone")
+        and (getattr(field, "format", api_settings.DATETIME_FORMAT) or "").lower()
+        == ISO_8601
+    ):
+        return _iso_datetime
+    return lambda value, tz: field.to_representation(value)
+
+
+PLAYER_PLAN = RowPlan(PlayerSerializer)
+SCORE_PLAN = RowPlan(ScoreSerializer)
+ROOM_PLAN = RowPlan(RoomSerializer, deferred=("players", "scores", "player_count"))
+
+
+def score_rows(queryset):
+    """Narrow a Score queryset to the columns ``scores`` needs."""
+    return queryset.values(*SCORE_PLAN.columns)
+
+
+def scores(rows):
+    """Serialize rows from ``score_rows`` (possibly a page of them)."""
+    tz = timezone.get_current_timezone()
+    return [SCORE_PLAN(row, tz) for row in rows]
+
+
+def room_rows(queryset):
+    """Narrow a Room queryset to the columns ``rooms`` needs."""
+    return queryset.values(*ROOM_PLAN.columns)
+
+
+def rooms(rows):
+    """Serialize rows from ``room_rows``, loading players and scores in two queries."""
+    rows = list(rows)
+    tz = timezone.get_current_timezone()
+    players = {row["id"]: [] for row in rows}
+    for player in Player.objects.filter(room_id__in=players).values(
+        *PLAYER_PLAN.columns
+    ):
+        players[player["room_id"]].append(player)
+    room_scores = {row["id"]: [] for row in rows}
+    for score in score_rows(Score.objects.filter(room_id__in=room_scores)):
+        room_scores[score["room_id"]].append(score)
+
+    return [
+        ROOM_PLAN(
+            row,
+            tz,
+            players=[PLAYER_PLAN(player, tz) for player in players[row["id"]]],
+            scores=[SCORE_PLAN(score, tz) for score in room_scores[row["id"]]],
+            player_count=sum(player["is_active"] for player in players[row["id"]]),
+        )
+        for row in rows
+    ]
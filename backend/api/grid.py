@@ -0,0 +1,86 @@
+"""
+Compact, column-oriented representation of a room's scorecard.
+
+A room is a players x columns matrix: Yahtzee categories, or rounds for the
+other games. Instead of one verbose dict per score, the grid sends the
+players once and the filled cells as three parallel arrays of player
+index, column index and value, plus the totals the scorecard shows.
+"""
+
+from .models import Player, Room, Score
+
+YAHTZEE_CATEGORIES = [key for key, _ in Score.YAHTZEE_CATEGORIES]
+UPPER_CATEGORIES = YAHTZEE_CATEGORIES[:6]
+LOWER_CATEGORIES = YAHTZEE_CATEGORIES[6:]
+UPPER_BONUS_THRESHOLD = 63
+UPPER_BONUS = 35
+
+
+def room_grid(room_id):
+    """Return the room's scorecard as a grid, or None if the room does not exist."""
+    room = (
+        Room.objects.filter(pk=room_id)
+        .values("id", "name", "game_type", "version")
+        .first()
+    )
+    if room is None:
+        return None
+
+    players = list(
+        Player.objects.filter(room_id=room_id).values_list("id", "name", "is_active")
+    )
+    index = {player_id: n for n, (player_id, _, _) in enumerate(players)}
+    scores = list(
+        Score.objects.filter(room_id=room_id).values_list(
+            "player_id", "category", "round_number", "score_value"
+        )
+    )
+
+    yahtzee = room["game_type"] == "yahtzee"
+    if yahtzee:
+        axis, columns = "category", YAHTZEE_CATEGORIES
+        column_of = {category: n for n, category in enumerate(columns)}
+        key = 1
+    else:
+        axis, columns = "round", sorted({score[2] for score in scores})
+        column_of = {round_number: n for n, round_number in enumerate(columns)}
+        key = 2
+
+    cells = {"player": [], "column": [], "value": []}
+    totals = [0] * len(players)
+    upper = [0] * len(players)
+    lower = [0] * len(players)
+    for score in scores:
+        player = index[score[0]]
+        cells["player"].append(player)
+        # Uncategorized scores in a Yahtzee room still count towards totals.
+        cells["column"].append(column_of.get(score[key]))
+        cells["value"].append(score[3])
+        totals[player] += score[3]
+        if yahtzee and score[1] in UPPER_CATEGORIES:
+            upper[player] += score[3]
+        elif yahtzee and score[1] in LOWER_CATEGORIES:
+            lower[player] += score[3]
+
+    grid = {
+        "id": room["id"],
+        "name": room["name"],
+        "game_type": room["game_type"],
+        "version": room["version"],
+        "players": {
+            "id": [player[0] for player in players],
+            "name": [player[1] for player in players],
+            "is_active": [player[2] for player in players],
+        },
+        "axis": axis,
+        "columns": columns,
+        "cells": cells,
+    }
+    if yahtzee:
+        bonus = [UPPER_BONUS if total >= UPPER_BONUS_THRESHOLD else 0 for total in upper]
+        grid["upper_total"] = upper
+        grid["upper_bonus"] = bonus
+        grid["lower_total"] = lower
+        totals = [total + extra for total, extra in zip(totals, bonus)]
+    grid["totals"] = totals
+    return grid
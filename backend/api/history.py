@@ -0,0 +1,392 @@
+"""
+Append-only score history, snapshots and undo.
+
+Every score write also appends a ScoreEvent to its room's history, in the
+same transaction, holding the score's fields before and after. The Score
+table remains the current state that reads are served from; the history is
+the audit trail behind it. A room's scores can be rebuilt from its latest
+RoomScoreSnapshot plus the events after it. Snapshots are taken by the
+``snapshot_rooms`` command and whenever a rebuild replays at least
+SCORE_SNAPSHOT_INTERVAL events.
+
+Undo and redo are log operations too: undo applies the inverse of the
+latest edit still in effect and appends it as a new event, redo reverts the
+latest undo. As in an editor, a new edit empties the redo stack; a rebase
+empties both. Each event records the stack entries below it, so the stacks
+are linked lists whose tops are found from the room's latest event.
+"""
+
+import json
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import sharding
+from .events import publish_on_commit
+from .models import Player, Room, RoomScoreSnapshot, Score, ScoreEvent
+from .serializers import ScoreSerializer
+
+# The score fields an event records.
+STATE_FIELDS = (
+    "player_id",
+    "round_number",
+    "category",
+    "score_value",
+    "notes",
+    "created_at",
+)
+
+CREATE, UPDATE, DELETE, REBASE = "create", "update", "delete", "rebase"
+EDIT, UNDO, REDO = "edit", "undo", "redo"
+
+# (origin, reverted event) for the events appended in this context.
+_origin = ContextVar("score_event_origin", default=(EDIT, None))
+
+
+class HistoryConflict(Exception):
+    """An undo or redo cannot be applied to the room as it is now."""
+
+
+def score_state(score):
+    """The recorded fields of a score instance."""
+    return {field: getattr(score, field) for field in STATE_FIELDS}
+
+
+def _json(state):
+    """Recorded fields as JSON values; datetimes keep their microseconds."""
+    return json.loads(json.dumps(state, cls=JSONEncoder))
+
+
+def _same(state, other):
+    """Whether two recorded states match.
+
+    Events recorded before microseconds were kept hold ``created_at`` to
+    the millisecond, so it is compared to the millisecond.
+    """
+
+    def key(state):
+        created_at = parse_datetime(state["created_at"])
+        return {
+            **state,
+            "created_at": created_at.replace(
+                microsecond=created_at.microsecond // 1000 * 1000
+            ),
+        }
+
+    return key(state) == key(other)
+
+
+def _last_sequence(room_id, db):
+    return (
+        ScoreEvent.objects.using(db)
+        .filter(room_id=room_id)
+        .order_by("-sequence")
+        .values_list("sequence", flat=True)
+        .first()
+        or 0
+    )
+
+
+def _latest(room_id, db):
+    """The room's latest event, or None before its first."""
+    return (
+        ScoreEvent.objects.using(db)
+        .filter(room_id=room_id)
+        .order_by("-sequence")
+        .only("sequence", "action", "origin", "undo_below", "redo_below")
+        .first()
+    )
+
+
+def _tops(event):
+    """The ids at the top of the undo and redo stacks once ``event`` is written."""
+    if event is None or event.action == REBASE:
+        return None, None
+    if event.origin == UNDO:
+        return event.undo_below, event.pk
+    return event.pk, event.redo_below
+
+
+def _append(room_id, entries):
+    """Append (score id, room version, action, state, previous) entries."""
+    db = sharding.room_db(room_id)
+    origin, reverted = _origin.get()
+    latest = _latest(room_id, db)
+    sequence = latest.sequence if latest else 0
+    undo_top, redo_top = _tops(latest)
+    events = []
+    for offset, (score_id, room_version, action, state, previous) in enumerate(
+        entries, 1
+    ):
+        event = ScoreEvent(
+            room_id=room_id,
+            sequence=sequence + offset,
+            room_version=room_version,
+            score_id=score_id,
+            action=action,
+            origin=origin,
+            reverts=reverted and reverted.pk,
+            state=_json(state),
+            previous=_json(previous),
+        )
+        if origin == UNDO:
+            # Pops the reverted event off the undo stack, pushes onto redo.
+            event.undo_below, event.redo_below = reverted.undo_below, redo_top
+        elif origin == REDO:
+            event.undo_below, event.redo_below = undo_top, reverted.redo_below
+        else:
+            event.undo_below, event.redo_below = undo_top, None
+        undo_top, redo_top = _tops(event)
+        events.append(event)
+    ScoreEvent.objects.using(db).bulk_create(events)
+
+
+def score_saved(score, previous, update_fields=None):
+    """Log a saved score; ``previous`` holds its fields before (None for a create)."""
+    state = score_state(score)
+    if previous is not None:
+        previous = {field: previous[field] for field in STATE_FIELDS}
+        if update_fields is not None:
+            written = {Score._meta.get_field(name).attname for name in update_fields}
+            state = {
+                field: state[field] if field in written else previous[field]
+                for field in STATE_FIELDS
+            }
+    action = CREATE if previous is None else UPDATE
+    _append(score.room_id, [(score.pk, score.room_version, action, state, previous)])
+
+
+def scores_written(room_id, writes):
+    """Log many writes to a room's scores; ``writes`` are (score, previous fields or None)."""
+    _append(
+        room_id,
+        [
+            (
+                score.pk,
+                score.room_version,
+                CREATE if previous is None else UPDATE,
+                score_state(score),
+                previous,
+            )
+            for score, previous in writes
+        ],
+    )
+
+
+def score_deleted(score):
+    """Log a deleted score."""
+    _append(
+        score.room_id,
+        [(score.pk, score.room_version, DELETE, None, score_state(score))],
+    )
+
+
+def _replay(room_id, sequence=None):
+    """Replay a room's history up to ``sequence``.
+
+    Returns the scores, the latest event replayed (or None) and the
+    sequence of the snapshot the replay started from.
+    """
+    db = sharding.room_db(room_id)
+    snapshots = RoomScoreSnapshot.objects.using(db).filter(room_id=room_id)
+    events = ScoreEvent.objects.using(db).filter(room_id=room_id)
+    if sequence is not None:
+        snapshots = snapshots.filter(sequence__lte=sequence)
+        events = events.filter(sequence__lte=sequence)
+    snapshot = snapshots.order_by("-sequence", "-created_at").first()
+    start = snapshot.sequence if snapshot else 0
+    scores = dict(snapshot.scores) if snapshot else {}
+
+    last = None
+    for last in (
+        events.filter(sequence__gt=start)
+        .order_by("sequence")
+        .values("sequence", "room_version", "score_id", "action", "state")
+    ):
+        if last["action"] == REBASE:
+            continue
+        if last["action"] == DELETE:
+            scores.pop(str(last["score_id"]), None)
+        else:
+            scores[str(last["score_id"])] = last["state"]
+    return scores, last, start
+
+
+def _save_snapshot(room_id, scores, last):
+    return RoomScoreSnapshot.objects.using(sharding.room_db(room_id)).create(
+        room_id=room_id,
+        sequence=last["sequence"],
+        room_version=last["room_version"],
+        scores=scores,
+    )
+
+
+def room_state(room_id, sequence=None):
+    """Rebuild a room's scores from its history, up to ``sequence`` (default: now).
+
+    Returns {score id: recorded fields}, replayed from the latest snapshot
+    at or before ``sequence``. A long replay is saved as a new snapshot.
+    """
+    scores, last, start = _replay(room_id, sequence)
+    if last and last["sequence"] - start >= settings.SCORE_SNAPSHOT_INTERVAL:
+        _save_snapshot(room_id, scores, last)
+    return scores
+
+
+def take_snapshot(room_id):
+    """Snapshot a room's scores at its latest event; return the snapshot.
+
+    Events never change once written, so this needs no lock: it replays up
+    to the last event it read and saves the result. Returns None for rooms
+    with no history to add.
+    """
+    scores, last, _ = _replay(room_id)
+    if last is None:
+        return None
+    return _save_snapshot(room_id, scores, last)
+
+
+def rebase(room_id):
+    """Restart a room's history from its score table as it is now.
+
+    For writes that went around the history, such as imports: replays
+    start from the new snapshot, and the events before it stay for audit.
+    A rebase event marks the restart and empties the undo and redo stacks,
+    since the edits before it may no longer apply.
+    """
+    with sharding.use_room(room_id) as db, transaction.atomic(using=db):
+        version = Room.next_version(room_id)
+        sequence = _last_sequence(room_id, db) + 1
+        ScoreEvent.objects.using(db).create(
+            room_id=room_id, sequence=sequence, room_version=version, action=REBASE
+        )
+        return RoomScoreSnapshot.objects.using(db).create(
+            room_id=room_id,
+            sequence=sequence,
+            room_version=version,
+            scores={
+                str(score.pk): _json(score_state(score))
+                for score in Score.objects.using(db).filter(room_id=room_id)
+            },
+        )
+
+
+def verify_history(room_id):
+    """Compare the replayed history with the score table; return a list of problems."""
+    db = sharding.room_db(room_id)
+    replayed = room_state(room_id)
+    current = {
+        str(score.pk): _json(score_state(score))
+        for score in Score.objects.using(db).filter(room_id=room_id)
+    }
+    problems = []
+    for score_id in sorted(replayed.keys() | current.keys()):
+        if score_id not in current:
+            problems.append(f"score {score_id}: in the history but not the table")
+        elif score_id not in replayed:
+            problems.append(f"score {score_id}: in the table but not the history")
+        elif not _same(replayed[score_id], current[score_id]):
+            problems.append(
+                f"score {score_id}: history has {replayed[score_id]}, "
+                f"table has {current[score_id]}"
+            )
+    return problems
+
+
+def _restore(score, state, fields=STATE_FIELDS):
+    for field in fields:
+        value = state[field]
+        if field == "created_at":
+            value = parse_datetime(value)
+        setattr(score, field, value)
+
+
+def _revert(event):
+    """Apply the inverse of ``event`` through the ordinary score writes.
+
+    Raises HistoryConflict unless the score is still as the event left it.
+    """
+    room_id = event.room_id
+    current = Score.objects.select_related("player").filter(pk=event.score_id).first()
+    if event.action == DELETE:
+        if current is not None:
+            raise HistoryConflict(f"Score {event.score_id} exists again")
+    elif current is None:
+        raise HistoryConflict(f"Score {event.score_id} no longer exists")
+    elif not _same(_json(score_state(current)), event.state):
+        # Changed by a write that went around the history, such as an import.
+        raise HistoryConflict(f"Score {event.score_id} has changed since")
+
+    if event.action == CREATE:
+        current.delete()
+        publish_on_commit(
+            room_id, "score.deleted", {"id": event.score_id}, current.room_version
+        )
+        return
+
+    previous = event.previous
+    if not Player.objects.filter(pk=previous["player_id"], room_id=room_id).exists():
+        raise HistoryConflict(f"Player {previous['player_id']} no longer exists")
+    if event.action == DELETE:
+        score = Score(pk=event.score_id, room_id=room_id)
+        _restore(score, previous)
+    else:
+        score = current
+        # Only put back what the event changed.
+        _restore(
+            score,
+            previous,
+            [field for field in STATE_FIELDS if previous[field] != event.state[field]],
+        )
+    try:
+        score.save()
+    except IntegrityError as exc:
+        raise HistoryConflict(
+            f"Score {event.score_id} conflicts with another score"
+        ) from exc
+    publish_on_commit(
+        room_id,
+        "score.created" if event.action == DELETE else "score.updated",
+        ScoreSerializer(score).data,
+        score.room_version,
+    )
+
+
+def _revert_latest(room_id, steps, origin):
+    with sharding.use_room(room_id) as db, transaction.atomic(using=db):
+        # Take the room's write lock before reading the history.
+        Room.next_version(room_id)
+        latest = _latest(room_id, db)
+        last = latest.sequence if latest else 0
+        for step in range(steps):
+            top = _tops(latest)[0 if origin == UNDO else 1]
+            if top is None:
+                # Rolls back the steps already taken.
+                raise HistoryConflict(f"Only {step} of {steps} steps can be {origin}ne")
+            event = ScoreEvent.objects.using(db).get(pk=top)
+            token = _origin.set((origin, event))
+            try:
+                _revert(event)
+            finally:
+                _origin.reset(token)
+            latest = _latest(room_id, db)
+        return list(
+            ScoreEvent.objects.using(db).filter(room_id=room_id, sequence__gt=last)
+        )
+
+
+def undo(room_id, steps=1):
+    """Undo the room's last ``steps`` edits still in effect; return the new events.
+
+    Raises HistoryConflict, changing nothing, if there are fewer steps to
+    undo or one of them no longer applies.
+    """
+    return _revert_latest(room_id, steps, UNDO)
+
+
+def redo(room_id, steps=1):
+    """Redo the room's last ``steps`` undone edits; return the new events."""
+    return _revert_latest(room_id, steps, REDO)
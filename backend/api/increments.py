@@ -0,0 +1,131 @@
+"""
+Score increments, optionally coalesced.
+
+Tally games send a stream of small deltas (+1, +1, -1) to the same scores.
+Each increment is a single ``score_value = score_value + delta`` UPDATE, so
+concurrent taps never overwrite each other. With SCORE_INCREMENT_WINDOW_MS
+set, increments to a room arriving within that window are also merged per
+score and written in one transaction (group commit).
+
+Durability: a request is answered only after the transaction holding its
+delta has committed, so an answered increment is as durable as any other
+write. A crash can only lose increments whose requests are still waiting,
+and their clients see the request fail. If the transaction fails, every
+request in the batch gets the error and none of its deltas are applied.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import aggregates, history, sharding
+from .events import publish_on_commit
+from .models import Room, Score
+from .serializers import ScoreSerializer
+
+
+def increment_scores(room_id, deltas):
+    """Add ``deltas`` ({score id: delta}) to a room's scores in one transaction.
+
+    Returns the serialized scores after the change, keyed by id; scores that
+    no longer exist are left out.
+    """
+    with sharding.use_room(room_id) as db, transaction.atomic(using=db):
+        version = Room.next_version(room_id)
+        Score.objects.filter(room_id=room_id, pk__in=deltas).update(
+            score_value=F("score_value")
+            + Case(
+                *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+                output_field=IntegerField(),
+            ),
+            room_version=version,
+            version=F("version") + 1,
+        )
+        scores = list(
+            Score.objects.filter(room_id=room_id, pk__in=deltas).select_related("player")
+        )
+        aggregates.scores_upserted(
+            room_id,
+            [(score, score.score_value - deltas[score.pk]) for score in scores],
+            0,
+        )
+        history.scores_written(
+            room_id,
+            [
+                (
+                    score,
+                    {
+                        **history.score_state(score),
+                        "score_value": score.score_value - deltas[score.pk],
+                    },
+                )
+                for score in scores
+            ],
+        )
+        data = ScoreSerializer(scores, many=True).data
+        for score_data in data:
+            publish_on_commit(room_id, "score.updated", score_data, version)
+    return {score.pk: score_data for score, score_data in zip(scores, data)}
+
+
+class _Batch:
+    def __init__(self):
+        self.deltas = defaultdict(int)
+        self.results = {}
+        self.error = None
+        self.done = threading.Event()
+
+
+class IncrementBuffer:
+    """Merge concurrent increments per room into one ``apply`` call.
+
+    The first increment for a room opens a batch, waits ``window`` seconds
+    and applies everything added meanwhile; the others wait for it. Every
+    caller gets the outcome of the batch its delta was applied in.
+    """
+
+    def __init__(self, apply):
+        self.apply = apply
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def add(self, room_id, score_id, delta, window):
+        """Add ``delta`` to a score once the batch commits; return the score's result."""
+        with self._lock:
+            batch = self._batches.get(room_id)
+            leader = batch is None
+            if leader:
+                batch = self._batches[room_id] = _Batch()
+            batch.deltas[score_id] += delta
+
+        if leader:
+            time.sleep(window)
+            with self._lock:
+                del self._batches[room_id]
+            try:
+                batch.results = self.apply(room_id, dict(batch.deltas))
+            except Exception as exc:
+                batch.error = exc
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(score_id)
+
+
+_buffer = IncrementBuffer(increment_scores)
+
+
+def increment(room_id, score_id, delta):
+    """Add ``delta`` to a score; return its data, or None if it no longer exists."""
+    window = settings.SCORE_INCREMENT_WINDOW_MS / 1000
+    if window <= 0:
+        return increment_scores(room_id, {score_id: delta}).get(score_id)
+    return _buffer.add(room_id, score_id, delta, window)
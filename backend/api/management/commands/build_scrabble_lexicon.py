@@ -0,0 +1,41 @@
+"""
+Compile a word list into the Scrabble lexicon.
+"""
+
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import scrabble
+
+
+class Command(BaseCommand):
+    help = "Compile a word list (one word per line) into the Scrabble lexicon DAWG."
+
+    def add_arguments(self, parser):
+        parser.add_argument("words", help="Word list file, or - for standard input.")
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="Where to write the lexicon (default: SCRABBLE_LEXICON_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or settings.SCRABBLE_LEXICON_PATH
+        try:
+            if options["words"] == "-":
+                data, count = scrabble.compile_words(sys.stdin)
+            else:
+                with open(options["words"], encoding="utf-8") as words:
+                    data, count = scrabble.compile_words(words)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        if not count:
+            raise CommandError("The word list has no words of the letters A-Z")
+
+        scrabble.save(data, path)
+        scrabble.clear()
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {count} words in {len(data)} bytes to {path}")
+        )
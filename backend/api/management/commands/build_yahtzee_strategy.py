@@ -0,0 +1,42 @@
+"""
+Build the Yahtzee strategy table behind move hints.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import strategy
+
+
+class Command(BaseCommand):
+    help = "Compute the optimal solitaire Yahtzee strategy table for move hints."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-o",
+            "--output",
+            help="Where to write the table (default: YAHTZEE_STRATEGY_PATH).",
+        )
+        parser.add_argument(
+            "--max-open",
+            type=int,
+            default=strategy.CATEGORIES,
+            help="Only cover cards with at most this many open boxes (an endgame table).",
+        )
+
+    def handle(self, *args, **options):
+        if strategy.np is None:
+            raise CommandError("Building the strategy table needs NumPy installed.")
+        if not 1 <= options["max_open"] <= strategy.CATEGORIES:
+            raise CommandError(f"--max-open must be from 1 to {strategy.CATEGORIES}")
+        path = options["output"] or settings.YAHTZEE_STRATEGY_PATH
+
+        values = strategy.solve(
+            options["max_open"],
+            progress=lambda open_count: self.stdout.write(
+                f"Solved cards with {open_count} open boxes"
+            ),
+        )
+        strategy.save(values, path)
+        strategy.clear()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,195 @@
+"""
+Check that every API endpoint's queries are served by indexes.
+"""
+
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Player, Room, Score
+
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+TABLE_ALIAS = re.compile(r'"(\w+)" (?:AS )?(\w+)')
+
+
+class Rollback(Exception):
+    """Raised to undo the seeded data once the plans are collected."""
+
+
+def full_scans(plan, tables, limited=False):
+    """Return the plan steps that read a whole table or index.
+
+    ``plan`` is the detail column of SQLite's EXPLAIN QUERY PLAN output and
+    ``tables`` the names of real tables (scans of subqueries are fine).
+    Bounded lookups show as SEARCH; any other SCAN of a table reads all of
+    it, through an index or not, unless the index covers the query. The one
+    exception is a ``limited`` query (one with a LIMIT) walking an index in
+    its ORDER BY order, which stops after the rows it returns.
+    """
+    sorts = any(step.startswith("USE TEMP B-TREE FOR ORDER BY") for step in plan)
+    return [
+        step
+        for step in plan
+        if step.startswith("SCAN ")
+        and step.split()[1] in tables
+        and " USING COVERING INDEX " not in step
+        and not (limited and not sorts and " USING INDEX " in step)
+    ]
+
+
+class QueryRecorder:
+    """Collect the SQL and parameters of every statement sent to the database."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed data in a rolled back transaction, capture the SQL of each API "
+        "endpoint and fail if EXPLAIN QUERY PLAN shows a full table scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rooms", type=int, default=20, help="Rooms to seed (default: 20)."
+        )
+        parser.add_argument(
+            "--players", type=int, default=4, help="Players per room (default: 4)."
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=10, help="Rounds per room (default: 10)."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("explain_queries only understands SQLite query plans")
+        self.verbosity = options["verbosity"]
+
+        failures = []
+        try:
+            with transaction.atomic(), override_settings(
+                ALLOWED_HOSTS=["testserver"],
+                CACHES={
+                    "default": {
+                        "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                    }
+                },
+            ):
+                room = self.seed(options["rooms"], options["players"], options["rounds"])
+                for name, queries in self.capture(room):
+                    failures += self.explain(name, queries)
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"{len(failures)} queries fall back to a full scan")
+        self.stdout.write(self.style.SUCCESS("All endpoint queries use an index"))
+
+    def seed(self, rooms, players, rounds):
+        """Create rooms full of players and scores; return one of them."""
+        for number in range(rooms):
+            room = Room.objects.create(name=f"Explain {number}", game_type="tally")
+            members = Player.objects.bulk_create(
+                Player(name=f"Player {n}", room=room) for n in range(players)
+            )
+            Score.objects.bulk_create(
+                Score(player=player, room=room, round_number=n, score_value=n)
+                for n in range(1, rounds + 1)
+                for player in members
+            )
+        return room
+
+    def endpoints(self, room):
+        """Yield (name, method, url, data) for each endpoint to explain."""
+        player = room.players.first()
+        yield "room list", "get", reverse("room-list"), None
+        yield "room detail", "get", reverse("room-detail", args=[room.pk]), None
+        yield "room grid", "get", reverse("room-grid", args=[room.pk]), None
+        yield "room timeline", "get", reverse("room-timeline", args=[room.pk]), None
+        lobby = reverse("room-lobby")
+        yield "room lobby", "get", lobby, None
+        yield "room lobby game", "get", f"{lobby}?game_type=tally", None
+        yield "room lobby search", "get", f"{lobby}?search=explain", None
+        yield "room by code", "get", f"{reverse('room-by-code')}?code={room.room_code}", None
+        yield "room changes", "get", f"{reverse('room-changes', args=[room.pk])}?since=1", None
+        yield "join existing", "post", reverse("room-join", args=[room.pk]), {"name": player.name}
+        yield "player list", "get", f"{reverse('player-list')}?room_id={room.pk}", None
+        yield "player cursor", "get", f"{reverse('player-list')}?room_id={room.pk}&pagination=cursor", None
+        yield "score list", "get", f"{reverse('score-list')}?room_id={room.pk}", None
+        yield "score cursor", "get", f"{reverse('score-list')}?room_id={room.pk}&pagination=cursor", None
+        yield "room summary", "get", f"{reverse('score-room-summary')}?room_id={room.pk}", None
+        yield "bulk scores", "post", reverse("score-bulk"), {
+            "room": str(room.pk),
+            "scores": [
+                {"player": str(player.pk), "round_number": 1, "score_value": 5}
+            ],
+        }
+        yield "score create", "post", reverse("score-list"), {
+            "player": str(player.pk),
+            "room": str(room.pk),
+            "round_number": 1000,
+            "score_value": 1,
+            "category": None,
+        }
+        score = Score.objects.filter(player=player, round_number=1).get()
+        yield "score update", "put", reverse("score-detail", args=[score.pk]), {
+            "player": str(player.pk),
+            "room": str(room.pk),
+            "round_number": 1,
+            "score_value": 7,
+            "category": None,
+            "notes": "",
+            "version": score.version,
+        }
+        yield "score increment", "post", reverse("score-increment", args=[score.pk]), {
+            "delta": 2
+        }
+        yield "undo", "post", reverse("room-undo", args=[room.pk]), {}
+        yield "redo", "post", reverse("room-redo", args=[room.pk]), {}
+
+    def capture(self, room):
+        """Call each endpoint and yield its name with the statements it ran."""
+        client = APIClient()
+        for name, method, url, data in self.endpoints(room):
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                response = getattr(client, method)(url, data, format="json")
+            if response.status_code >= 400:
+                raise CommandError(f"{name}: {url} returned {response.status_code}")
+            yield name, recorder.queries
+
+    def explain(self, name, queries):
+        """Explain each query and report those that scan a whole table."""
+        failures = []
+        tables = set(connection.introspection.table_names())
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                # Plans name aliased tables (Django's U0, ...) by their alias.
+                aliases = {
+                    alias
+                    for table, alias in TABLE_ALIAS.findall(sql)
+                    if table in tables
+                }
+                scans = full_scans(plan, tables | aliases, " LIMIT " in sql.upper())
+                if self.verbosity > 1 or scans:
+                    self.stdout.write(f"{name}: {sql}")
+                    for step in plan:
+                        self.stdout.write(f"    {step}")
+                if scans:
+                    self.stderr.write(f"{name}: full scan: {'; '.join(scans)}")
+                    failures.append((name, sql))
+        return failures
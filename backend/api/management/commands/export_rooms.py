@@ -0,0 +1,44 @@
+"""
+Stream rooms, with their players and scores, to a file or stdout.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import archive
+
+
+class Command(BaseCommand):
+    help = "Export rooms as NDJSON or CSV without loading them into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "rooms", nargs="*", help="Room ids to export (default: all rooms)."
+        )
+        parser.add_argument(
+            "--from", dest="start", help="Only rooms created on or after this ISO date."
+        )
+        parser.add_argument(
+            "--to", dest="end", help="Only rooms created before this ISO date."
+        )
+        parser.add_argument(
+            "--as", dest="as_format", choices=archive.FORMATS, default="ndjson"
+        )
+        parser.add_argument(
+            "-o", "--output", help="File to write (default: stdout)."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rooms = archive.rooms_between(options["start"], options["end"])
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options["rooms"]:
+            rooms = rooms.filter(pk__in=options["rooms"])
+        chunks = archive.encode(archive.export_records(rooms), options["as_format"])
+
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
@@ -0,0 +1,49 @@
+"""
+Import rooms exported by ``export_rooms`` (or ``/api/export/``).
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import archive
+
+
+class Command(BaseCommand):
+    help = "Upsert exported rooms, players and scores in batched transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Export to read, or - for stdin.")
+        parser.add_argument(
+            "--as",
+            dest="as_format",
+            choices=archive.FORMATS,
+            help="Format of the file (default: csv for .csv files, else ndjson).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=archive.IMPORT_BATCH_SIZE,
+            help=f"Records per transaction (default: {archive.IMPORT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        as_format = options["as_format"] or (
+            "csv" if options["file"].endswith(".csv") else "ndjson"
+        )
+        lines = (
+            sys.stdin.buffer if options["file"] == "-" else open(options["file"], "rb")
+        )
+        try:
+            with lines:
+                counts = archive.import_records(
+                    archive.decode(lines, as_format), options["batch_size"]
+                )
+        except archive.ArchiveError as exc:
+            raise CommandError(exc)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {counts['room']} rooms, {counts['player']} players "
+                f"and {counts['score']} scores"
+            )
+        )
@@ -0,0 +1,26 @@
+"""
+Apply migrations to the default database and every room shard.
+"""
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from api import sharding
+
+
+class Command(BaseCommand):
+    help = "Run migrate on the default database and on each ROOM_SHARDS shard."
+
+    def handle(self, *args, **options):
+        for alias in [DEFAULT_DB_ALIAS, *sharding.shard_aliases()]:
+            if options["verbosity"]:
+                self.stdout.write(f"Migrating {alias}")
+            call_command(
+                "migrate",
+                database=alias,
+                interactive=False,
+                verbosity=options["verbosity"],
+                stdout=self.stdout,
+                stderr=self.stderr,
+            )
@@ -0,0 +1,54 @@
+"""
+Move rooms to the shard their id hashes to.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sharding
+from api.models import Room
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every room to the shard its id hashes to under the current "
+        "ROOM_SHARDS (including rooms still in the unsharded default database) "
+        "and repair the room directory. Restart workers afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rooms would move; change nothing.",
+        )
+
+    def handle(self, *args, **options):
+        if not sharding.enabled():
+            raise CommandError("Set ROOM_SHARDS to shard rooms first")
+
+        # List every room before moving any, so moved rooms are not seen twice.
+        rooms = [
+            (source, room)
+            for source in sharding.source_aliases()
+            for room in Room.objects.using(source).only("pk", "room_code")
+        ]
+        moved = kept = 0
+        for source, room in rooms:
+            target = sharding.shard_alias(sharding.shard_for(room.pk))
+            if target == source:
+                kept += 1
+                if not options["dry_run"]:
+                    sharding.register(room, source)
+                continue
+            moved += 1
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{room.pk}: {source} -> {target}")
+            if not options["dry_run"]:
+                sharding.move_room(room.pk, source, target)
+
+        if options["verbosity"] < 1:
+            return
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {moved} rooms, {kept} already in place")
+        )
@@ -0,0 +1,49 @@
+"""
+Rebuild and verify the denormalized score aggregates.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sharding
+from api.aggregates import rebuild_room, verify_room
+from api.models import Room
+
+
+class Command(BaseCommand):
+    help = "Recompute room aggregates and player totals from the score table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "rooms", nargs="*", help="Room ids to process (default: all rooms)."
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare stored aggregates with the scores; change nothing.",
+        )
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by("created_at")
+        if options["rooms"]:
+            rooms = rooms.filter(pk__in=options["rooms"])
+        aliases = sharding.shard_aliases() if sharding.enabled() else [None]
+        room_ids = [
+            room_id
+            for alias in aliases
+            for room_id in rooms.using(alias).values_list("pk", flat=True)
+        ]
+
+        failures = 0
+        for room_id in room_ids:
+            if not options["verify"]:
+                rebuild_room(room_id)
+            with sharding.use_room(room_id):
+                problems = verify_room(room_id)
+            for problem in problems:
+                self.stderr.write(f"{room_id}: {problem}")
+            failures += bool(problems)
+
+        if failures:
+            raise CommandError(f"{failures} of {len(room_ids)} rooms have bad aggregates")
+        action = "Verified" if options["verify"] else "Rebuilt"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(room_ids)} rooms"))
@@ -0,0 +1,58 @@
+"""
+Snapshot room score histories and verify them against the score table.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sharding
+from api.history import take_snapshot, verify_history
+from api.models import Room
+
+
+class Command(BaseCommand):
+    help = "Save a snapshot of each room's score history, so rebuilds replay less."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "rooms", nargs="*", help="Room ids to process (default: all rooms)."
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the replayed history with the scores; change nothing.",
+        )
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by("created_at")
+        if options["rooms"]:
+            rooms = rooms.filter(pk__in=options["rooms"])
+        aliases = sharding.shard_aliases() if sharding.enabled() else [None]
+        room_ids = [
+            room_id
+            for alias in aliases
+            for room_id in rooms.using(alias).values_list("pk", flat=True)
+        ]
+
+        failures = 0
+        snapshots = 0
+        for room_id in room_ids:
+            with sharding.use_room(room_id):
+                if not options["verify"]:
+                    snapshots += take_snapshot(room_id) is not None
+                problems = verify_history(room_id)
+            for problem in problems:
+                self.stderr.write(f"{room_id}: {problem}")
+            failures += bool(problems)
+
+        if failures:
+            raise CommandError(
+                f"{failures} of {len(room_ids)} rooms disagree with their history"
+            )
+        if options["verbosity"] < 1:
+            return
+        if options["verify"]:
+            self.stdout.write(self.style.SUCCESS(f"Verified {len(room_ids)} rooms"))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Saved {snapshots} snapshots of {len(room_ids)} rooms")
+            )
@@ -0,0 +1,206 @@
+"""
+In-memory request metrics, rendered in the Prometheus text format.
+
+Each process keeps its own histograms and counters; scrape every worker (or
+run one) to see the whole picture. RequestMetricsMiddleware fills most of
+them in.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name: (help, buckets)
+METRICS = {
+    "scorecard_request_duration_seconds": (
+        "Wall time of API requests.",
+        SECONDS_BUCKETS,
+    ),
+    "scorecard_request_sql_queries": (
+        "SQL statements executed per request.",
+        QUERY_BUCKETS,
+    ),
+    "scorecard_request_sql_duration_seconds": (
+        "Time spent executing SQL per request, including waits for locks.",
+        SECONDS_BUCKETS,
+    ),
+    "scorecard_request_serializer_duration_seconds": (
+        "Time spent producing serializer data per request.",
+        SECONDS_BUCKETS,
+    ),
+    "scorecard_response_size_bytes": (
+        "Size of response bodies (streaming responses excluded).",
+        SIZE_BUCKETS,
+    ),
+}
+
+
+# name: help
+COUNTERS = {
+    "scorecard_room_code_lookups_total": (
+        "Room code lookups by outcome: hit and negative_hit (served by the "
+        "process cache), shared_hit (by the shared cache) and miss (database)."
+    ),
+}
+
+
+class Histogram:
+    """A thread-safe histogram with fixed upper bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = next(
+            (n for n, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Return cumulative (bound, count) pairs, the sum and the count."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(
+                    key, Histogram(METRICS[name][1])
+                )
+        histogram.observe(value)
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        lines = []
+        for name, (help_text, _) in METRICS.items():
+            series = [(labels, h) for (metric, labels), h in items if metric == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                buckets, total, count = histogram.snapshot()
+                for bound, bucket_count in buckets:
+                    le = "+Inf" if bound == math.inf else _number(bound)
+                    lines.append(
+                        f"{name}_bucket{_labels(labels + (('le', le),))} {bucket_count}"
+                    )
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        for name, help_text in COUNTERS.items():
+            series = [(labels, value) for (metric, labels), value in counters if metric == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series:
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels):
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    """Timings collected while one request is handled."""
+
+    def __init__(self, capture_sql=False):
+        self.capture_sql = capture_sql
+        self.queries = []
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every statement."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_count += 1
+            self.sql_seconds += elapsed
+            if self.capture_sql:
+                self.queries.append((sql, elapsed))
+
+
+current_request = contextvars.ContextVar("current_request_metrics", default=None)
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the current request's serializer time.
+
+    Blocks nested in one already being timed are not counted twice.
+    """
+    metrics = current_request.get()
+    if metrics is None or metrics._serializing:
+        yield
+        return
+    metrics._serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - start
+        metrics._serializing = False
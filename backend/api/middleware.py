@@ -0,0 +1,142 @@
+"""
+Middleware for the scorecard API.
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from .metrics import RequestMetrics, current_request, registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+# Brotli's default quality (11) is meant for static assets, far too slow per request.
+BROTLI_QUALITY = 5
+
+
+def view_action(view_func, method):
+    """Name a view for metrics, e.g. ``RoomViewSet.join`` or ``room_events``."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{cls.__name__}.{actions.get(method.lower(), method.lower())}"
+
+
+class RequestMetricsMiddleware:
+    """Record wall, SQL and serializer time and response size per view action.
+
+    With REQUEST_SLOW_LOG_MS set, requests slower than that are logged at
+    WARNING with every SQL statement they ran.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = settings.REQUEST_SLOW_LOG_MS / 1000
+
+    def __call__(self, request):
+        metrics = RequestMetrics(capture_sql=self.slow_seconds > 0)
+        request.metrics_action = None
+        token = current_request.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        elapsed = time.perf_counter() - start
+
+        action = request.metrics_action
+        if action is None:
+            return response
+        labels = {"action": action, "method": request.method}
+        registry.observe("scorecard_request_duration_seconds", labels, elapsed)
+        registry.observe("scorecard_request_sql_queries", labels, metrics.query_count)
+        registry.observe(
+            "scorecard_request_sql_duration_seconds", labels, metrics.sql_seconds
+        )
+        registry.observe(
+            "scorecard_request_serializer_duration_seconds",
+            labels,
+            metrics.serializer_seconds,
+        )
+        if not response.streaming:
+            registry.observe(
+                "scorecard_response_size_bytes", labels, len(response.content)
+            )
+
+        if self.slow_seconds and elapsed >= self.slow_seconds:
+            logger.warning(
+                "Slow request %s %s (%s): %.1fms, %d queries in %.1fms, "
+                "serializers %.1fms\n%s",
+                request.method,
+                request.get_full_path(),
+                action,
+                elapsed * 1000,
+                metrics.query_count,
+                metrics.sql_seconds * 1000,
+                metrics.serializer_seconds * 1000,
+                "\n".join(
+                    f"  {seconds * 1000:.1f}ms {sql}" for sql, seconds in metrics.queries
+                ),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(view_func, "exclude_from_metrics", False):
+            request.metrics_action = view_action(view_func, request.method)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses of at least COMPRESSION_MIN_SIZE bytes.
+
+    Uses brotli when the ``brotli`` package is installed and the client
+    accepts it, gzip otherwise. Event streams are sent uncompressed so events
+    are never held back in a compressor's buffer.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    def process_response(self, request, response):
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if (
+            brotli is not None
+            and not response.streaming
+            and not response.has_header("Content-Encoding")
+            and re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return self.brotli_response(response)
+        return super().process_response(request, response)
+
+    def brotli_response(self, response):
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def stamp_existing_rows(apps, schema_editor):
+    """Put existing rooms, players and scores at version 1."""
+    for model_name, field in [
+        ("Room", "version"),
+        ("Player", "room_version"),
+        ("Score", "room_version"),
+    ]:
+        apps.get_model("api", model_name).objects.using(
+            schema_editor.connection.alias
+        ).update(**{field: 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_score_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('player', 'Player'), ('score', 'Score')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('room_version', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'ordering': ['room_version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='room_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='score',
+            name='room_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['room', 'room_version'], name='api_player_room_id_f9acf3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['room', 'room_version'], name='api_score_room_id_1cde00_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='api.room'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['room', 'room_version'], name='api_tombsto_room_id_7a5aaa_idx'),
+        ),
+        migrations.RunPython(
+            stamp_existing_rows, migrations.RunPython.noop, hints={"model_name": "room"}
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_aggregates(apps, schema_editor):
+    """Compute aggregates for rooms that existed before this migration."""
+    Room = apps.get_model("api", "Room")
+    Player = apps.get_model("api", "Player")
+    Score = apps.get_model("api", "Score")
+    RoomAggregate = apps.get_model("api", "RoomAggregate")
+    PlayerTotal = apps.get_model("api", "PlayerTotal")
+    db = schema_editor.connection.alias
+
+    for room in Room.objects.using(db):
+        scores = Score.objects.using(db).filter(room=room)
+        RoomAggregate.objects.using(db).create(
+            room=room,
+            score_count=scores.count(),
+            total_rounds=scores.values("round_number").distinct().count(),
+        )
+    totals = {
+        row["player_id"]: row
+        for row in Score.objects.using(db).order_by()
+        .values("player_id")
+        .annotate(total=models.Sum("score_value"), score_count=models.Count("id"))
+    }
+    PlayerTotal.objects.using(db).bulk_create(
+        PlayerTotal(
+            player_id=player_id,
+            room_id=room_id,
+            total=totals.get(player_id, {}).get("total", 0),
+            score_count=totals.get(player_id, {}).get("score_count", 0),
+        )
+        for player_id, room_id in Player.objects.using(db).values_list("id", "room_id")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_room_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomAggregate',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='aggregate', serialize=False, to='api.room')),
+                ('score_count', models.PositiveIntegerField(default=0)),
+                ('total_rounds', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlayerTotal',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='total', serialize=False, to='api.player')),
+                ('total', models.BigIntegerField(default=0)),
+                ('score_count', models.PositiveIntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_totals', to='api.room')),
+            ],
+            options={
+                'ordering': ['player__joined_at'],
+            },
+        ),
+        migrations.RunPython(
+            build_aggregates, migrations.RunPython.noop, hints={"model_name": "roomaggregate"}
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+
+def create_sequence(apps, schema_editor):
+    apps.get_model("api", "RoomCodeSequence").objects.using(
+        schema_editor.connection.alias
+    ).create(id=1, next_value=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_score_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomCodeSequence',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('next_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(
+            create_sequence,
+            migrations.RunPython.noop,
+            hints={"model_name": "roomcodesequence"},
+        ),
+    ]
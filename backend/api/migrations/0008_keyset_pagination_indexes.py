@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_room_code_sequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['room', 'joined_at', 'id'], name='api_player_room_id_d249a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['joined_at', 'id'], name='api_player_joined__bb08f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['room', 'round_number', 'created_at', 'id'], name='api_score_room_id_36ad8c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['round_number', 'created_at', 'id'], name='api_score_round_n_339cf7_idx'),
+        ),
+    ]
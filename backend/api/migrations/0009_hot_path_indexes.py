@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['room', 'name', 'joined_at'], name='player_active_room_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['-created_at'], name='api_room_created_c07d43_idx'),
+        ),
+    ]
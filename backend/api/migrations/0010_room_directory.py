@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDirectory',
+            fields=[
+                ('room_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('room_code', models.CharField(max_length=8, unique=True)),
+                ('shard', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'room directory',
+            },
+        ),
+    ]
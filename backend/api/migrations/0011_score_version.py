@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_room_directory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='score',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1),
+        ),
+    ]
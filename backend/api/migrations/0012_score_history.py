@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:22
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def snapshot_existing_scores(apps, schema_editor):
+    """Start each room's history from a snapshot of the scores it already has."""
+    Room = apps.get_model("api", "Room")
+    Score = apps.get_model("api", "Score")
+    RoomScoreSnapshot = apps.get_model("api", "RoomScoreSnapshot")
+    db = schema_editor.connection.alias
+
+    for room in Room.objects.using(db):
+        scores = {
+            str(score.pk): {
+                "player_id": score.player_id,
+                "round_number": score.round_number,
+                "category": score.category,
+                "score_value": score.score_value,
+                "notes": score.notes,
+                "created_at": score.created_at,
+            }
+            for score in Score.objects.using(db).filter(room=room)
+        }
+        if scores:
+            RoomScoreSnapshot.objects.using(db).create(
+                room=room, sequence=0, room_version=room.version, scores=scores
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_score_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('room_version', models.PositiveBigIntegerField()),
+                ('score_id', models.UUIDField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('origin', models.CharField(choices=[('edit', 'Edit'), ('undo', 'Undo'), ('redo', 'Redo')], default='edit', max_length=10)),
+                ('reverts', models.UUIDField(blank=True, null=True)),
+                ('state', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('previous', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_events', to='api.room')),
+            ],
+            options={
+                'ordering': ['sequence'],
+                'unique_together': {('room', 'sequence')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomScoreSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('room_version', models.PositiveBigIntegerField()),
+                ('scores', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_snapshots', to='api.room')),
+            ],
+            options={
+                'ordering': ['sequence'],
+                'indexes': [models.Index(fields=['room', 'sequence'], name='api_roomsco_room_id_443d5a_idx')],
+            },
+        ),
+        migrations.RunPython(
+            snapshot_existing_scores,
+            migrations.RunPython.noop,
+            hints={"model_name": "roomscoresnapshot"},
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:43
+
+from django.db import migrations, models
+import django.db.models.functions
+import django.db.models.functions.text
+import django.utils.timezone
+
+
+def backfill_lobby(apps, schema_editor):
+    """Start rooms' activity at their creation and count their active players."""
+    Room = apps.get_model("api", "Room")
+    Player = apps.get_model("api", "Player")
+    RoomAggregate = apps.get_model("api", "RoomAggregate")
+    db = schema_editor.connection.alias
+
+    Room.objects.using(db).update(last_activity=models.F("created_at"))
+    active = (
+        Player.objects.using(db)
+        .filter(room=models.OuterRef("room_id"), is_active=True)
+        .order_by()
+        .values("room")
+        .annotate(count=models.Count("pk"))
+        .values("count")
+    )
+    RoomAggregate.objects.using(db).update(
+        player_count=models.functions.Coalesce(models.Subquery(active), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_score_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='roomaggregate',
+            name='player_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(
+            backfill_lobby, migrations.RunPython.noop, hints={"model_name": "room"}
+        ),
+        migrations.AddIndex(
+            model_name='playertotal',
+            index=models.Index(fields=['room', '-total', 'player'], name='api_playert_room_id_68dbab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['last_activity', 'id'], name='room_lobby_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['game_type', 'last_activity', 'id'], name='room_lobby_game_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(django.db.models.functions.text.Lower('name'), condition=models.Q(('is_active', True)), name='room_lobby_name_idx'),
+        ),
+    ]
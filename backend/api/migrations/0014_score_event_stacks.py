@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:53
+
+from django.db import migrations, models
+
+
+def link_stacks(apps, schema_editor):
+    """Record the undo and redo stacks below each existing event."""
+    ScoreEvent = apps.get_model("api", "ScoreEvent")
+    db = schema_editor.connection.alias
+
+    def top(stack):
+        return stack[-1] if stack else None
+
+    room_id = None
+    for event in ScoreEvent.objects.using(db).order_by("room", "sequence"):
+        if event.room_id != room_id:
+            room_id, undo, redo = event.room_id, [], []
+        if event.origin == "undo":
+            undo.pop()
+            pushed = redo
+        elif event.origin == "redo":
+            redo.pop()
+            pushed = undo
+        else:
+            redo.clear()
+            pushed = undo
+        event.undo_below, event.redo_below = top(undo), top(redo)
+        event.save(update_fields=["undo_below", "redo_below"])
+        pushed.append(event.pk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_lobby'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoreevent',
+            name='redo_below',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scoreevent',
+            name='undo_below',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            link_stacks, migrations.RunPython.noop, hints={"model_name": "scoreevent"}
+        ),
+    ]
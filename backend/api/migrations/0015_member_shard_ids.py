@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:55
+
+import api.sharding
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_score_event_stacks'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='player',
+            name='id',
+            field=models.UUIDField(default=api.sharding.member_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='score',
+            name='id',
+            field=models.UUIDField(default=api.sharding.member_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_member_shard_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scoreevent',
+            name='action',
+            field=models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'), ('rebase', 'Rebase')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='scoreevent',
+            name='score_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
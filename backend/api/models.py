@@ -3,9 +3,22 @@ Models for the scorecard API.
 """
 
 import uuid
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from . import sharding
+
+
+ROOM_CODE_ATTEMPTS = 5
+
+
+class VersionConflict(Exception):
+    """A row was changed since the version a write expected."""
+
 
 class Room(models.Model):
     """A room where players can join to play games together."""
@@ -22,31 +35,140 @@ class Room(models.Model):
     room_code = models.CharField(max_length=8, unique=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
+    version = models.PositiveBigIntegerField(default=0)
+    # Set whenever the room's version is bumped, i.e. by every write.
+    last_activity = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"]),
+            # The lobby: active rooms by recent activity, by game type or
+            # by name prefix.
+            models.Index(
+                fields=["last_activity", "id"],
+                condition=models.Q(is_active=True),
+                name="room_lobby_idx",
+            ),
+            models.Index(
+                fields=["game_type", "last_activity", "id"],
+                condition=models.Q(is_active=True),
+                name="room_lobby_game_idx",
+            ),
+            models.Index(
+                Lower("name"),
+                condition=models.Q(is_active=True),
+                name="room_lobby_name_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.room_code:
-            import random
-            import string
-
-            while True:
-                self.room_code = "".join(
-                    random.choices(string.ascii_uppercase + string.digits, k=8)
-                )
-                if not Room.objects.filter(room_code=self.room_code).exists():
-                    break
-        super().save(*args, **kwargs)
+        from .codes import allocate_room_code
+
+        allocate = not self.room_code
+        for attempt in range(1, ROOM_CODE_ATTEMPTS + 1):
+            if allocate:
+                self.room_code = allocate_room_code()
+            try:
+                self._save_with_aggregate(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Allocated codes never repeat, but may hit a legacy random
+                # code or a block reclaimed after a rolled back transaction.
+                if (
+                    not allocate
+                    or attempt == ROOM_CODE_ATTEMPTS
+                    or not Room.objects.filter(room_code=self.room_code).exists()
+                ):
+                    raise
+
+    def _save_with_aggregate(self, *args, **kwargs):
+        adding = self._state.adding
+        with sharding.use_room(self.pk) as db, transaction.atomic(using=db):
+            if sharding.enabled():
+                kwargs["using"] = db
+            super().save(*args, **kwargs)
+            if adding:
+                RoomAggregate.objects.create(room=self)
+        if adding and sharding.enabled():
+            sharding.register(self, db)
 
     def __str__(self):
         return f"{self.name} ({self.room_code})"
 
+    @staticmethod
+    def next_version(room_id):
+        """Bump a room's change counter and return the new value.
+
+        Must run inside the transaction that makes the change, so that the
+        row lock taken by the UPDATE orders concurrent writers.
+        """
+        from .snapshots import forget_version
+
+        rooms = Room.objects.using(sharding.room_db(room_id)).filter(pk=room_id)
+        rooms.update(version=models.F("version") + 1, last_activity=timezone.now())
+        forget_version(room_id)
+        return rooms.values_list("version", flat=True).get()
+
+
+class RoomDirectory(models.Model):
+    """Where a room lives when rooms are sharded (see api.sharding)."""
+
+    room_id = models.UUIDField(primary_key=True)
+    room_code = models.CharField(max_length=8, unique=True)
+    shard = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name_plural = "room directory"
+
+    def __str__(self):
+        return f"{self.room_code} on shard {self.shard}"
+
+
+class RoomCodeSequence(models.Model):
+    """The next unreserved value of the room code sequence (a single row)."""
+
+    SINGLETON = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON)
+    next_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"next room code sequence value: {self.next_value}"
+
+
+class VersionedRoomMember(models.Model):
+    """A row whose writes bump its room's version (for delta sync)."""
+
+    room_version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
 
-class Player(models.Model):
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "room_version"}
+        with sharding.use_room(self.room_id) as db, transaction.atomic(using=db):
+            if sharding.enabled():
+                kwargs["using"] = db
+            self.room_version = Room.next_version(self.room_id)
+            self.save_locked(*args, **kwargs)
+
+    def save_locked(self, *args, **kwargs):
+        """Write the row; the room's version (and its write lock) is already held.
+
+        Reads that must happen in the same transaction belong here, after
+        the lock: on SQLite a transaction that reads first cannot upgrade to
+        a write lock while another writer waits, and fails instead.
+        """
+        super().save(*args, **kwargs)
+
+
+class Player(VersionedRoomMember):
     """A player in a room."""
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=sharding.member_id, editable=False)
     name = models.CharField(max_length=100)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="players")
     joined_at = models.DateTimeField(default=timezone.now)
@@ -54,12 +176,34 @@ class Player(models.Model):
 
     class Meta:
         ordering = ["joined_at"]
+        indexes = [
+            models.Index(fields=["room", "room_version"]),
+            # Keyset pagination, per room and over all players.
+            models.Index(fields=["room", "joined_at", "id"]),
+            models.Index(fields=["joined_at", "id"]),
+            # Joining by name and counting active players only touch active rows.
+            models.Index(
+                fields=["room", "name", "joined_at"],
+                condition=models.Q(is_active=True),
+                name="player_active_room_name_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} in {self.room.name}"
 
+    def save(self, *args, **kwargs):
+        from . import aggregates
+
+        adding = self._state.adding
+        with sharding.use_room(self.room_id) as db, transaction.atomic(using=db):
+            super().save(*args, **kwargs)
+            if adding:
+                PlayerTotal.objects.create(player=self, room_id=self.room_id)
+            aggregates.count_players(self.room_id)
 
-class Score(models.Model):
+
+class Score(VersionedRoomMember):
     """A score entry for a player in a room."""
 
     YAHTZEE_CATEGORIES = [
@@ -78,7 +222,7 @@ class Score(models.Model):
         ("chance", "Chance"),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=sharding.member_id, editable=False)
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="scores")
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="scores")
     round_number = models.PositiveIntegerField(default=1)
@@ -88,10 +232,260 @@ class Score(models.Model):
     )
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Bumped by every write to this score, for optimistic concurrency control.
+    version = models.PositiveBigIntegerField(default=1)
+
+    # Set before save() to only write if the row is still at this version.
+    expected_version = None
 
     class Meta:
         ordering = ["round_number", "created_at"]
         unique_together = ["player", "room", "round_number", "category"]
+        indexes = [
+            models.Index(fields=["room", "room_version"]),
+            # Keyset pagination, per room and over all scores.
+            models.Index(fields=["room", "round_number", "created_at", "id"]),
+            models.Index(fields=["round_number", "created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.player.name} - Round {self.round_number}: {self.score_value}"
+
+    def save_locked(self, *args, **kwargs):
+        from . import aggregates, history
+
+        if self._state.adding:
+            super().save_locked(*args, **kwargs)
+            aggregates.score_saved(self, None)
+            history.score_saved(self, None)
+            return
+        previous = (
+            Score.objects.filter(pk=self.pk)
+            .values("version", *history.STATE_FIELDS)
+            .first()
+        )
+        if previous is None:
+            raise Score.DoesNotExist(f"Score {self.pk} was deleted")
+        update_fields = kwargs.get("update_fields")
+        self._compare_and_swap(previous["version"], update_fields)
+        aggregates.score_saved(self, previous)
+        history.score_saved(self, previous, update_fields)
+
+    def _compare_and_swap(self, current_version, update_fields=None):
+        """Write the row in one UPDATE guarded by ``expected_version``.
+
+        Raises VersionConflict, writing nothing, if the row is no longer at
+        the expected version (by default the one just read).
+        """
+        expected = self.expected_version or current_version
+        fields = [
+            field
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.name != "version"
+            and (update_fields is None or field.name in update_fields)
+        ]
+        updated = Score.objects.filter(pk=self.pk, version=expected).update(
+            version=expected + 1,
+            **{field.attname: getattr(self, field.attname) for field in fields},
+        )
+        if not updated:
+            raise VersionConflict(
+                f"Score {self.pk} is at version {current_version}, not {expected}"
+            )
+        self.version = expected + 1
+        self.expected_version = None
+
+
+class RoomAggregate(models.Model):
+    """Running score counters for a room, kept in step with every score write."""
+
+    room = models.OneToOneField(
+        Room, primary_key=True, on_delete=models.CASCADE, related_name="aggregate"
+    )
+    score_count = models.PositiveIntegerField(default=0)
+    total_rounds = models.PositiveIntegerField(default=0)
+    # Active players, recounted on every player write.
+    player_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.room_id}: {self.score_count} scores"
+
+
+class PlayerTotal(models.Model):
+    """A player's running score total, kept in step with every score write."""
+
+    player = models.OneToOneField(
+        Player, primary_key=True, on_delete=models.CASCADE, related_name="total"
+    )
+    room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name="player_totals"
+    )
+    total = models.BigIntegerField(default=0)
+    score_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["player__joined_at"]
+        # Each room's leader, for the lobby.
+        indexes = [models.Index(fields=["room", "-total", "player"])]
+
+    def __str__(self):
+        return f"{self.player_id}: {self.total}"
+
+
+class Tombstone(models.Model):
+    """Records a deleted player or score so delta sync can report it."""
+
+    KINDS = [
+        ("player", "Player"),
+        ("score", "Score"),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="tombstones")
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.UUIDField()
+    room_version = models.PositiveBigIntegerField()
+
+    class Meta:
+        ordering = ["room_version"]
+        indexes = [models.Index(fields=["room", "room_version"])]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at v{self.room_version}"
+
+
+class ScoreEvent(models.Model):
+    """One write to a score, in its room's append-only history (see api.history)."""
+
+    ACTIONS = [
+        ("create", "Create"),
+        ("update", "Update"),
+        ("delete", "Delete"),
+        # The score table was taken as it is (see history.rebase).
+        ("rebase", "Rebase"),
+    ]
+    ORIGINS = [
+        ("edit", "Edit"),
+        ("undo", "Undo"),
+        ("redo", "Redo"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="score_events")
+    # Position in the room's history, counting from 1.
+    sequence = models.PositiveBigIntegerField()
+    room_version = models.PositiveBigIntegerField()
+    # None for a rebase, which concerns every score.
+    score_id = models.UUIDField(null=True, blank=True)
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    origin = models.CharField(max_length=10, choices=ORIGINS, default="edit")
+    # The event an undo or redo reverted.
+    reverts = models.UUIDField(null=True, blank=True)
+    # The tops of the undo and redo stacks below this event once it is
+    # written, so undo and redo read one event instead of the whole log.
+    undo_below = models.UUIDField(null=True, blank=True)
+    redo_below = models.UUIDField(null=True, blank=True)
+    # The score's fields after and before the write: a create has no
+    # previous state and a delete no state.
+    state = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    previous = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["sequence"]
+        unique_together = ["room", "sequence"]
+
+    def __str__(self):
+        return f"#{self.sequence} {self.origin} {self.action} of score {self.score_id}"
+
+
+class RoomScoreSnapshot(models.Model):
+    """A room's scores as of one event of its history, to replay the rest from."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name="score_snapshots"
+    )
+    # The sequence of the last event included (0 for none).
+    sequence = models.PositiveBigIntegerField()
+    room_version = models.PositiveBigIntegerField()
+    # Score id -> the score's fields, as in ScoreEvent.state.
+    scores = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["sequence"]
+        indexes = [models.Index(fields=["room", "sequence"])]
+
+    def __str__(self):
+        return f"{self.room_id} at #{self.sequence}"
+
+
+def _deleting_room(origin):
+    return isinstance(origin, Room) or getattr(origin, "model", None) is Room
+
+
+@receiver(post_delete, sender=Player)
+@receiver(post_delete, sender=Score)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Leave a tombstone for deleted players and scores.
+
+    Nothing is recorded when the whole room is being deleted.
+    """
+    if _deleting_room(origin):
+        return
+    instance.room_version = Room.next_version(instance.room_id)
+    Tombstone.objects.create(
+        room_id=instance.room_id,
+        kind=sender._meta.model_name,
+        object_id=instance.pk,
+        room_version=instance.room_version,
+    )
+
+
+@receiver(post_delete, sender=Score)
+def remove_from_aggregates(sender, instance, origin=None, **kwargs):
+    """Take a deleted score out of its room and player totals."""
+    from . import aggregates
+
+    if _deleting_room(origin):
+        return
+    with sharding.use_room(instance.room_id):
+        aggregates.score_deleted(instance)
+
+
+@receiver(post_delete, sender=Player)
+def recount_players(sender, instance, origin=None, **kwargs):
+    """Recount the active players of a deleted player's room."""
+    from . import aggregates
+
+    if _deleting_room(origin):
+        return
+    with sharding.use_room(instance.room_id):
+        aggregates.count_players(instance.room_id)
+
+
+@receiver(post_delete, sender=Score)
+def log_score_deletion(sender, instance, origin=None, **kwargs):
+    """Append a deleted score to its room's history."""
+    from . import history
+
+    if _deleting_room(origin):
+        return
+    history.score_deleted(instance)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def forget_room_code(sender, instance, using, **kwargs):
+    """Drop a saved or deleted room's code from the lookup cache."""
+    from . import code_cache
+
+    code_cache.forget(instance.room_code, using)
+
+
+@receiver(post_delete, sender=Room)
+def remove_from_directory(sender, instance, using, **kwargs):
+    """Forget a deleted room's shard."""
+    if sharding.enabled():
+        sharding.unregister(instance.pk, using)
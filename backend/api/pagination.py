@@ -0,0 +1,170 @@
+"""
+Keyset (cursor) pagination for the API.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginate on a unique multi-column ordering without OFFSET or COUNT.
+
+    DRF's CursorPagination positions on the first ordering field only and
+    falls back to an offset among ties, which degrades on columns such as
+    round_number. Here the cursor holds the full ordering key of the edge
+    row, so every page is a single index range scan. Fields in
+    ``ordering`` may be descending ("-field").
+    """
+
+    ordering = ()
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def fields(self):
+        """The ordering as (field name, descending) pairs."""
+        return [(field.lstrip("-"), field.startswith("-")) for field in self.ordering]
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            reverse, values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError(encoded)
+            values = tuple(
+                model._meta.get_field(field).to_python(value)
+                for (field, _), value in zip(self.fields(), values)
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(reverse), values
+
+    def encode_cursor(self, reverse, row):
+        values = [getattr(row, field) for field, _ in self.fields()]
+        payload = json.dumps([reverse, values], cls=JSONEncoder)
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def after(self, values, reverse):
+        """Filter for rows strictly past ``values`` in the ordering."""
+        fields = self.fields()
+        condition = Q()
+        for depth, (field, descending) in enumerate(fields):
+            lookup = "lt" if reverse != descending else "gt"
+            step = Q(**{f"{field}__{lookup}": values[depth]})
+            for (previous, _), value in zip(fields[:depth], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        # The redundant bound on the leading column lets SQLite seek the index.
+        lead, descending = fields[0]
+        lookup = "lt" if reverse != descending else "gt"
+        return Q(**{f"{lead}__{lookup}e": values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        reverse, values = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(
+            *(
+                f"-{field}" if reverse != descending else field
+                for field, descending in self.fields()
+            )
+        )
+        if values is not None:
+            queryset = queryset.filter(self.after(values, reverse))
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next = self.previous = None
+        if rows and (has_more if not reverse else True):
+            self.next = self.encode_cursor(False, rows[-1])
+        if rows and (has_more if reverse else values is not None):
+            self.previous = self.encode_cursor(True, rows[0])
+        if not rows and values is not None:
+            # Walked off either end: offer the way back.
+            first_page = remove_query_param(self.base_url, self.cursor_query_param)
+            if reverse:
+                self.next = first_page
+            else:
+                self.previous = first_page
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.next, "previous": self.previous, "results": data}
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class ScoreKeysetPagination(KeysetPagination):
+    """Scores in round order, then by creation time."""
+
+    ordering = ("round_number", "created_at", "id")
+
+
+class PlayerKeysetPagination(KeysetPagination):
+    """Players in join order."""
+
+    ordering = ("joined_at", "id")
+
+
+class LobbyKeysetPagination(KeysetPagination):
+    """Active rooms, most recently active first."""
+
+    ordering = ("-last_activity", "-id")
+
+
+class SelectablePaginationMixin:
+    """Use keyset pagination when the request asks for a cursor.
+
+    Requests with ``?pagination=cursor`` (or a ``cursor`` from a previous
+    page) get ``keyset_pagination_class``; others keep the default page
+    number pagination.
+    """
+
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if self.keyset_pagination_class is not None and (
+                "cursor" in params or params.get("pagination") == "cursor"
+            ):
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
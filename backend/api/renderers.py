@@ -0,0 +1,55 @@
+"""
+Renderers for the scorecard API.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer output, produced with orjson when it is installed.
+
+    The bytes match JSONRenderer's compact, unicode output, including its
+    escaping of U+2028 and U+2029. Indented output, and data orjson cannot
+    encode exactly (floats, which it formats differently, big integers and
+    types it does not know), go through JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or _contains_float(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_unsupported)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+def _contains_float(data):
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        items = value.values() if isinstance(value, dict) else value
+        kinds = set(map(type, items))
+        if any(issubclass(kind, float) for kind in kinds):
+            return True
+        if any(issubclass(kind, (dict, list, tuple)) for kind in kinds):
+            stack.extend(item for item in items if isinstance(item, (dict, list, tuple)))
+    return False
+
+
+def _unsupported(value):
+    raise TypeError(type(value).__name__)
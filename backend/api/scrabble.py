@@ -0,0 +1,231 @@
+"""
+Scrabble word checks and base scores.
+
+Words are checked against a lexicon compiled from a word list into a
+DAWG: the minimal automaton accepting exactly those words, where common
+suffixes share nodes as well as common prefixes. The
+``build_scrabble_lexicon`` command writes it as a flat array of 32-bit
+edges, which workers memory-map, so opening it costs nothing and its
+pages are shared by every process on the machine.
+
+Each node is a run of edges sorted by letter. An edge packs its letter
+(bits 0-4), whether it is the node's last edge (bit 5), whether a word
+ends after it (bit 6) and the offset of its target node's first edge
+(bits 7-31; 0 for a node with no edges).
+
+Base scores are the sum of the letter values, before premium squares,
+blanks or bingos.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from django.conf import settings
+
+LETTER_VALUES = {
+    **dict.fromkeys("AEILNORSTU", 1),
+    **dict.fromkeys("DG", 2),
+    **dict.fromkeys("BCMP", 3),
+    **dict.fromkeys("FHVWY", 4),
+    "K": 5,
+    **dict.fromkeys("JX", 8),
+    **dict.fromkeys("QZ", 10),
+}
+
+MAGIC = b"SCDAWG1\0"
+# Magic, word count, edge count, root offset.
+HEADER = struct.Struct("<8sIII")
+
+LETTER_BITS = 0x1F
+LAST = 1 << 5
+FINAL = 1 << 6
+TARGET_SHIFT = 7
+
+
+class LexiconUnavailable(Exception):
+    """The lexicon file is missing or is not a lexicon."""
+
+
+def normalize(word):
+    """The word in upper case, or None unless it is made of the letters A-Z."""
+    word = word.strip().upper()
+    if word and word.isascii() and word.isalpha():
+        return word
+    return None
+
+
+def score(word):
+    """The base score of a word: the sum of its letter values."""
+    return sum(LETTER_VALUES[letter] for letter in word)
+
+
+class _Node:
+    __slots__ = ("number", "final", "edges")
+
+    def __init__(self, number):
+        self.number = number
+        self.final = False
+        self.edges = {}
+
+    def signature(self):
+        return self.final, tuple(
+            (letter, child.number) for letter, child in sorted(self.edges.items())
+        )
+
+
+def _minimize(unchecked, register, down_to):
+    """Merge the nodes of the last word below ``down_to`` into equivalent ones."""
+    while len(unchecked) > down_to:
+        parent, letter, child = unchecked.pop()
+        existing = register.setdefault(child.signature(), child)
+        if existing is not child:
+            parent.edges[letter] = existing
+
+
+def compile_words(words):
+    """Compile words into DAWG bytes; return (bytes, word count).
+
+    Words are normalized, and those with other characters than A-Z are
+    skipped. Builds the minimal automaton incrementally over the sorted
+    words (Daciuk et al.), so memory stays proportional to its size.
+    """
+    words = sorted({word for word in map(normalize, words) if word})
+    numbers = iter(range(sys.maxsize))
+    root = _Node(next(numbers))
+    register = {}
+    unchecked = []
+    previous = ""
+    for word in words:
+        common = 0
+        while common < min(len(word), len(previous)) and word[common] == previous[common]:
+            common += 1
+        _minimize(unchecked, register, common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = _Node(next(numbers))
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    _minimize(unchecked, register, 0)
+
+    # Lay out each distinct node with edges as a block; slot 0 is unused so
+    # that offset 0 can mean "no edges".
+    offsets = {}
+    order = []
+    size = 1
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.number in offsets or not node.edges:
+            continue
+        offsets[node.number] = size
+        order.append(node)
+        size += len(node.edges)
+        stack.extend(node.edges.values())
+
+    edges = array("I", [0]) * size
+    for node in order:
+        offset = offsets[node.number]
+        letters = sorted(node.edges)
+        for n, letter in enumerate(letters):
+            child = node.edges[letter]
+            edges[offset + n] = (
+                (ord(letter) - ord("A"))
+                | (LAST if n == len(letters) - 1 else 0)
+                | (FINAL if child.final else 0)
+                | offsets.get(child.number, 0) << TARGET_SHIFT
+            )
+    if sys.byteorder != "little":
+        edges.byteswap()
+    header = HEADER.pack(MAGIC, len(words), size, offsets.get(root.number, 0))
+    return header + edges.tobytes(), len(words)
+
+
+def save(data, path):
+    """Write compiled lexicon bytes to ``path``, replacing any old file atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".dawg", delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+class Lexicon:
+    """A compiled word list, memory-mapped from ``path``."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise LexiconUnavailable(f"{path} is not a lexicon.")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.word_count, edge_count, self._root = HEADER.unpack_from(self._map)
+        if magic != MAGIC or len(self._map) != HEADER.size + 4 * edge_count:
+            self._map.close()
+            raise LexiconUnavailable(f"{path} is not a lexicon.")
+        self._edges = memoryview(self._map)[HEADER.size :].cast("I")
+        if sys.byteorder != "little":  # pragma: no cover
+            self._edges = array("I", self._edges)
+            self._edges.byteswap()
+
+    def __len__(self):
+        return self.word_count
+
+    def __contains__(self, word):
+        """Whether a normalized (upper case A-Z) word is in the lexicon."""
+        edges = self._edges
+        offset = self._root
+        edge = 0
+        for letter in word:
+            letter = ord(letter) - 65
+            if offset == 0 or not 0 <= letter < 26:
+                return False
+            edge = edges[offset]
+            while edge & LETTER_BITS != letter:
+                if edge & LAST or edge & LETTER_BITS > letter:
+                    return False
+                offset += 1
+                edge = edges[offset]
+            offset = edge >> TARGET_SHIFT
+        return bool(edge & FINAL)
+
+    def check(self, word):
+        """Return (normalized word or None, valid, base score or None)."""
+        normalized = normalize(word)
+        if normalized is None:
+            return None, False, None
+        return normalized, normalized in self, score(normalized)
+
+    def close(self):
+        if isinstance(self._edges, memoryview):
+            self._edges.release()
+        self._map.close()
+
+
+_lexicons = {}
+
+
+def load(path=None):
+    """The lexicon at ``path`` (default SCRABBLE_LEXICON_PATH), memory-mapped once."""
+    path = str(path or settings.SCRABBLE_LEXICON_PATH)
+    lexicon = _lexicons.get(path)
+    if lexicon is None:
+        try:
+            lexicon = Lexicon(path)
+        except FileNotFoundError:
+            raise LexiconUnavailable(
+                "The Scrabble lexicon has not been built "
+                "(manage.py build_scrabble_lexicon <word list>)."
+            )
+        _lexicons[path] = lexicon
+    return lexicon
+
+
+def clear():
+    """Close the lexicons opened so far."""
+    while _lexicons:
+        _lexicons.popitem()[1].close()
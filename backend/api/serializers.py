@@ -2,26 +2,98 @@
 Serializers for the scorecard API.
 """
 
+from django.conf import settings
 from rest_framework import serializers
-from .models import Room, Player, Score
+from rest_framework.permissions import SAFE_METHODS
+from . import yahtzee
+from .metrics import timed_serialization
+from .models import Room, Player, Score, ScoreEvent
 
+# The range of Score.score_value, an IntegerField, on every supported database.
+SCORE_VALUE_MIN, SCORE_VALUE_MAX = -(2**31), 2**31 - 1
 
-class PlayerSerializer(serializers.ModelSerializer):
+
+def _names(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def sparse_fieldset(request, available):
+    """Return the names of ``available`` a request selected, in their order.
+
+    ``?fields=a,b`` keeps only those fields and ``?omit=c`` drops fields.
+    Returns None when the request selects nothing, and raises a
+    ValidationError for unknown names.
+    """
+    params = request.query_params
+    if "fields" not in params and "omit" not in params:
+        return None
+    wanted = _names(params.get("fields", "")) or set(available)
+    omitted = _names(params.get("omit", ""))
+    unknown = (wanted | omitted) - set(available)
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": [f"Unknown field: {name}" for name in sorted(unknown)]}
+        )
+    return [name for name in available if name in wanted and name not in omitted]
+
+
+class TimedSerializerMixin:
+    """Report the time spent building ``.data`` to the request metrics."""
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """The ``many=True`` form of a timed serializer."""
+
+
+class SparseFieldsetMixin:
+    """Serialize only the fields selected with ``?fields=`` and ``?omit=``.
+
+    Applies to the top-level serializer of read requests; nested
+    serializers and writes keep all their fields.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        root = self.root
+        top_level = self is root or (
+            isinstance(root, serializers.ListSerializer) and self.parent is root
+        )
+        if request is None or request.method not in SAFE_METHODS or not top_level:
+            return fields
+        selected = sparse_fieldset(request, list(fields))
+        if selected is None:
+            return fields
+        return {name: fields[name] for name in selected}
+
+
+class PlayerSerializer(
+    TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer
+):
     """Serializer for Player model."""
 
     class Meta:
         model = Player
+        list_serializer_class = TimedListSerializer
         fields = ["id", "name", "room", "joined_at", "is_active"]
         read_only_fields = ["id", "joined_at"]
 
 
-class ScoreSerializer(serializers.ModelSerializer):
+class ScoreSerializer(
+    TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer
+):
     """Serializer for Score model."""
 
     player_name = serializers.CharField(source="player.name", read_only=True)
 
     class Meta:
         model = Score
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "player",
@@ -32,12 +104,21 @@ class ScoreSerializer(serializers.ModelSerializer):
             "category",
             "notes",
             "created_at",
+            "version",
         ]
-        read_only_fields = ["id", "created_at"]
+        read_only_fields = ["id", "created_at", "version"]
 
 
-class ScoreUpdateSerializer(serializers.ModelSerializer):
-    """Serializer for updating Score model (partial updates allowed)."""
+class ScoreUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for updating Score model (partial updates allowed).
+
+    An optional ``version`` makes the update conditional on the score still
+    being at that version.
+    """
+
+    version = serializers.IntegerField(
+        source="expected_version", required=False, write_only=True, min_value=1
+    )
 
     class Meta:
         model = Score
@@ -50,6 +131,7 @@ class ScoreUpdateSerializer(serializers.ModelSerializer):
             "category",
             "notes",
             "created_at",
+            "version",
         ]
         read_only_fields = [
             "id",
@@ -60,8 +142,195 @@ class ScoreUpdateSerializer(serializers.ModelSerializer):
             "category",
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["version"] = instance.version
+        return data
+
+
+class BulkScoreItemSerializer(serializers.ModelSerializer):
+    """One score in a bulk submission; the player is checked against the room."""
+
+    player = serializers.UUIDField()
+
+    class Meta:
+        model = Score
+        fields = ["player", "round_number", "score_value", "category", "notes"]
+        extra_kwargs = {"notes": {"default": None}}
+
+
+class BulkScoreSerializer(serializers.Serializer):
+    """Serializer for submitting many scores for one room at once."""
+
+    room = serializers.PrimaryKeyRelatedField(queryset=Room.objects.all())
+    scores = BulkScoreItemSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        """Check every score against the room's players in a single query."""
+        players = {player.pk: player for player in attrs["room"].players.all()}
+        errors = []
+        seen = set()
+        for item in attrs["scores"]:
+            item_errors = {}
+            key = (item["player"], item["round_number"], item.get("category"))
+            if item["player"] not in players:
+                item_errors["player"] = ["Player is not in this room."]
+            elif key in seen:
+                item_errors["non_field_errors"] = [
+                    "Duplicate player, round and category in this request."
+                ]
+            seen.add(key)
+            errors.append(item_errors)
+        if any(errors):
+            raise serializers.ValidationError({"scores": errors})
+
+        for item in attrs["scores"]:
+            item["player"] = players[item["player"]]
+        return attrs
+
+
+class ScoreIncrementSerializer(serializers.Serializer):
+    """Payload for incrementing a score."""
+
+    delta = serializers.IntegerField(
+        default=1, min_value=SCORE_VALUE_MIN, max_value=SCORE_VALUE_MAX
+    )
+
+
+class ScoreEventSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for ScoreEvent model (read-only history entries)."""
+
+    class Meta:
+        model = ScoreEvent
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "id",
+            "sequence",
+            "room_version",
+            "score_id",
+            "action",
+            "origin",
+            "reverts",
+            "state",
+            "previous",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class HistoryStepSerializer(serializers.Serializer):
+    """Payload for undoing or redoing score edits."""
+
+    steps = serializers.IntegerField(default=1, min_value=1, max_value=100)
+
+
+class RollsField(serializers.Field):
+    """A list of rolls of five dice, checked as a whole instead of die by die."""
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError("Expected a list of rolls.")
+        if len(data) > settings.YAHTZEE_MAX_ROLLS:
+            raise serializers.ValidationError(
+                f"At most {settings.YAHTZEE_MAX_ROLLS} rolls per request."
+            )
+        try:
+            yahtzee.check_rolls(data)
+        except ValueError as exc:
+            raise serializers.ValidationError(f"{exc}.")
+        return data
 
-class RoomSerializer(serializers.ModelSerializer):
+    def to_representation(self, value):
+        return value
+
+
+class YahtzeeScoreSerializer(serializers.Serializer):
+    """Rolls to score, optionally with the category and score submitted for each."""
+
+    rolls = RollsField()
+    categories = serializers.ListField(
+        child=serializers.ChoiceField(choices=Score.YAHTZEE_CATEGORIES), required=False
+    )
+    scores = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        count = len(attrs["rolls"])
+        for name in ("categories", "scores"):
+            if name in attrs and len(attrs[name]) != count:
+                raise serializers.ValidationError(
+                    {name: [f"Expected one per roll ({count})."]}
+                )
+        if "scores" in attrs and "categories" not in attrs:
+            raise serializers.ValidationError(
+                {"categories": ["Required to check scores."]}
+            )
+        return attrs
+
+
+class YahtzeeTurnSerializer(serializers.Serializer):
+    """One turn of a game: the final dice, the category used and its score."""
+
+    dice = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=6),
+        min_length=yahtzee.DICE,
+        max_length=yahtzee.DICE,
+    )
+    category = serializers.ChoiceField(choices=Score.YAHTZEE_CATEGORIES)
+    score = serializers.IntegerField(required=False)
+
+
+class YahtzeeGameSerializer(serializers.Serializer):
+    """Games to score, each a list of up to 13 turns in the order played."""
+
+    games = serializers.ListField(
+        child=YahtzeeTurnSerializer(many=True, max_length=len(Score.YAHTZEE_CATEGORIES)),
+        allow_empty=False,
+    )
+
+    def validate_games(self, games):
+        if sum(map(len, games)) > settings.YAHTZEE_MAX_ROLLS:
+            raise serializers.ValidationError(
+                f"At most {settings.YAHTZEE_MAX_ROLLS} turns per request."
+            )
+        return games
+
+
+class YahtzeeHintSerializer(serializers.Serializer):
+    """Query for a move hint: the dice showing (``1,3,3,5,6``) and rolls left."""
+
+    dice = serializers.CharField()
+    rolls_left = serializers.IntegerField(default=2, min_value=0, max_value=2)
+
+    def validate_dice(self, value):
+        try:
+            dice = [int(die) for die in value.split(",")]
+            yahtzee.check_rolls([dice])
+        except ValueError:
+            raise serializers.ValidationError(
+                "Expected five dice from 1 to 6, separated by commas."
+            )
+        return dice
+
+
+class ScrabbleWordsSerializer(serializers.Serializer):
+    """Words to check against the Scrabble lexicon and score."""
+
+    words = serializers.ListField(
+        child=serializers.CharField(max_length=32, trim_whitespace=True),
+        allow_empty=False,
+    )
+
+    def validate_words(self, words):
+        if len(words) > settings.SCRABBLE_MAX_WORDS:
+            raise serializers.ValidationError(
+                f"At most {settings.SCRABBLE_MAX_WORDS} words per request."
+            )
+        return words
+
+
+class RoomSerializer(
+    TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer
+):
     """Serializer for Room model."""
 
     players = PlayerSerializer(many=True, read_only=True)
@@ -70,6 +339,7 @@ class RoomSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Room
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "name",
@@ -80,34 +350,51 @@ class RoomSerializer(serializers.ModelSerializer):
             "players",
             "scores",
             "player_count",
+            "version",
         ]
-        read_only_fields = ["id", "room_code", "created_at"]
+        read_only_fields = ["id", "room_code", "created_at", "version"]
 
     def get_player_count(self, obj):
         """Get the number of active players in the room."""
+        if hasattr(obj, "active_player_count"):
+            return obj.active_player_count
         return obj.players.filter(is_active=True).count()
 
 
-class RoomCreateSerializer(serializers.ModelSerializer):
-    """Serializer for creating a new room."""
+class LobbyRoomSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """An active room as the lobby lists it, from the room's aggregates."""
+
+    player_count = serializers.IntegerField(read_only=True)
+    leader = serializers.CharField(read_only=True, allow_null=True)
+    leader_total = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Room
-        fields = ["name", "game_type", "room_code", "id", "created_at", "is_active"]
-        read_only_fields = ["room_code", "id", "created_at"]
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "id",
+            "name",
+            "game_type",
+            "room_code",
+            "player_count",
+            "leader",
+            "leader_total",
+            "last_activity",
+        ]
+        read_only_fields = fields
 
-    def create(self, validated_data):
-        """Create a room with a unique room code."""
-        import random
-        import string
 
-        # Generate a unique 8-character room code
-        while True:
-            room_code = "".join(
-                random.choices(string.ascii_uppercase + string.digits, k=8)
-            )
-            if not Room.objects.filter(room_code=room_code).exists():
-                break
+class LobbyQuerySerializer(serializers.Serializer):
+    """Lobby filters: a game type and a case-insensitive name prefix."""
 
-        validated_data["room_code"] = room_code
-        return super().create(validated_data)
+    game_type = serializers.ChoiceField(choices=Room.GAME_TYPES, required=False)
+    search = serializers.CharField(max_length=100, required=False)
+
+
+class RoomCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for creating a new room."""
+
+    class Meta:
+        model = Room
+        fields = ["name", "game_type", "room_code", "id", "created_at", "is_active"]
+        read_only_fields = ["room_code", "id", "created_at"]
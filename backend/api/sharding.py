@@ -0,0 +1,356 @@
+"""
+Room sharding across several SQLite databases.
+
+SQLite serializes writers per database file. With ROOM_SHARDS set, each room
+and everything in it (players, scores, aggregates, history) lives on one
+of the ``shard_<n>`` databases, so writes to rooms on different shards run
+in parallel. Everything else, including the RoomDirectory that maps room
+ids and codes to shards, stays on ``default``.
+
+New rooms are placed by a jump consistent hash of their id; the directory
+records where each room actually lives, so rooms keep working after the
+shard count changes until ``rebalance_shards`` moves them. Placements are
+cached per process: restart workers after rebalancing. Players and scores
+created for a room carry its shard in the low bits of their ids, so a
+request naming only one of them goes straight to its shard.
+
+Django routers only see model instances, not query filters. Queries about
+a room without an instance at hand go to the shard selected with
+``use_room``, which the viewsets enter for the room each request is about.
+"""
+
+import hashlib
+import heapq
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Room-scoped models, in the order a room's rows are copied between shards.
+ROOM_MODELS = (
+    "room",
+    "roomaggregate",
+    "player",
+    "playertotal",
+    "score",
+    "tombstone",
+    "scoreevent",
+    "roomscoresnapshot",
+)
+
+# The bits of a player or score id that hold the shard it was created on.
+SHARD_ID_MASK = 0xFFFF
+
+_current_db = ContextVar("room_shard_db", default=None)
+_placements = {}
+_placements_lock = threading.Lock()
+
+
+def enabled():
+    return settings.ROOM_SHARDS > 0
+
+
+def shard_alias(shard):
+    return f"shard_{shard}"
+
+
+def shard_aliases():
+    return [shard_alias(shard) for shard in range(settings.ROOM_SHARDS)]
+
+
+def shard_index(alias):
+    """The shard number of a shard alias, or None for other databases."""
+    prefix, _, number = alias.rpartition("_")
+    return int(number) if prefix == "shard" else None
+
+
+def jump_hash(key, buckets):
+    """Map a 64-bit key to one of ``buckets`` (Lamping and Veach's jump hash).
+
+    Growing from n to n + 1 buckets only moves 1/(n + 1) of the keys.
+    """
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_for(room_id, shards=None):
+    """The shard a room is placed on by hashing its id."""
+    digest = hashlib.blake2b(uuid.UUID(str(room_id)).bytes, digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), shards or settings.ROOM_SHARDS)
+
+
+def room_db(room_id):
+    """The database alias holding a room (``default`` unless sharding is on)."""
+    if not enabled():
+        return DEFAULT_DB_ALIAS
+    try:
+        room_id = uuid.UUID(str(room_id))
+    except ValueError:
+        # No room has this id; any shard answers "not found".
+        return shard_alias(0)
+    alias = _placements.get(room_id)
+    if alias is None:
+        from .models import RoomDirectory
+
+        shard = (
+            RoomDirectory.objects.filter(room_id=room_id)
+            .values_list("shard", flat=True)
+            .first()
+        )
+        if shard is None:
+            # A room being created, or one that does not exist.
+            return shard_alias(shard_for(room_id))
+        alias = shard_alias(shard)
+        with _placements_lock:
+            _placements[room_id] = alias
+    return alias
+
+
+def current_db():
+    """The shard selected with ``use_room``, if any."""
+    return _current_db.get()
+
+
+@contextmanager
+def use_room(room_id):
+    """Route queries that carry no room of their own to ``room_id``'s shard.
+
+    Yields the room's database alias.
+    """
+    alias = room_db(room_id)
+    token = _current_db.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_db.reset(token)
+
+
+def room_for_code(room_code):
+    """Look a room id up by its code in the directory."""
+    from .models import RoomDirectory
+
+    return (
+        RoomDirectory.objects.filter(room_code=room_code)
+        .values_list("room_id", flat=True)
+        .first()
+    )
+
+
+def member_id():
+    """A new player or score id: random, with the selected shard in its low bits."""
+    value = uuid.uuid4()
+    shard = shard_index(current_db() or "")
+    if shard is None:
+        return value
+    return uuid.UUID(int=value.int & ~SHARD_ID_MASK | shard)
+
+
+def locate(model, pk):
+    """Return the room of a room-scoped row, or None.
+
+    Looks on the shard named by the row's id first (see ``member_id``), and
+    on the others only for rows that moved or were created without one.
+    """
+    try:
+        shard = uuid.UUID(str(pk)).int & SHARD_ID_MASK
+    except ValueError:
+        return None
+    aliases = shard_aliases()
+    if shard < len(aliases):
+        aliases.insert(0, aliases.pop(shard))
+    for alias in aliases:
+        room_id = (
+            model.objects.using(alias)
+            .filter(pk=pk)
+            .values_list("room_id", flat=True)
+            .first()
+        )
+        if room_id is not None:
+            return room_id
+    return None
+
+
+def register(room, alias):
+    """Record (or move) a room in the directory."""
+    from .models import RoomDirectory
+
+    room_id = uuid.UUID(str(room.pk))
+    fields = {"room_code": room.room_code, "shard": shard_index(alias)}
+    # Write first: on SQLite a transaction that reads before writing cannot
+    # take the write lock while another writer waits (update_or_create would).
+    if not RoomDirectory.objects.filter(room_id=room_id).update(**fields):
+        RoomDirectory.objects.create(room_id=room_id, **fields)
+    with _placements_lock:
+        _placements[room_id] = alias
+
+
+def unregister(room_id, alias):
+    """Drop a room deleted from ``alias`` from the directory, if it lived there."""
+    from .models import RoomDirectory
+
+    room_id = uuid.UUID(str(room_id))
+    shard = shard_index(alias)
+    if shard is None:
+        return
+    RoomDirectory.objects.filter(room_id=room_id, shard=shard).delete()
+    with _placements_lock:
+        if _placements.get(room_id) == alias:
+            del _placements[room_id]
+
+
+def _room_id_of(instance):
+    from .models import Room
+
+    return instance.pk if isinstance(instance, Room) else getattr(instance, "room_id", None)
+
+
+def is_room_model(model):
+    return model._meta.app_label == "api" and model._meta.model_name in ROOM_MODELS
+
+
+class RoomShardRouter:
+    """Send room-scoped models to their room's shard, the rest to ``default``."""
+
+    def _db_for(self, model, hints):
+        if not is_room_model(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        room_id = None if instance is None else _room_id_of(instance)
+        if room_id is not None:
+            return room_db(room_id)
+        return current_db()
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        room_model = app_label == "api" and model_name in ROOM_MODELS
+        if db == DEFAULT_DB_ALIAS:
+            return not room_model
+        return room_model
+
+
+class ShardedList:
+    """A queryset's rows from every shard, merged in descending ``field`` order.
+
+    Supports the count() and slicing Django's paginator uses; a slice reads
+    just the (field, pk) keys from each shard, then loads the rows it selects.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+
+    def count(self):
+        return sum(self.queryset.using(alias).count() for alias in shard_aliases())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def _keys(self, alias, stop):
+        keys = (
+            self.queryset.using(alias)
+            .order_by(f"-{self.field}", "-pk")
+            .values_list(self.field, "pk")[:stop]
+        )
+        return [(value, pk, alias) for value, pk in keys]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        start, stop = index.start or 0, index.stop
+        keys = heapq.merge(
+            *(self._keys(alias, stop) for alias in shard_aliases()), reverse=True
+        )
+        selected = list(islice(keys, start, stop))
+        rows = {}
+        for alias in {alias for _, _, alias in selected}:
+            pks = [pk for _, pk, key_alias in selected if key_alias == alias]
+            for row in self.queryset.using(alias).filter(pk__in=pks):
+                rows[row.pk] = row
+        return [rows[pk] for _, pk, _ in selected]
+
+
+class ShardedQuery:
+    """A queryset run on every shard, its rows merged in its ordering.
+
+    Supports the order_by(), filter() and leading slices that keyset
+    pagination uses: a slice asks each shard for at most ``stop`` rows.
+    All the ordering fields must sort in the same direction.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.model = queryset.model
+
+    def order_by(self, *fields):
+        return ShardedQuery(self.queryset.order_by(*fields))
+
+    def filter(self, *args, **kwargs):
+        return ShardedQuery(self.queryset.filter(*args, **kwargs))
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.start or index.stop is None:
+            raise TypeError("ShardedQuery only supports [:stop] slices")
+        ordering = self.queryset.query.order_by
+        rows = heapq.merge(
+            *(list(self.queryset.using(alias)[: index.stop]) for alias in shard_aliases()),
+            key=attrgetter(*(field.lstrip("-") for field in ordering)),
+            reverse=ordering[0].startswith("-"),
+        )
+        return list(islice(rows, index.stop))
+
+
+def _room_tables(alias):
+    from .models import Room
+
+    return Room._meta.db_table in connections[alias].introspection.table_names()
+
+
+def source_aliases():
+    """Databases that may hold rooms: every shard, and ``default`` from before sharding."""
+    aliases = shard_aliases()
+    if _room_tables(DEFAULT_DB_ALIAS):
+        aliases.insert(0, DEFAULT_DB_ALIAS)
+    return aliases
+
+
+def move_room(room_id, source, target):
+    """Copy a room's rows to another database, repoint the directory, drop the original.
+
+    Safe to run again after an interruption: a room already copied to the
+    target is not copied twice.
+    """
+    from django.apps import apps
+
+    from .models import Room
+
+    room = Room.objects.using(source).get(pk=room_id)
+    if not Room.objects.using(target).filter(pk=room_id).exists():
+        with transaction.atomic(using=target):
+            for model_name in ROOM_MODELS:
+                model = apps.get_model("api", model_name)
+                lookup = {"pk": room_id} if model is Room else {"room_id": room_id}
+                rows = list(model.objects.using(source).filter(**lookup))
+                model.objects.using(target).bulk_create(rows)
+    register(room, target)
+    # Deleting the room cascades to its rows without recording tombstones.
+    Room.objects.using(source).filter(pk=room_id).delete()
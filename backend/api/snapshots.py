@@ -0,0 +1,100 @@
+"""
+Versioned snapshots of room-scoped read responses.
+
+Every write to a room bumps its version (see Room.next_version), so a
+serialized response can be cached under the room's version and served, or
+answered with 304 Not Modified, without touching the database until the
+room changes again. The current version of each room is itself cached and
+dropped whenever a write commits.
+
+With the default per-process cache, a worker only sees invalidations for
+writes it handled itself; ROOM_VERSION_CACHE_TIMEOUT bounds how stale other
+workers can be. Point CACHES at a shared backend when running several.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .sharding import room_db
+
+# Query parameters that only identify the room, not the representation.
+ROOM_LOOKUP_PARAMS = {"room_id", "code"}
+
+
+def _version_key(room_id):
+    return f"room-version:{room_id}"
+
+
+def forget_version(room_id):
+    """Drop the cached version of a room now and again when the write commits."""
+    key = _version_key(room_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key), using=room_db(room_id))
+
+
+def get_room_version(room_id):
+    """Return the room's current version, or None if the room does not exist."""
+    key = _version_key(room_id)
+    version = cache.get(key)
+    if version is None:
+        from .models import Room
+
+        version = (
+            Room.objects.using(room_db(room_id))
+            .filter(pk=room_id)
+            .values_list("version", flat=True)
+            .first()
+        )
+        if version is not None:
+            cache.set(key, version, settings.ROOM_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def _variant(request):
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        if key not in ROOM_LOOKUP_PARAMS
+        for value in values
+    )
+    return "&".join(f"{key}={value}" for key, value in params)
+
+
+def cached_room_response(request, room_id, kind, build, version=None):
+    """Serve a room-scoped read from a snapshot keyed by the room's version.
+
+    ``build`` produces the response data on a cache miss. ``version`` may be
+    passed when the caller has just read it. Returns None when the room does
+    not exist.
+    """
+    try:
+        room_id = uuid.UUID(str(room_id))
+    except ValueError:
+        return None
+    if version is None:
+        version = get_room_version(room_id)
+    if version is None:
+        return None
+
+    key = f"room-snapshot:{room_id}:{version}:{kind}:{_variant(request)}"
+    media_type = getattr(request, "accepted_media_type", "")
+    digest = hashlib.sha1(f"{key}|{media_type}".encode()).hexdigest()[:16]
+    etag = f'"{room_id.hex}-{version}-{digest}"'
+
+    # Compression weakens the ETag; If-None-Match uses the weak comparison.
+    candidates = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.SNAPSHOT_CACHE_TIMEOUT)
+    return Response(data, headers={"ETag": etag})
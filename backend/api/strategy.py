@@ -0,0 +1,257 @@
+"""
+Optimal solitaire Yahtzee strategy, for move hints.
+
+What a card is still worth depends only on which categories are filled
+(13 bits), the upper section total so far (capped at 63, where the bonus
+is earned) and whether the Yahtzee box holds 50 (for Yahtzee bonuses).
+The ``build_yahtzee_strategy`` command computes the expected remaining
+score of every such state by dynamic programming, from full cards back
+to the empty one, and saves it as a 8192 x 64 x 2 float32 .npy file
+(4 MB) at YAHTZEE_STRATEGY_PATH.
+
+Workers open the file memory-mapped, so it is loaded lazily by the OS
+and its pages are shared by every process on the machine. A hint only
+reads the successors of one state: the best category for a final roll,
+or the best dice to keep with rolls left. Restart workers after
+rebuilding the table; they keep the file they opened.
+
+Needs NumPy.
+"""
+
+import itertools
+import os
+import tempfile
+
+from django.conf import settings
+
+from . import yahtzee
+from .grid import UPPER_BONUS, UPPER_BONUS_THRESHOLD, YAHTZEE_CATEGORIES
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+CATEGORIES = len(YAHTZEE_CATEGORIES)
+FULL = (1 << CATEGORIES) - 1
+SHAPE = (FULL + 1, UPPER_BONUS_THRESHOLD + 1, 2)
+YAHTZEE = yahtzee.COLUMN["yahtzee"]
+LOWER = yahtzee.COLUMN["three_of_a_kind"]
+
+# Every multiset of 0 to 5 dice that can be kept between rolls.
+KEEPS = [
+    keep for size in range(yahtzee.DICE + 1)
+    for keep in itertools.combinations_with_replacement(yahtzee.FACES, size)
+]
+KEEP_INDEX = {keep: n for n, keep in enumerate(KEEPS)}
+
+
+class StrategyUnavailable(Exception):
+    """The strategy table is missing, or does not cover a card."""
+
+
+def _keep_probabilities():
+    """P[keep, outcome]: the chance of each outcome after rerolling the rest."""
+    probs = np.zeros((len(KEEPS), len(yahtzee.OUTCOMES)))
+    for n, keep in enumerate(KEEPS):
+        rolled = yahtzee.DICE - len(keep)
+        for roll in itertools.product(yahtzee.FACES, repeat=rolled):
+            probs[n, yahtzee.ROW[tuple(sorted(keep + roll))]] += 6.0**-rolled
+    return probs
+
+
+def _subsets():
+    """For each outcome, the indexes of the keeps it allows (padded to 32)."""
+    rows = []
+    for outcome in yahtzee.OUTCOMES:
+        keeps = sorted({
+            KEEP_INDEX[kept]
+            for size in range(yahtzee.DICE + 1)
+            for kept in itertools.combinations(outcome, size)
+        })
+        rows.append(keeps + keeps[:1] * (2**yahtzee.DICE - len(keeps)))
+    return np.array(rows)
+
+
+if np is not None:
+    KEEP_PROBS = _keep_probabilities()
+    SUBSETS = _subsets()
+    SCORES = np.array(yahtzee.TABLE, dtype=np.float64)
+    YAHTZEE_ROWS = [
+        row for row, outcome in enumerate(yahtzee.OUTCOMES) if len(set(outcome)) == 1
+    ]
+    IS_YAHTZEE = np.zeros(len(yahtzee.OUTCOMES), dtype=bool)
+    IS_YAHTZEE[YAHTZEE_ROWS] = True
+    JOKER_SCORES = SCORES.copy()
+    for category, value in yahtzee.JOKER_SCORES.items():
+        JOKER_SCORES[YAHTZEE_ROWS, yahtzee.COLUMN[category]] = value
+
+
+def card_state(card):
+    """The (filled mask, capped upper total, Yahtzee-50 flag) of a card.
+
+    ``card`` maps the categories scored so far to their scores.
+    """
+    mask = sum(1 << yahtzee.COLUMN[category] for category in card)
+    upper = sum(card.get(category, 0) for category in yahtzee.UPPER_CATEGORIES)
+    return mask, min(upper, UPPER_BONUS_THRESHOLD), int(card.get("yahtzee") == 50)
+
+
+def _final_values(values, mask, uppers, flags):
+    """Value of scoring each outcome in each category: states x 252 x 13.
+
+    The value is the category's score, any Yahtzee bonus, and what the
+    card it leaves is worth. Categories the rules do not allow (filled
+    ones, or the wrong box for a joker) are -inf.
+    """
+    uppers = np.asarray(uppers)[:, None]
+    flags = np.asarray(flags)[:, None]
+    open_ = [c for c in range(CATEGORIES) if not mask >> c & 1]
+    joker = bool(mask >> YAHTZEE & 1)
+    scores = JOKER_SCORES if joker else SCORES
+    bonus = yahtzee.YAHTZEE_BONUS * (joker & IS_YAHTZEE)[None, :] * flags
+
+    allowed = np.zeros(scores.shape, dtype=bool)
+    allowed[:, open_] = True
+    if joker:
+        # An extra Yahtzee goes in its own upper box while that is open,
+        # then in any open lower box, and only then in another upper box.
+        lower_open = any(c >= LOWER for c in open_)
+        for row in YAHTZEE_ROWS:
+            own = yahtzee.OUTCOMES[row][0] - 1
+            if own in open_:
+                allowed[row] = False
+                allowed[row, own] = True
+            elif lower_open:
+                allowed[row, :LOWER] = False
+
+    result = np.full((len(uppers), *scores.shape), -np.inf)
+    for c in open_:
+        score = scores[:, c]
+        after = values[mask | 1 << c]
+        next_uppers, next_flags = uppers, flags
+        if c < LOWER:
+            next_uppers = np.minimum(uppers + score.astype(int), UPPER_BONUS_THRESHOLD)
+        elif c == YAHTZEE:
+            next_flags = flags | (score == yahtzee.YAHTZEE_SCORE)
+        result[:, :, c] = score + bonus + after[next_uppers, next_flags]
+    result[:, ~allowed] = -np.inf
+    return result
+
+
+def _reroll(best):
+    """Expected value of each keep, given the value of each outcome."""
+    return best @ KEEP_PROBS.T
+
+
+def _best_keep(keep_values):
+    """Value of each outcome with the best keep it allows."""
+    return keep_values[:, SUBSETS].max(axis=2)
+
+
+def solve(max_open=CATEGORIES, progress=None):
+    """Compute the table for every card with at most ``max_open`` open boxes.
+
+    Cards with more open boxes are left NaN; ``max_open`` below 13 builds
+    a small endgame-only table. ``progress`` is called with each finished
+    number of open boxes.
+    """
+    values = np.full(SHAPE, np.nan, dtype=np.float32)
+    values[FULL] = np.where(
+        np.arange(SHAPE[1]) >= UPPER_BONUS_THRESHOLD, UPPER_BONUS, 0
+    )[:, None]
+    uppers = np.repeat(np.arange(SHAPE[1]), 2)
+    flags = np.tile([0, 1], SHAPE[1])
+    start = KEEP_PROBS[KEEP_INDEX[()]]
+    for open_count in range(1, max_open + 1):
+        for mask in range(FULL):
+            if CATEGORIES - bin(mask).count("1") != open_count:
+                continue
+            best = _final_values(values, mask, uppers, flags).max(axis=2)
+            for _ in range(2):
+                best = _best_keep(_reroll(best))
+            values[mask] = (best @ start).reshape(SHAPE[1:])
+        if progress is not None:
+            progress(open_count)
+    return values
+
+
+def save(values, path):
+    """Write a table to ``path``, replacing any old one atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".npy", delete=False) as f:
+        np.save(f, values)
+    os.replace(f.name, path)
+
+
+_tables = {}
+
+
+def load(path=None):
+    """The table at ``path`` (default YAHTZEE_STRATEGY_PATH), memory-mapped."""
+    path = str(path or settings.YAHTZEE_STRATEGY_PATH)
+    table = _tables.get(path)
+    if table is None:
+        if np is None:
+            raise StrategyUnavailable("Move hints need NumPy installed.")
+        try:
+            table = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            raise StrategyUnavailable(
+                "The strategy table has not been built "
+                "(manage.py build_yahtzee_strategy)."
+            )
+        if table.shape != SHAPE:
+            raise StrategyUnavailable(f"{path} is not a strategy table.")
+        _tables[path] = table
+    return table
+
+
+def clear():
+    """Forget the tables opened so far."""
+    _tables.clear()
+
+
+def hint(card, dice, rolls_left):
+    """The best move for ``dice`` with ``rolls_left`` rerolls on ``card``.
+
+    Returns the action ("score" or "reroll"), the dice to keep, the
+    category to score (when scoring) and the expected number of points
+    still to come, this turn included.
+    """
+    table = load()
+    mask, upper, flag = card_state(card)
+    if mask == FULL:
+        raise ValueError("The card is already full.")
+    if np.isnan(table[mask, upper, flag]):
+        raise StrategyUnavailable("The strategy table does not cover this card.")
+
+    row = yahtzee.ROW[tuple(sorted(dice))]
+    final = _final_values(table, mask, [upper], [flag])[0]
+    best = final.max(axis=1)[None, :]
+    keep, value = KEEP_INDEX[yahtzee.OUTCOMES[row]], best[0, row]
+    if rolls_left:
+        for _ in range(rolls_left - 1):
+            best = _best_keep(_reroll(best))
+        keep_values = _reroll(best)[0]
+        # Scoring now is worth the final roll's value; a reroll must beat it.
+        chosen = max(
+            (choice for choice in SUBSETS[row] if choice != keep),
+            key=keep_values.__getitem__,
+        )
+        if keep_values[chosen] > value + 1e-9:
+            keep, value = chosen, keep_values[chosen]
+
+    if KEEPS[keep] == yahtzee.OUTCOMES[row]:
+        return {
+            "action": "score",
+            "keep": list(KEEPS[keep]),
+            "category": YAHTZEE_CATEGORIES[int(final[row].argmax())],
+            "expected_value": round(float(value), 2),
+        }
+    return {
+        "action": "reroll",
+        "keep": list(KEEPS[keep]),
+        "category": None,
+        "expected_value": round(float(value), 2),
+    }
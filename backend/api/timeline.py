@@ -0,0 +1,94 @@
+"""
+Per-round running totals and rankings of a room.
+
+The timeline is computed by the database in one query: each player's
+points per round (0 for rounds they did not score in), a running SUM()
+window over their rounds, and a RANK() window over every player's running
+total in each round. Rounds are the distinct round numbers scored in the
+room. Responses are cached per room version, so charting a long game
+reads the score table once per change rather than once per render.
+"""
+
+from django.db import connections
+
+from . import sharding
+from .models import Player, Score
+
+TIMELINE_SQL = """
+WITH rounds AS (
+    SELECT DISTINCT round_number FROM {score} WHERE room_id = %s
+),
+points AS (
+    SELECT player_id, round_number, SUM(score_value) AS points
+    FROM {score}
+    WHERE room_id = %s
+    GROUP BY player_id, round_number
+),
+running AS (
+    SELECT
+        p.id AS player_id,
+        p.name AS name,
+        p.joined_at AS joined_at,
+        r.round_number AS round_number,
+        COALESCE(s.points, 0) AS points,
+        SUM(COALESCE(s.points, 0)) OVER (
+            PARTITION BY p.id ORDER BY r.round_number
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) AS total
+    FROM {player} p
+    LEFT JOIN rounds r ON 1 = 1
+    LEFT JOIN points s
+        ON s.player_id = p.id AND s.round_number = r.round_number
+    WHERE p.room_id = %s
+)
+SELECT
+    player_id,
+    name,
+    round_number,
+    points,
+    total,
+    RANK() OVER (PARTITION BY round_number ORDER BY total DESC) AS rank
+FROM running
+ORDER BY joined_at, player_id, round_number
+"""
+
+
+def room_timeline(room_id):
+    """Return every player's points, running total and rank after each round.
+
+    Players are in the order they joined, with one entry per round in
+    ``rounds`` in each of their ``points``, ``totals`` and ``ranks``. Ties
+    share a rank.
+    """
+    db = sharding.room_db(room_id)
+    connection = connections[db]
+    room = Player._meta.get_field("room").get_db_prep_value(room_id, connection)
+    sql = TIMELINE_SQL.format(
+        score=connection.ops.quote_name(Score._meta.db_table),
+        player=connection.ops.quote_name(Player._meta.db_table),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [room, room, room])
+        rows = cursor.fetchall()
+
+    to_uuid = Player._meta.pk.to_python
+    players = {}
+    rounds = []
+    for player_id, name, round_number, points, total, rank in rows:
+        player = players.get(player_id)
+        if player is None:
+            player = players[player_id] = {
+                "id": str(to_uuid(player_id)),
+                "name": name,
+                "points": [],
+                "totals": [],
+                "ranks": [],
+            }
+        if round_number is None:
+            continue
+        if len(players) == 1:
+            rounds.append(round_number)
+        player["points"].append(points)
+        player["totals"].append(total)
+        player["ranks"].append(rank)
+    return {"rounds": rounds, "players": list(players.values())}
@@ -4,13 +4,29 @@ URL configuration for the API app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RoomViewSet, PlayerViewSet, ScoreViewSet
+from .views import (
+    RoomViewSet,
+    PlayerViewSet,
+    ScoreViewSet,
+    ScrabbleViewSet,
+    YahtzeeViewSet,
+    export_rooms,
+    import_rooms,
+    metrics,
+    room_events,
+)
 
 router = DefaultRouter()
 router.register(r"rooms", RoomViewSet)
 router.register(r"players", PlayerViewSet)
 router.register(r"scores", ScoreViewSet)
+router.register(r"yahtzee", YahtzeeViewSet, basename="yahtzee")
+router.register(r"scrabble", ScrabbleViewSet, basename="scrabble")
 
 urlpatterns = [
+    path("rooms/<uuid:pk>/events/", room_events, name="room-events"),
+    path("export/", export_rooms, name="export"),
+    path("import/", import_rooms, name="import"),
+    path("metrics", metrics, name="metrics"),
     path("", include(router.urls)),
 ]
@@ -2,31 +2,326 @@
 Views for the scorecard API.
 """
 
-from rest_framework import viewsets, status
+import string
+import uuid
+
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Lower
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Room, Player, Score
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from . import archive, code_cache, fastpath, history, scrabble, sharding, strategy, yahtzee
+from .aggregates import rebuild_room
+from .grid import YAHTZEE_CATEGORIES, room_grid
+from .increments import increment
+from .bulk import upsert_scores
+from .events import astream_room_events, publish_on_commit, stream_room_events
+from .metrics import registry
+from .models import Room, Player, PlayerTotal, Score, RoomAggregate, VersionConflict
+from .pagination import (
+    KeysetPagination,
+    LobbyKeysetPagination,
+    PlayerKeysetPagination,
+    ScoreKeysetPagination,
+    SelectablePaginationMixin,
+)
+from .renderers import FastJSONRenderer
+from .snapshots import cached_room_response, forget_version
+from .timeline import room_timeline
 from .serializers import (
+    SCORE_VALUE_MAX,
+    SCORE_VALUE_MIN,
+    sparse_fieldset,
     RoomSerializer,
     RoomCreateSerializer,
+    BulkScoreSerializer,
+    HistoryStepSerializer,
+    LobbyQuerySerializer,
+    LobbyRoomSerializer,
     PlayerSerializer,
+    ScoreEventSerializer,
+    ScoreIncrementSerializer,
     ScoreSerializer,
     ScoreUpdateSerializer,
+    ScrabbleWordsSerializer,
+    YahtzeeGameSerializer,
+    YahtzeeHintSerializer,
+    YahtzeeScoreSerializer,
 )
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+# Folds A-Z like SQLite's LOWER(), leaving other characters as they are.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+class RoomShardMixin:
+    """Route each request's queries to the shard of the room it is about.
+
+    Only does anything with ROOM_SHARDS set. Requests that name no room are
+    left unrouted; actions that need one must find it in ``shard_room_id``.
+    """
+
+    unrouted_actions = ("create",)
+
+    def shard_room_id(self, request):
+        """The room a request is about: its object's room or ``room``/``room_id``."""
+        pk = self.kwargs.get("pk")
+        if pk is not None:
+            room_id = sharding.locate(self.queryset.model, pk)
+            if room_id is None:
+                raise Http404
+            return room_id
+        room_id = request.query_params.get("room_id")
+        if room_id is None and hasattr(request.data, "get"):
+            room_id = request.data.get("room")
+        if room_id is None and self.action not in self.unrouted_actions:
+            raise serializers.ValidationError(
+                {"room_id": ["This parameter is required when rooms are sharded."]}
+            )
+        return room_id
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if sharding.enabled():
+            room_id = self.shard_room_id(request)
+            if room_id is not None:
+                self._shard_context = sharding.use_room(room_id)
+                self._shard_context.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        context = getattr(self, "_shard_context", None)
+        if context is not None:
+            self._shard_context = None
+            context.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsetViewMixin:
+    """Load only what the fields selected with ``?fields=``/``?omit=`` need."""
+
+    sparse_actions = ("list", "retrieve", "by_code")
+
+    def selected_fields(self):
+        """The serializer fields a read request selected, or None for all."""
+        if self.request.method not in SAFE_METHODS or self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, "_selected_fields"):
+            available = list(self.get_serializer_class()().fields)
+            self._selected_fields = sparse_fieldset(self.request, available)
+        return self._selected_fields
+
+    def wants_field(self, name):
+        selected = self.selected_fields()
+        return selected is None or name in selected
+
+    def narrow_queryset(self, queryset):
+        """Defer the columns no selected field reads, and unneeded joins."""
+        selected = self.selected_fields()
+        if selected is None:
+            return queryset
+        fields = self.get_serializer_class()().fields
+        columns = {queryset.model._meta.pk.name}
+        related = []
+        for name in selected:
+            field = fields[name]
+            if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+                continue
+            columns.add("__".join(field.source_attrs))
+            if len(field.source_attrs) > 1:
+                columns.add(field.source_attrs[0])
+                related.append(field.source_attrs[0])
+        if isinstance(self.paginator, KeysetPagination):
+            columns.update(self.paginator.ordering)
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+
+class FastSerializationMixin:
+    """Render JSON with FastJSONRenderer when FAST_SERIALIZATION is on."""
+
+    def use_fast_path(self):
+        """Whether this read can skip the serializers (not for sparse fieldsets)."""
+        return settings.FAST_SERIALIZATION and self.selected_fields() is None
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if settings.FAST_SERIALIZATION:
+            renderers = [
+                FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+                for renderer in renderers
+            ]
+        return renderers
+
+
+class RoomViewSet(
+    RoomShardMixin,
+    SparseFieldsetViewMixin,
+    FastSerializationMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet for Room model."""
 
     queryset = Room.objects.all()
+    unrouted_actions = ("create", "list", "lobby")
+
+    def get_queryset(self):
+        """Load nested players and scores up front for read actions."""
+        queryset = Room.objects.all()
+        if self.action in ["list", "retrieve", "by_code"]:
+            # A correlated count keeps the outer query free of GROUP BY, so
+            # the room list can walk the created_at index page by page.
+            active_players = (
+                Player.objects.filter(room=OuterRef("pk"), is_active=True)
+                .order_by()
+                .values("room")
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            if self.wants_field("player_count"):
+                queryset = queryset.annotate(
+                    active_player_count=Coalesce(Subquery(active_players), 0)
+                )
+            if self.wants_field("players"):
+                queryset = queryset.prefetch_related("players")
+            if self.wants_field("scores"):
+                queryset = queryset.prefetch_related(
+                    Prefetch("scores", queryset=Score.objects.select_related("player"))
+                )
+            queryset = self.narrow_queryset(queryset)
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer class."""
         if self.action == "create":
             return RoomCreateSerializer
+        if self.action in ["undo", "redo"]:
+            return HistoryStepSerializer
         return RoomSerializer
 
+    def shard_room_id(self, request):
+        """Rooms are addressed by their id, or through the directory by code."""
+        if self.action == "by_code":
+            room_code = request.query_params.get("code")
+            if not room_code:
+                # Left to the action, which answers 400.
+                return None
+            room = code_cache.lookup(room_code)
+            if room is None:
+                raise Http404
+            return room[0]
+        return self.kwargs.get("pk")
+
+    def retrieve(self, request, pk=None):
+        """Get a room, served from its versioned snapshot when unchanged."""
+        response = cached_room_response(
+            request,
+            pk,
+            "room",
+            lambda: self.room_data(pk),
+        )
+        if response is None:
+            raise Http404
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """List rooms, through the fast path when it is enabled."""
+        if sharding.enabled():
+            rooms = sharding.ShardedList(
+                self.filter_queryset(self.get_queryset()), "created_at"
+            )
+            page = self.paginate_queryset(rooms)
+            if page is None:
+                return Response(self.get_serializer(list(rooms), many=True).data)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        if not self.use_fast_path():
+            return super().list(request, *args, **kwargs)
+        rows = fastpath.room_rows(Room.objects.all())
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(fastpath.rooms(rows))
+        return self.get_paginated_response(fastpath.rooms(page))
+
+    @action(detail=False, methods=["get"])
+    def lobby(self, request):
+        """List active rooms, most recently active first, from their aggregates.
+
+        ``?game_type=`` filters by game and ``?search=`` by a case-insensitive
+        name prefix. Pages are keyset paginated (``next``/``previous``).
+        """
+        query = LobbyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        rooms = self.lobby_rooms(**query.validated_data)
+        if sharding.enabled():
+            rooms = sharding.ShardedQuery(rooms)
+        paginator = LobbyKeysetPagination()
+        page = paginator.paginate_queryset(rooms, request, view=self)
+        return paginator.get_paginated_response(
+            LobbyRoomSerializer(page, many=True).data
+        )
+
+    @staticmethod
+    def lobby_rooms(game_type=None, search=None):
+        """Active rooms with their player count and leader, in one query.
+
+        Every filter has a partial index over active rooms; the leader is
+        read from the top of the room's player totals index.
+        """
+        leaders = PlayerTotal.objects.filter(
+            room=OuterRef("pk"), score_count__gt=0
+        ).order_by("-total", "player_id")
+        rooms = (
+            Room.objects.filter(is_active=True)
+            .annotate(
+                player_count=Coalesce(F("aggregate__player_count"), 0),
+                leader=Subquery(leaders.values("player__name")[:1]),
+                leader_total=Subquery(leaders.values("total")[:1]),
+            )
+            .only("id", "name", "game_type", "room_code", "last_activity")
+        )
+        if game_type:
+            rooms = rooms.filter(game_type=game_type)
+        if search:
+            # A range on LOWER(name) rather than LIKE, so the index is used.
+            # SQLite's LOWER() folds A-Z only, so the prefix is folded alike:
+            # other letters match in their own case.
+            prefix = search.translate(ASCII_LOWER)
+            rooms = rooms.alias(lower_name=Lower("name")).filter(
+                lower_name__gte=prefix,
+                lower_name__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1),
+            )
+        return rooms
+
+    def room_data(self, pk):
+        """Serialize one room, through the fast path when it is enabled."""
+        if self.use_fast_path():
+            rooms = fastpath.rooms(fastpath.room_rows(Room.objects.filter(pk=pk)))
+            if not rooms:
+                raise Http404
+            return rooms[0]
+        return self.get_serializer(get_object_or_404(self.get_queryset(), pk=pk)).data
+
+    def perform_update(self, serializer):
+        with transaction.atomic(using=sharding.room_db(serializer.instance.pk)):
+            room = serializer.save()
+            room.version = Room.next_version(room.pk)
+
+    def perform_destroy(self, instance):
+        room_id = instance.pk
+        instance.delete()
+        forget_version(room_id)
+
     @action(detail=False, methods=["get"])
     def by_code(self, request):
         """Get a room by its room code."""
@@ -36,14 +331,36 @@ class RoomViewSet(viewsets.ModelViewSet):
                 {"error": "Room code is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            room = Room.objects.get(room_code=room_code, is_active=True)
-            serializer = self.get_serializer(room)
-            return Response(serializer.data)
-        except Room.DoesNotExist:
+        room = code_cache.lookup(room_code)
+        if room is None or not room[1]:
             return Response(
                 {"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND
             )
+        room_id = room[0]
+        response = cached_room_response(
+            request, room_id, "room", lambda: self.room_data(room_id)
+        )
+        if response is None:
+            raise Http404
+        return response
+
+    @action(detail=True, methods=["get"])
+    def grid(self, request, pk=None):
+        """Get the room's scorecard as compact column-oriented arrays."""
+        response = cached_room_response(request, pk, "grid", lambda: room_grid(pk))
+        if response is None:
+            raise Http404
+        return response
+
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """Get each player's running total and rank after every round."""
+        response = cached_room_response(
+            request, pk, "timeline", lambda: room_timeline(pk)
+        )
+        if response is None:
+            raise Http404
+        return response
 
     @action(detail=True, methods=["post"])
     def join(self, request, pk=None):
@@ -66,14 +383,104 @@ class RoomViewSet(viewsets.ModelViewSet):
         # Create new player
         player = Player.objects.create(name=player_name, room=room)
         serializer = PlayerSerializer(player)
+        publish_on_commit(
+            room.pk, "player.created", serializer.data, player.room_version
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["get"])
+    def changes(self, request, pk=None):
+        """Get the players and scores changed since a room version."""
+        try:
+            since = int(request.query_params["since"])
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "A numeric 'since' version is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic(using=sharding.room_db(pk)):
+            room = self.get_object()
+            players = room.players.filter(room_version__gt=since)
+            scores = room.scores.filter(room_version__gt=since).select_related(
+                "player"
+            )
+            deleted = {"players": [], "scores": []}
+            for kind, object_id in room.tombstones.filter(
+                room_version__gt=since
+            ).values_list("kind", "object_id"):
+                deleted[f"{kind}s"].append(object_id)
+
+            return Response(
+                {
+                    "version": room.version,
+                    "players": PlayerSerializer(players, many=True).data,
+                    "scores": ScoreSerializer(scores, many=True).data,
+                    "deleted": deleted,
+                }
+            )
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        """Get the room's score history after an event (``after``), oldest first."""
+        try:
+            after = int(request.query_params.get("after", 0))
+            limit = max(1, min(int(request.query_params.get("limit", 100)), 1000))
+        except ValueError:
+            return Response(
+                {"error": "'after' and 'limit' must be numbers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-class PlayerViewSet(viewsets.ModelViewSet):
+        room = self.get_object()
+        events = list(room.score_events.filter(sequence__gt=after)[: limit + 1])
+        return Response(
+            {
+                "events": ScoreEventSerializer(events[:limit], many=True).data,
+                "next": events[limit - 1].sequence if len(events) > limit else None,
+            }
+        )
+
+    @action(detail=True, methods=["post"])
+    def undo(self, request, pk=None):
+        """Undo the room's last ``steps`` (default 1) score edits."""
+        return self._revert(request, history.undo)
+
+    @action(detail=True, methods=["post"])
+    def redo(self, request, pk=None):
+        """Redo the room's last ``steps`` (default 1) undone score edits."""
+        return self._revert(request, history.redo)
+
+    def _revert(self, request, revert):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        room = self.get_object()
+
+        try:
+            events = revert(room.pk, serializer.validated_data["steps"])
+        except history.HistoryConflict as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response(
+            {
+                "version": Room.objects.filter(pk=room.pk)
+                .values_list("version", flat=True)
+                .get(),
+                "events": ScoreEventSerializer(events, many=True).data,
+            }
+        )
+
+
+class PlayerViewSet(
+    RoomShardMixin,
+    SparseFieldsetViewMixin,
+    SelectablePaginationMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet for Player model."""
 
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
+    keyset_pagination_class = PlayerKeysetPagination
 
     def get_queryset(self):
         """Filter players by room if room_id is provided."""
@@ -81,28 +488,240 @@ class PlayerViewSet(viewsets.ModelViewSet):
         room_id = self.request.query_params.get("room_id")
         if room_id:
             queryset = queryset.filter(room_id=room_id)
-        return queryset
+        return self.narrow_queryset(queryset)
 
+    @action(detail=True, methods=["get"])
+    def hint(self, request, pk=None):
+        """Suggest the best move for the player's Yahtzee card.
 
-class ScoreViewSet(viewsets.ModelViewSet):
+        Given ``?dice=`` and ``?rolls_left=`` (default 2), returns whether to
+        score or reroll, the dice to keep, the category to score and the
+        points still expected from the card, from the strategy table.
+        """
+        player = self.get_object()
+        if player.room.game_type != "yahtzee":
+            return Response(
+                {"error": "Hints are only available in Yahtzee rooms"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        query = YahtzeeHintSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        card = dict(
+            player.scores.filter(category__isnull=False).values_list(
+                "category", "score_value"
+            )
+        )
+        try:
+            move = strategy.hint(
+                card, query.validated_data["dice"], query.validated_data["rolls_left"]
+            )
+        except strategy.StrategyUnavailable as exc:
+            return Response(
+                {"error": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(move)
+
+    def perform_create(self, serializer):
+        player = serializer.save()
+        publish_on_commit(
+            player.room_id, "player.created", serializer.data, player.room_version
+        )
+
+    def perform_update(self, serializer):
+        player = serializer.save()
+        publish_on_commit(
+            player.room_id, "player.updated", serializer.data, player.room_version
+        )
+
+    def perform_destroy(self, instance):
+        player_id = instance.pk
+        instance.delete()
+        publish_on_commit(
+            instance.room_id,
+            "player.deleted",
+            {"id": player_id},
+            instance.room_version,
+        )
+
+
+class ScoreViewSet(
+    RoomShardMixin,
+    SparseFieldsetViewMixin,
+    FastSerializationMixin,
+    SelectablePaginationMixin,
+    viewsets.ModelViewSet,
+):
     """ViewSet for Score model."""
 
     queryset = Score.objects.all()
     serializer_class = ScoreSerializer
+    keyset_pagination_class = ScoreKeysetPagination
 
     def get_serializer_class(self):
         """Return appropriate serializer class."""
         if self.action in ["update", "partial_update"]:
             return ScoreUpdateSerializer
+        if self.action == "bulk":
+            return BulkScoreSerializer
+        if self.action == "increment":
+            return ScoreIncrementSerializer
         return ScoreSerializer
 
     def get_queryset(self):
         """Filter scores by room if room_id is provided."""
-        queryset = Score.objects.all()
+        queryset = Score.objects.select_related("player")
         room_id = self.request.query_params.get("room_id")
         if room_id:
             queryset = queryset.filter(room_id=room_id)
-        return queryset
+        return self.narrow_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        """List scores; a room's scores are served from its versioned snapshot."""
+        room_id = request.query_params.get("room_id")
+        if not room_id:
+            return self.list_scores(request, *args, **kwargs)
+        try:
+            uuid.UUID(room_id)
+        except ValueError:
+            return Response(
+                {"error": "room_id must be a room id"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def build():
+            return self.list_scores(request, *args, **kwargs).data
+
+        response = cached_room_response(request, room_id, "scores", build)
+        if response is None:
+            # An unknown room has no scores yet: list none, cached as version 0.
+            response = cached_room_response(request, room_id, "scores", build, version=0)
+        return response
+
+    def list_scores(self, request, *args, **kwargs):
+        """List scores, through the fast path when it is enabled.
+
+        Keyset pages position on model instances, so they keep the serializer.
+        """
+        if not self.use_fast_path() or isinstance(self.paginator, KeysetPagination):
+            return super().list(request, *args, **kwargs)
+        rows = fastpath.score_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(fastpath.scores(rows))
+        return self.get_paginated_response(fastpath.scores(page))
+
+    def perform_create(self, serializer):
+        score = serializer.save()
+        publish_on_commit(
+            score.room_id, "score.created", serializer.data, score.room_version
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = score_etag(response.data["version"])
+        return response
+
+    def update(self, request, *args, **kwargs):
+        """Update a score; with If-Match or ``version``, only if it is unchanged.
+
+        A stale version gets 409 Conflict with the score's current state.
+        """
+        if (
+            settings.SCORE_UPDATES_REQUIRE_VERSION
+            and "If-Match" not in request.headers
+            and "version" not in request.data
+        ):
+            return Response(
+                {"error": "Send If-Match or a version to update a score"},
+                status=status.HTTP_428_PRECONDITION_REQUIRED,
+            )
+        try:
+            response = super().update(request, *args, **kwargs)
+        except Score.DoesNotExist:
+            raise Http404
+        except VersionConflict:
+            current = get_object_or_404(
+                Score.objects.select_related("player"), pk=kwargs["pk"]
+            )
+            return Response(
+                {
+                    "error": "The score was changed by someone else",
+                    "current": ScoreSerializer(current).data,
+                },
+                status=status.HTTP_409_CONFLICT,
+                headers={"ETag": score_etag(current.version)},
+            )
+        response["ETag"] = score_etag(response.data["version"])
+        return response
+
+    def perform_update(self, serializer):
+        expected = if_match_version(self.request)
+        if expected is not None:
+            score = serializer.save(expected_version=expected)
+        else:
+            score = serializer.save()
+        publish_on_commit(
+            score.room_id,
+            "score.updated",
+            ScoreSerializer(score).data,
+            score.room_version,
+        )
+
+    def perform_destroy(self, instance):
+        score_id = instance.pk
+        instance.delete()
+        publish_on_commit(
+            instance.room_id, "score.deleted", {"id": score_id}, instance.room_version
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Create or update many scores of one room in a single request."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        room = serializer.validated_data["room"]
+
+        try:
+            scores, created = upsert_scores(room, serializer.validated_data["scores"])
+        except IntegrityError:
+            return Response(
+                {"error": "Scores were changed concurrently, please retry"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        data = ScoreSerializer(scores, many=True).data
+        for score, score_data in zip(scores, data):
+            event = "score.created" if score.pk in created else "score.updated"
+            publish_on_commit(room.pk, event, score_data, score.room_version)
+        return Response(
+            {
+                "version": scores[0].room_version,
+                "created": len(created),
+                "updated": len(scores) - len(created),
+                "scores": data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["post"])
+    def increment(self, request, pk=None):
+        """Add ``delta`` (default 1) to a score without a read-modify-write."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        score = self.get_object()
+        delta = serializer.validated_data["delta"]
+        if not SCORE_VALUE_MIN <= score.score_value + delta <= SCORE_VALUE_MAX:
+            return Response(
+                {"error": "Score value out of range"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = increment(score.room_id, score.pk, delta)
+        if data is None:
+            raise Http404
+        return Response(data)
 
     @action(detail=False, methods=["get"])
     def room_summary(self, request):
@@ -113,27 +732,196 @@ class ScoreViewSet(viewsets.ModelViewSet):
                 {"error": "Room ID is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        response = cached_room_response(
+            request, room_id, "summary", lambda: self._summary(room_id)
+        )
+        if response is None:
+            return Response(
+                {"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return response
+
+    def _summary(self, room_id):
+        room = Room.objects.select_related("aggregate").get(id=room_id)
         try:
-            room = Room.objects.get(id=room_id)
-            scores = room.scores.all()
+            aggregate = room.aggregate
+        except RoomAggregate.DoesNotExist:
+            rebuild_room(room.pk)
+            aggregate = RoomAggregate.objects.get(room=room)
 
-            # Group scores by player and calculate totals
-            player_totals = {}
-            for score in scores:
-                player_name = score.player.name
-                if player_name not in player_totals:
-                    player_totals[player_name] = 0
-                player_totals[player_name] += score.score_value
+        # Players sharing a name are reported together, as before.
+        player_totals = {}
+        for player_name, total in room.player_totals.filter(
+            score_count__gt=0
+        ).values_list("player__name", "total"):
+            player_totals[player_name] = player_totals.get(player_name, 0) + total
 
+        return {
+            "room_name": room.name,
+            "game_type": room.game_type,
+            "player_totals": player_totals,
+            "total_rounds": aggregate.total_rounds,
+        }
+
+
+class YahtzeeViewSet(FastSerializationMixin, viewsets.ViewSet):
+    """Score Yahtzee dice on the server, in batches."""
+
+    @action(detail=False, methods=["post"])
+    def score(self, request):
+        """Score rolls in all 13 categories, one row per roll.
+
+        With ``categories`` (one per roll) the response carries each roll's
+        ``expected`` score in its category, and with ``scores`` as well,
+        whether each submitted score is ``valid``.
+        """
+        serializer = YahtzeeScoreSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rolls = serializer.validated_data["rolls"]
+        data = {
+            "categories": YAHTZEE_CATEGORIES,
+            "scores": yahtzee.score_rolls(rolls),
+        }
+        categories = serializer.validated_data.get("categories")
+        if categories is not None:
+            data["expected"] = yahtzee.expected_scores(rolls, categories)
+            submitted = serializer.validated_data.get("scores")
+            if submitted is not None:
+                data["valid"] = [
+                    score == expected
+                    for score, expected in zip(submitted, data["expected"])
+                ]
+        return Response(data)
+
+    @action(detail=False, methods=["post"])
+    def games(self, request):
+        """Score whole games with the upper bonus, Yahtzee bonuses and jokers.
+
+        Each turn's score is checked against the one submitted with it, if
+        any, and against the rules for where an extra Yahtzee may go.
+        """
+        serializer = YahtzeeGameSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        games = serializer.validated_data["games"]
+        results = yahtzee.score_games(
+            [[(turn["dice"], turn["category"]) for turn in game] for game in games]
+        )
+        for game, result in zip(games, results):
+            result["valid"] = [
+                error is None and turn.get("score", score) == score
+                for turn, score, error in zip(game, result["scores"], result["errors"])
+            ]
+        return Response({"games": results})
+
+
+class ScrabbleViewSet(FastSerializationMixin, viewsets.ViewSet):
+    """Check and score Scrabble words against the lexicon."""
+
+    @action(detail=False, methods=["post"])
+    def words(self, request):
+        """Check a batch of words; score each and total the valid ones.
+
+        Words are case-insensitive; anything but the letters A-Z makes a
+        word invalid, with no score.
+        """
+        serializer = ScrabbleWordsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            lexicon = scrabble.load()
+        except scrabble.LexiconUnavailable as exc:
             return Response(
-                {
-                    "room_name": room.name,
-                    "game_type": room.game_type,
-                    "player_totals": player_totals,
-                    "total_rounds": scores.values("round_number").distinct().count(),
-                }
-            )
-        except Room.DoesNotExist:
-            return Response(
-                {"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND
+                {"error": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
+        results = []
+        total = 0
+        for word in serializer.validated_data["words"]:
+            normalized, valid, score = lexicon.check(word)
+            results.append({"word": normalized or word, "valid": valid, "score": score})
+            if valid:
+                total += score
+        return Response({"words": results, "total": total})
+
+
+def score_etag(version):
+    return f'"{version}"'
+
+
+def if_match_version(request):
+    """The score version an If-Match header expects, or None without one."""
+    header = request.headers.get("If-Match")
+    if header is None:
+        return None
+    tags = parse_etags(header)
+    if tags == ["*"]:
+        return None
+    if len(tags) != 1 or not tags[0][1:-1].isdigit():
+        raise serializers.ValidationError(
+            {"If-Match": ["Expected one score ETag, e.g. \"3\"."]}
+        )
+    return int(tags[0][1:-1])
+
+
+def room_events(request, pk):
+    """Stream live score and player events for a room as Server-Sent Events."""
+    get_object_or_404(Room.objects.using(sharding.room_db(pk)), pk=pk)
+    keepalive = settings.EVENT_STREAM_KEEPALIVE
+    if isinstance(request, ASGIRequest):
+        events = astream_room_events(pk, keepalive)
+    else:
+        events = stream_room_events(pk, keepalive)
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+def export_rooms(request):
+    """Stream rooms with their players and scores as NDJSON (or ``?as=csv``).
+
+    ``?room=<id>`` exports one room, ``?from=``/``?to=`` (ISO dates) the
+    rooms created in that range, and no filter every room.
+    """
+    as_format = request.GET.get("as", "ndjson")
+    if as_format not in archive.FORMATS:
+        return JsonResponse(
+            {"error": f"'as' must be one of {', '.join(archive.FORMATS)}"}, status=400
+        )
+    try:
+        rooms = archive.rooms_between(request.GET.get("from"), request.GET.get("to"))
+        if request.GET.get("room"):
+            rooms = rooms.filter(pk=uuid.UUID(request.GET["room"]))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    response = StreamingHttpResponse(
+        archive.encode(archive.export_records(rooms), as_format),
+        content_type=archive.FORMATS[as_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="rooms.{as_format}"'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def import_rooms(request):
+    """Import an export sent as the request body, read as it streams in.
+
+    The body is NDJSON, or CSV when sent as ``text/csv``.
+    """
+    as_format = "csv" if request.content_type == archive.FORMATS["csv"] else "ndjson"
+    try:
+        counts = archive.import_records(archive.decode(request, as_format))
+    except archive.ArchiveError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(counts)
+
+
+def metrics(request):
+    """Expose per-action request metrics in the Prometheus text format."""
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+metrics.exclude_from_metrics = True
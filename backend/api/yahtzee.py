@@ -0,0 +1,183 @@
+"""
+Yahtzee scoring.
+
+Sorted, five dice only have 252 distinct outcomes, so the score of every
+outcome in all 13 categories is computed once, at import, into a 252 x 13
+table. Scoring a roll is a lookup in that table; with NumPy installed a
+whole batch of rolls is scored with one indexing operation, through an
+index from each of the 6**5 unsorted rolls to its table row.
+
+Scoring games on top of that applies the rules that depend on the rest of
+the card: the upper bonus, Yahtzee bonuses and the joker rules for extra
+Yahtzees.
+"""
+
+import itertools
+from collections import Counter
+
+from .grid import (
+    LOWER_CATEGORIES,
+    UPPER_BONUS,
+    UPPER_BONUS_THRESHOLD,
+    UPPER_CATEGORIES,
+    YAHTZEE_CATEGORIES,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+FACES = range(1, 7)
+DICE = 5
+YAHTZEE_SCORE = 50
+YAHTZEE_BONUS = 100
+# What full house and the straights are worth when a Yahtzee is a joker.
+JOKER_SCORES = {"full_house": 25, "small_straight": 30, "large_straight": 40}
+
+COLUMN = {category: n for n, category in enumerate(YAHTZEE_CATEGORIES)}
+
+
+def score_outcome(dice):
+    """Score five dice in every category, in YAHTZEE_CATEGORIES order."""
+    counts = Counter(dice)
+    total = sum(dice)
+    most = max(counts.values())
+    faces = set(dice)
+    return (
+        *(face * counts[face] for face in FACES),
+        total if most >= 3 else 0,
+        total if most >= 4 else 0,
+        25 if sorted(counts.values()) == [2, 3] else 0,
+        30 if any(set(run) <= faces for run in ((1, 2, 3, 4), (2, 3, 4, 5), (3, 4, 5, 6))) else 0,
+        40 if faces in ({1, 2, 3, 4, 5}, {2, 3, 4, 5, 6}) else 0,
+        YAHTZEE_SCORE if most == DICE else 0,
+        total,
+    )
+
+
+OUTCOMES = list(itertools.combinations_with_replacement(FACES, DICE))
+ROW = {outcome: row for row, outcome in enumerate(OUTCOMES)}
+TABLE = [score_outcome(outcome) for outcome in OUTCOMES]
+
+if np is not None:
+    _TABLE = np.array(TABLE, dtype=np.int16)
+    # Base-6 place values: a roll's key is sum((die - 1) * 6**i).
+    _PLACES = 6 ** np.arange(DICE)
+    _ROW_OF_KEY = np.empty(6**DICE, dtype=np.uint8)
+    for roll in itertools.product(FACES, repeat=DICE):
+        _ROW_OF_KEY[(np.array(roll) - 1) @ _PLACES] = ROW[tuple(sorted(roll))]
+
+
+def check_rolls(rolls):
+    """Raise ValueError unless ``rolls`` is a list of five dice from 1 to 6 each."""
+    if not len(rolls):
+        return
+    if np is not None:
+        try:
+            dice = np.asarray(rolls)
+        except ValueError:
+            raise ValueError("Each roll must be a list of five integers")
+        if dice.ndim != 2 or dice.shape[1] != DICE or dice.dtype.kind not in "iu":
+            raise ValueError("Each roll must be a list of five integers")
+        # NumPy turns booleans among integers into 0 and 1.
+        if bool in set(map(type, itertools.chain.from_iterable(rolls))):
+            raise ValueError("Each roll must be a list of five integers")
+        if dice.min() < 1 or dice.max() > 6:
+            raise ValueError("Dice must be between 1 and 6")
+        return
+    for roll in rolls:
+        if (
+            not isinstance(roll, (list, tuple))
+            or len(roll) != DICE
+            or not all(isinstance(die, int) and not isinstance(die, bool) for die in roll)
+        ):
+            raise ValueError("Each roll must be a list of five integers")
+        if not all(1 <= die <= 6 for die in roll):
+            raise ValueError("Dice must be between 1 and 6")
+
+
+def score_rolls(rolls):
+    """Score each roll in all 13 categories; return a list of 13-score lists."""
+    if not len(rolls):
+        return []
+    if np is not None:
+        keys = (np.asarray(rolls, dtype=np.int64) - 1) @ _PLACES
+        return _TABLE[_ROW_OF_KEY[keys]].tolist()
+    return [list(TABLE[ROW[tuple(sorted(roll))]]) for roll in rolls]
+
+
+def expected_scores(rolls, categories):
+    """Score each roll in its own category alone (no bonuses or jokers)."""
+    if not len(rolls):
+        return []
+    columns = [COLUMN[category] for category in categories]
+    if np is not None:
+        keys = (np.asarray(rolls, dtype=np.int64) - 1) @ _PLACES
+        return _TABLE[_ROW_OF_KEY[keys], columns].tolist()
+    return [
+        TABLE[ROW[tuple(sorted(roll))]][column] for roll, column in zip(rolls, columns)
+    ]
+
+
+def score_game(turns, scores=None):
+    """Score one player's game, turn by turn, with bonuses and jokers.
+
+    ``turns`` are (dice, category) pairs in the order they were played.
+    ``scores`` optionally holds each turn's raw 13 scores (from score_rolls)
+    when the dice were already scored in a batch. Returns the score of each
+    turn, an error (or None) for each turn, the upper section total, the
+    upper bonus, the Yahtzee bonus and the grand total.
+    """
+    if scores is None:
+        scores = score_rolls([dice for dice, _ in turns])
+    card = {}
+    turn_scores, errors = [], []
+    yahtzee_bonus = 0
+    for (dice, category), raw in zip(turns, scores):
+        error = None
+        value = raw[COLUMN[category]]
+        if category in card:
+            error = f"{category} is already scored"
+        elif raw[COLUMN["yahtzee"]] and "yahtzee" in card:
+            # An extra Yahtzee: a bonus if the first one scored 50, and a
+            # joker if its own upper box is already used.
+            if card["yahtzee"] == YAHTZEE_SCORE:
+                yahtzee_bonus += YAHTZEE_BONUS
+            own_box = UPPER_CATEGORIES[dice[0] - 1]
+            lower_open = [c for c in LOWER_CATEGORIES if c not in card]
+            if own_box not in card:
+                if category != own_box:
+                    error = f"A Yahtzee must go in {own_box} while it is open"
+            elif category in LOWER_CATEGORIES:
+                value = JOKER_SCORES.get(category, value)
+            elif lower_open:
+                error = "A joker must go in an open lower box"
+        card.setdefault(category, value)
+        turn_scores.append(value)
+        errors.append(error)
+
+    upper = sum(card.get(category, 0) for category in UPPER_CATEGORIES)
+    upper_bonus = UPPER_BONUS if upper >= UPPER_BONUS_THRESHOLD else 0
+    return {
+        "scores": turn_scores,
+        "errors": errors,
+        "upper_total": upper,
+        "upper_bonus": upper_bonus,
+        "yahtzee_bonus": yahtzee_bonus,
+        "total": sum(card.values()) + upper_bonus + yahtzee_bonus,
+    }
+
+
+def score_games(games):
+    """Score many games at once; ``games`` are lists of (dice, category) turns.
+
+    All the dice are scored in one batch before the games are walked.
+    """
+    scores = score_rolls([dice for game in games for dice, _ in game])
+    results = []
+    start = 0
+    for game in games:
+        results.append(score_game(game, scores[start : start + len(game)]))
+        start += len(game)
+    return results
@@ -0,0 +1,32 @@
+"""
+Django setup for benchmarks.
+
+Benchmarks run against a throwaway SQLite database so they never touch the
+development database. With ROOM_SHARDS set, the shard databases are created
+next to it, so the load benchmark can compare shard counts.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def setup_django(db_path=None):
+    """Configure Django on a fresh, migrated database and return its path."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scorecard.settings")
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp(prefix="scorecard-bench-")) / "bench.sqlite3"
+    db_path = Path(db_path)
+    settings.DATABASES["default"]["NAME"] = str(db_path)
+    for alias, database in settings.DATABASES.items():
+        if alias.startswith("shard_"):
+            database["NAME"] = str(db_path.with_name(f"{db_path.stem}-{alias}.sqlite3"))
+    settings.DEBUG = False
+    django.setup()
+    call_command("migrate_shards", verbosity=0)
+    return db_path
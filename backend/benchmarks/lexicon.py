@@ -0,0 +1,93 @@
+"""
+Benchmark Scrabble lexicon lookups.
+
+Compiles a word list (random words by default) into the memory-mapped
+DAWG, then times opening it and looking up a mix of words in and out of
+the lexicon, against a plain Python set of the same words.
+
+    python -m benchmarks.lexicon --words /usr/share/dict/words --lookups 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+
+from api import scrabble
+
+
+def random_words(count, seed):
+    """Random words of 2 to 15 letters, with the English letter frequencies roughly."""
+    rng = random.Random(seed)
+    letters = string.ascii_uppercase
+    weights = [8, 2, 3, 4, 12, 2, 3, 6, 7, 1, 1, 4, 2, 7, 8, 2, 1, 6, 6, 9, 3, 1, 2, 1, 2, 1]
+    return [
+        "".join(rng.choices(letters, weights, k=rng.randint(2, 15))) for _ in range(count)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", help="Word list file (default: random words).")
+    parser.add_argument("--count", type=int, default=250_000, help="Random words to use.")
+    parser.add_argument("--lookups", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.words:
+        with open(args.words, encoding="utf-8") as f:
+            words = [word for word in map(scrabble.normalize, f) if word]
+    else:
+        words = random_words(args.count, args.seed)
+
+    start = time.perf_counter()
+    data, count = scrabble.compile_words(words)
+    compile_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lexicon.dawg")
+        scrabble.save(data, path)
+
+        start = time.perf_counter()
+        lexicon = scrabble.Lexicon(path)
+        open_seconds = time.perf_counter() - start
+
+        rng = random.Random(args.seed + 1)
+        misses = random_words(args.lookups // 2, args.seed + 2)
+        queries = rng.choices(words, k=args.lookups - len(misses)) + misses
+        rng.shuffle(queries)
+
+        start = time.perf_counter()
+        found = sum(word in lexicon for word in queries)
+        dawg_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        word_set = set(words)
+        set_build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        set_found = sum(word in word_set for word in queries)
+        set_seconds = time.perf_counter() - start
+        lexicon.close()
+
+    report = {
+        "words": count,
+        "file_bytes": len(data),
+        "bytes_per_word": round(len(data) / count, 2),
+        "compile_seconds": round(compile_seconds, 3),
+        "open_ms": round(open_seconds * 1000, 3),
+        "lookups": len(queries),
+        "found": found,
+        "lookups_per_second": round(len(queries) / dawg_seconds),
+        "set_build_seconds": round(set_build_seconds, 3),
+        "set_lookups_per_second": round(len(queries) / set_seconds),
+    }
+    print(json.dumps(report, indent=2))
+    if found != set_found:
+        raise SystemExit(f"The lexicon found {found} words, the set {set_found}")
+
+
+if __name__ == "__main__":
+    main()
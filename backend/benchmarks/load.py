@@ -0,0 +1,373 @@
+"""
+Load test the API in-process.
+
+Seeds rooms, players and scores, then has several threads drive a mixed
+workload (create room, join, post score, update score, poll room, room
+summary) through the WSGI application. Throughput and p50/p95/p99 latency
+per endpoint are printed as JSON; pass a previous report to --compare to
+flag regressions.
+
+    python -m benchmarks.load --rooms 50 --threads 8 --duration 30 --output base.json
+    python -m benchmarks.load --rooms 50 --threads 8 --duration 30 --compare base.json
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from .environment import setup_django
+
+# Relative frequency of each operation; polling dominates, as in a live game.
+WORKLOAD = {
+    "create_room": 1,
+    "join_room": 2,
+    "post_score": 6,
+    "put_score": 3,
+    "increment_score": 4,
+    "poll_room": 12,
+    "room_summary": 4,
+}
+
+
+class WSGIClient:
+    """Call a WSGI application directly, without a socket."""
+
+    def __init__(self, application, host="localhost"):
+        self.application = application
+        self.host = host
+
+    def request(self, method, path, data=None, headers=None):
+        """Return the status code, headers and body of one request."""
+        body = json.dumps(data).encode() if data is not None else b""
+        path, _, query = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": self.host,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in (headers or {}).items():
+            environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response["status"] = int(status.split()[0])
+            response["headers"] = dict(response_headers)
+
+        result = self.application(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], content
+
+
+class RoomPool:
+    """The rooms, players and scores the virtual users pick from."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rooms = []
+        self.players = defaultdict(list)
+        self.scores = defaultdict(list)
+        self.rounds = defaultdict(int)
+
+    def add_room(self, room_id, players=(), scores=(), rounds=0):
+        with self.lock:
+            self.rooms.append(room_id)
+            self.players[room_id].extend(players)
+            self.scores[room_id].extend(scores)
+            self.rounds[room_id] = rounds
+
+    def pick_room(self, rng):
+        with self.lock:
+            return rng.choice(self.rooms)
+
+    def pick_player(self, rng):
+        """Return a room with players, one of its players and a new round number."""
+        with self.lock:
+            room_id = rng.choice([room for room in self.rooms if self.players[room]])
+            self.rounds[room_id] += 1
+            return room_id, rng.choice(self.players[room_id]), self.rounds[room_id]
+
+
+def seed(pool, rooms, players, rounds):
+    """Create rooms with players and scores directly through the ORM."""
+    from django.db import transaction
+    from api import sharding
+    from api.aggregates import rebuild_room
+    from api.models import Player, Room, Score
+
+    for number in range(rooms):
+        room = Room(name=f"Bench {number}", game_type="tally")
+        with sharding.use_room(room.pk) as db, transaction.atomic(using=db):
+            room.save()
+            members = Player.objects.bulk_create(
+                Player(name=f"Player {n}", room=room) for n in range(players)
+            )
+            scores = Score.objects.bulk_create(
+                Score(player=player, room=room, round_number=n, score_value=n)
+                for n in range(1, rounds + 1)
+                for player in members
+            )
+            rebuild_room(room.pk)
+        pool.add_room(
+            str(room.pk),
+            [str(player.pk) for player in members],
+            [str(score.pk) for score in scores],
+            rounds,
+        )
+
+
+class VirtualUser:
+    """One thread issuing a random mix of requests until the deadline."""
+
+    def __init__(self, client, pool, rng):
+        self.client = client
+        self.pool = pool
+        self.rng = rng
+        self.etags = {}
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def create_room(self):
+        status, _, body = self.client.request(
+            "POST", "/api/rooms/", {"name": "Load test", "game_type": "tally"}
+        )
+        if status == 201:
+            self.pool.add_room(json.loads(body)["id"])
+        return status
+
+    def join_room(self):
+        room_id = self.pool.pick_room(self.rng)
+        name = f"Player {self.rng.getrandbits(32):08x}"
+        status, _, body = self.client.request(
+            "POST", f"/api/rooms/{room_id}/join/", {"name": name}
+        )
+        if status == 201:
+            with self.pool.lock:
+                self.pool.players[room_id].append(json.loads(body)["id"])
+        return status
+
+    def post_score(self):
+        room_id, player_id, round_number = self.pool.pick_player(self.rng)
+        status, _, body = self.client.request(
+            "POST",
+            "/api/scores/",
+            {
+                "player": player_id,
+                "room": room_id,
+                "round_number": round_number,
+                "score_value": self.rng.randint(0, 50),
+                "category": None,
+            },
+        )
+        if status == 201:
+            with self.pool.lock:
+                self.pool.scores[room_id].append(json.loads(body)["id"])
+        return status
+
+    def put_score(self):
+        with self.pool.lock:
+            scored = [room for room in self.pool.rooms if self.pool.scores[room]]
+            score_id = self.rng.choice(self.pool.scores[self.rng.choice(scored)])
+        status, _, _ = self.client.request(
+            "PUT", f"/api/scores/{score_id}/", {"score_value": self.rng.randint(0, 50)}
+        )
+        return status
+
+    def increment_score(self):
+        with self.pool.lock:
+            scored = [room for room in self.pool.rooms if self.pool.scores[room]]
+            score_id = self.rng.choice(self.pool.scores[self.rng.choice(scored)])
+        status, _, _ = self.client.request(
+            "POST", f"/api/scores/{score_id}/increment/", {"delta": 1}
+        )
+        return status
+
+    def poll_room(self):
+        room_id = self.pool.pick_room(self.rng)
+        headers = {}
+        if room_id in self.etags:
+            headers["If-None-Match"] = self.etags[room_id]
+        status, response_headers, _ = self.client.request(
+            "GET", f"/api/rooms/{room_id}/", headers=headers
+        )
+        if "ETag" in response_headers:
+            self.etags[room_id] = response_headers["ETag"]
+        return status
+
+    def room_summary(self):
+        room_id = self.pool.pick_room(self.rng)
+        status, _, _ = self.client.request(
+            "GET", f"/api/scores/room_summary/?room_id={room_id}"
+        )
+        return status
+
+    def run(self, deadline, workload):
+        from django.db import connections
+
+        operations = list(workload)
+        weights = [workload[name] for name in operations]
+        try:
+            while time.perf_counter() < deadline:
+                name = self.rng.choices(operations, weights)[0]
+                start = time.perf_counter()
+                try:
+                    status = getattr(self, name)()
+                except Exception:
+                    status = None
+                self.samples[name].append(time.perf_counter() - start)
+                if status is None or status >= 400:
+                    self.errors[name] += 1
+        finally:
+            connections.close_all()
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, errors, seconds):
+    """Turn latency samples (seconds) into per-endpoint statistics."""
+    stats = {}
+    for name in sorted(samples):
+        ordered = sorted(samples[name])
+        stats[name] = {
+            "requests": len(ordered),
+            "errors": errors.get(name, 0),
+            "throughput_rps": round(len(ordered) / seconds, 1),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+    return stats
+
+
+def compare(report, baseline, tolerance):
+    """List endpoints whose p95 latency or throughput got worse than allowed."""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']}/s -> "
+                f"{current['throughput_rps']}/s"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--output", help="Also write the report to this file.")
+    parser.add_argument("--compare", help="A previous report to check against.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown before --compare fails (default: 0.2).",
+    )
+    parser.add_argument("--db", help="SQLite file to use (default: a temp file).")
+    args = parser.parse_args(argv)
+
+    setup_django(args.db)
+    from django.core.wsgi import get_wsgi_application
+
+    pool = RoomPool()
+    seed(pool, args.rooms, args.players, args.rounds)
+    client = WSGIClient(get_wsgi_application())
+    users = [
+        VirtualUser(client, pool, random.Random(args.seed + n))
+        for n in range(args.threads)
+    ]
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=user.run, args=(deadline, WORKLOAD)) for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for user in users:
+        for name, values in user.samples.items():
+            samples[name].extend(values)
+        for name, count in user.errors.items():
+            errors[name] += count
+
+    report = {
+        "config": {
+            key: getattr(args, key)
+            for key in ("rooms", "players", "rounds", "threads", "duration", "seed")
+        },
+        "seconds": round(seconds, 3),
+        "endpoints": summarize(samples, errors, seconds),
+        "total": summarize(
+            {"all": [value for values in samples.values() for value in values]},
+            {"all": sum(errors.values())},
+            seconds,
+        )["all"],
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != report["config"]:
+            print("Warning: the baseline ran with a different config", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+    if regressions:
+        raise SystemExit("Regressions:\n  " + "\n  ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
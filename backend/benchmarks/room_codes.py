@@ -0,0 +1,86 @@
+"""
+Benchmark room code allocation.
+
+Allocates codes for the requested number of rooms (1M by default), checks
+that they are all distinct, optionally inserts the rooms, and compares
+against the old random-code-plus-SELECT loop on a smaller sample.
+
+    python -m benchmarks.room_codes --rooms 1000000 --insert
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+
+from .environment import setup_django
+
+
+def legacy_code(Room):
+    """The previous generator: random codes probed with one SELECT each."""
+    probes = 0
+    while True:
+        probes += 1
+        code = "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        if not Room.objects.filter(room_code=code).exists():
+            return code, probes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=1_000_000)
+    parser.add_argument("--block-size", type=int, default=1000)
+    parser.add_argument(
+        "--insert", action="store_true", help="Also insert the rooms into SQLite."
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--legacy-sample", type=int, default=10_000)
+    parser.add_argument("--db", help="SQLite file to use (default: a temp file).")
+    args = parser.parse_args(argv)
+
+    setup_django(args.db)
+    from django.db import transaction
+    from api.codes import RoomCodeAllocator
+    from api.models import Room
+
+    allocator = RoomCodeAllocator(block_size=args.block_size)
+    start = time.perf_counter()
+    codes = [allocator.allocate() for _ in range(args.rooms)]
+    allocate_seconds = time.perf_counter() - start
+    distinct = len(set(codes))
+
+    report = {
+        "rooms": args.rooms,
+        "distinct_codes": distinct,
+        "allocate_seconds": round(allocate_seconds, 3),
+        "codes_per_second": round(args.rooms / allocate_seconds),
+    }
+
+    if args.insert:
+        start = time.perf_counter()
+        for offset in range(0, args.rooms, args.batch_size):
+            with transaction.atomic():
+                Room.objects.bulk_create(
+                    Room(name=f"Room {n}", game_type="tally", room_code=codes[n])
+                    for n in range(offset, min(offset + args.batch_size, args.rooms))
+                )
+        insert_seconds = time.perf_counter() - start
+        report["insert_seconds"] = round(insert_seconds, 3)
+        report["rooms_per_second"] = round(args.rooms / insert_seconds)
+
+    if args.legacy_sample:
+        start = time.perf_counter()
+        probes = sum(legacy_code(Room)[1] for _ in range(args.legacy_sample))
+        legacy_seconds = time.perf_counter() - start
+        report["legacy_sample"] = args.legacy_sample
+        report["legacy_codes_per_second"] = round(args.legacy_sample / legacy_seconds)
+        report["legacy_selects_per_code"] = round(probes / args.legacy_sample, 4)
+
+    print(json.dumps(report, indent=2))
+    if distinct != args.rooms:
+        raise SystemExit(f"{args.rooms - distinct} duplicate codes allocated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark DRF serializers against the fast serialization path.
+
+Builds and renders one room (players and scores nested) and its score list
+both ways, checks the bytes are identical, and reports the time per call.
+
+    python -m benchmarks.serialization --players 8 --scores 1000
+"""
+
+import argparse
+import json
+import time
+
+from .environment import setup_django
+
+
+def best_of(repeat, func):
+    """Return the fastest of ``repeat`` runs of ``func`` in milliseconds, and its result."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--scores", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="SQLite file to use (default: a temp file).")
+    args = parser.parse_args(argv)
+
+    setup_django(args.db)
+    from rest_framework.renderers import JSONRenderer
+    from api import fastpath
+    from api.aggregates import rebuild_room
+    from api.models import Player, Room, Score
+    from api.renderers import FastJSONRenderer
+    from api.serializers import RoomSerializer, ScoreSerializer
+    from api.views import RoomViewSet
+
+    room = Room.objects.create(name="Benchmark", game_type="yahtzee")
+    players = Player.objects.bulk_create(
+        Player(name=f"Player {n}", room=room) for n in range(args.players)
+    )
+    Score.objects.bulk_create(
+        Score(
+            player=players[n % args.players],
+            room=room,
+            round_number=n // args.players + 1,
+            score_value=n,
+            notes="nice roll" if n % 3 else "",
+        )
+        for n in range(args.scores)
+    )
+    rebuild_room(room.pk)
+
+    rooms = RoomViewSet(action="retrieve").get_queryset().filter(pk=room.pk)
+    scores = Score.objects.select_related("player").filter(room=room)
+    cases = {
+        "room": (
+            lambda: JSONRenderer().render(RoomSerializer(rooms.get()).data),
+            lambda: FastJSONRenderer().render(
+                fastpath.rooms(fastpath.room_rows(Room.objects.filter(pk=room.pk)))[0]
+            ),
+        ),
+        "scores": (
+            lambda: JSONRenderer().render(ScoreSerializer(scores, many=True).data),
+            lambda: FastJSONRenderer().render(
+                fastpath.scores(fastpath.score_rows(scores))
+            ),
+        ),
+    }
+
+    report = {"players": args.players, "scores": args.scores, "results": {}}
+    mismatches = []
+    for name, (serializer_path, fast_path) in cases.items():
+        serializer_ms, expected = best_of(args.repeat, serializer_path)
+        fast_ms, actual = best_of(args.repeat, fast_path)
+        if actual != expected:
+            mismatches.append(name)
+        report["results"][name] = {
+            "bytes": len(expected),
+            "serializer_ms": serializer_ms,
+            "fast_ms": fast_ms,
+            "speedup": round(serializer_ms / fast_ms, 1),
+            "identical": actual == expected,
+        }
+
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        raise SystemExit(f"Output differs for: {', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+ASGI config for scorecard project.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "scorecard.settings")
+
+application = get_asgi_application()
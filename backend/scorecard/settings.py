@@ -34,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.RequestMetricsMiddleware",
+    "api.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -63,6 +65,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "scorecard.wsgi.application"
+ASGI_APPLICATION = "scorecard.asgi.application"
 
 # Database
 DATABASES = {
@@ -72,6 +75,27 @@ DATABASES = {
     }
 }
 
+# Spread rooms (with their players and scores) over this many SQLite files so
+# writes to different rooms do not queue behind one database lock; 0 keeps
+# everything in db.sqlite3. Run `manage.py migrate_shards` after changing it,
+# then `manage.py rebalance_shards`. See api/sharding.py.
+ROOM_SHARDS = config("ROOM_SHARDS", default=0, cast=int)
+for shard in range(ROOM_SHARDS):
+    DATABASES[f"shard_{shard}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / f"db-shard-{shard}.sqlite3",
+    }
+if ROOM_SHARDS:
+    DATABASE_ROUTERS = ["api.sharding.RoomShardRouter"]
+
+# Cache (per process by default; use a shared backend with several workers so
+# room snapshot invalidations reach all of them)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -116,3 +140,72 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# Live room event streams (Server-Sent Events)
+EVENT_STREAM_KEEPALIVE = config("EVENT_STREAM_KEEPALIVE", default=15, cast=int)
+EVENT_STREAM_RETRY_MS = config("EVENT_STREAM_RETRY_MS", default=3000, cast=int)
+EVENT_STREAM_QUEUE_SIZE = config("EVENT_STREAM_QUEUE_SIZE", default=256, cast=int)
+
+# Room code allocation: sequence values reserved per database round trip, and
+# the permutation key (defaults to SECRET_KEY; changing it reshuffles codes).
+ROOM_CODE_BLOCK_SIZE = config("ROOM_CODE_BLOCK_SIZE", default=100, cast=int)
+ROOM_CODE_KEY = config("ROOM_CODE_KEY", default="")
+
+# Room read snapshots: how long a cached room version may be trusted before
+# re-reading it, and how long serialized snapshots are kept (seconds).
+ROOM_VERSION_CACHE_TIMEOUT = config("ROOM_VERSION_CACHE_TIMEOUT", default=5, cast=int)
+SNAPSHOT_CACHE_TIMEOUT = config("SNAPSHOT_CACHE_TIMEOUT", default=300, cast=int)
+
+# Build room and score reads from .values() rows and render them with orjson
+# (when installed) instead of DRF serializers; the output is byte-identical.
+FAST_SERIALIZATION = config("FAST_SERIALIZATION", default=False, cast=bool)
+
+# Request metrics: log requests slower than this (with their SQL) at WARNING
+# on the "api.middleware" logger; 0 disables the slow request log.
+REQUEST_SLOW_LOG_MS = config("REQUEST_SLOW_LOG_MS", default=0, cast=float)
+
+# Responses at least this many bytes long are gzip (or, with the brotli
+# package installed, brotli) compressed for clients that accept it.
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", default=1024, cast=int)
+
+# Merge score increments arriving within this many milliseconds per room into
+# one transaction; requests are answered once it commits. 0 writes each
+# increment on its own. See api/increments.py.
+SCORE_INCREMENT_WINDOW_MS = config("SCORE_INCREMENT_WINDOW_MS", default=0, cast=float)
+
+# Reject score updates that carry neither If-Match nor a version (428) instead
+# of letting them overwrite whatever is current.
+SCORE_UPDATES_REQUIRE_VERSION = config(
+    "SCORE_UPDATES_REQUIRE_VERSION", default=False, cast=bool
+)
+
+# Rebuilding a room's scores from its history saves a snapshot once it has
+# replayed this many events since the last one. See api/history.py.
+SCORE_SNAPSHOT_INTERVAL = config("SCORE_SNAPSHOT_INTERVAL", default=100, cast=int)
+
+# Room code lookups (by_code): how many codes each process caches, for how
+# long (seconds), how long codes no room has are remembered, and optionally
+# a CACHES alias shared by all workers. See api/code_cache.py.
+ROOM_CODE_CACHE_SIZE = config("ROOM_CODE_CACHE_SIZE", default=10000, cast=int)
+ROOM_CODE_CACHE_TTL = config("ROOM_CODE_CACHE_TTL", default=300, cast=int)
+ROOM_CODE_NEGATIVE_TTL = config("ROOM_CODE_NEGATIVE_TTL", default=30, cast=int)
+ROOM_CODE_SHARED_CACHE = config("ROOM_CODE_SHARED_CACHE", default="")
+
+# The most rolls (or game turns) one request to the Yahtzee scoring endpoints
+# may carry. See api/yahtzee.py.
+YAHTZEE_MAX_ROLLS = config("YAHTZEE_MAX_ROLLS", default=10000, cast=int)
+
+# The Yahtzee strategy table behind move hints, built with
+# "manage.py build_yahtzee_strategy" and memory-mapped by every worker.
+# See api/strategy.py.
+YAHTZEE_STRATEGY_PATH = config(
+    "YAHTZEE_STRATEGY_PATH", default=str(BASE_DIR / "yahtzee-strategy.npy")
+)
+
+# The Scrabble lexicon, built from a word list with
+# "manage.py build_scrabble_lexicon" and memory-mapped by every worker, and
+# the most words one request may check. See api/scrabble.py.
+SCRABBLE_LEXICON_PATH = config(
+    "SCRABBLE_LEXICON_PATH", default=str(BASE_DIR / "scrabble.dawg")
+)
+SCRABBLE_MAX_WORDS = config("SCRABBLE_MAX_WORDS", default=1000, cast=int)
@@ -0,0 +1,117 @@
+"""
+Tests for the incrementally maintained score aggregates.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.aggregates import verify_room
+from api.models import Room, Player, Score, PlayerTotal, RoomAggregate
+
+
+class AggregateMaintenanceTest(TestCase):
+    """Test cases for keeping aggregates in step with score writes."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.alice = Player.objects.create(name="Alice", room=self.room)
+        self.bob = Player.objects.create(name="Bob", room=self.room)
+
+    def add_score(self, player, round_number, value):
+        return Score.objects.create(
+            player=player, room=self.room, round_number=round_number, score_value=value
+        )
+
+    def assertTotals(self, alice, bob, rounds, count):
+        self.assertEqual(PlayerTotal.objects.get(player=self.alice).total, alice)
+        self.assertEqual(PlayerTotal.objects.get(player=self.bob).total, bob)
+        aggregate = RoomAggregate.objects.get(room=self.room)
+        self.assertEqual((aggregate.total_rounds, aggregate.score_count), (rounds, count))
+        self.assertEqual(verify_room(self.room.pk), [])
+
+    def test_create(self):
+        """Test that new scores are added to the totals."""
+        self.add_score(self.alice, 1, 10)
+        self.add_score(self.bob, 1, 7)
+        self.add_score(self.alice, 2, 5)
+
+        self.assertTotals(alice=15, bob=7, rounds=2, count=3)
+
+    def test_update(self):
+        """Test that edited scores adjust the totals by the difference."""
+        score = self.add_score(self.alice, 1, 10)
+
+        score.score_value = 4
+        score.save()
+
+        self.assertTotals(alice=4, bob=0, rounds=1, count=1)
+
+    def test_move_to_other_round(self):
+        """Test that moving a score to another round recounts the rounds."""
+        score = self.add_score(self.alice, 1, 10)
+        self.add_score(self.bob, 2, 3)
+
+        score.round_number = 2
+        score.save()
+
+        self.assertTotals(alice=10, bob=3, rounds=1, count=2)
+
+    def test_delete(self):
+        """Test that deleted scores are removed from the totals."""
+        first = self.add_score(self.alice, 1, 10)
+        self.add_score(self.alice, 2, 5)
+
+        first.delete()
+
+        self.assertTotals(alice=5, bob=0, rounds=1, count=1)
+
+    def test_delete_player(self):
+        """Test that deleting a player removes their scores from the room."""
+        self.add_score(self.alice, 1, 10)
+        self.add_score(self.bob, 2, 5)
+
+        self.bob.delete()
+
+        aggregate = RoomAggregate.objects.get(room=self.room)
+        self.assertEqual((aggregate.total_rounds, aggregate.score_count), (1, 1))
+        self.assertEqual(verify_room(self.room.pk), [])
+
+    def test_partial_update_through_api(self):
+        """Test that PATCH through ScoreUpdateSerializer updates the totals."""
+        score = self.add_score(self.alice, 1, 10)
+        url = reverse("score-detail", kwargs={"pk": score.pk})
+
+        APIClient().patch(url, {"score_value": 25}, format="json")
+
+        self.assertTotals(alice=25, bob=0, rounds=1, count=1)
+
+
+class RebuildAggregatesCommandTest(TestCase):
+    """Test cases for the rebuild_aggregates management command."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="Alice", room=self.room)
+        Score.objects.bulk_create(
+            Score(player=self.player, room=self.room, round_number=n, score_value=n)
+            for n in range(1, 4)
+        )
+
+    def test_verify_reports_drift(self):
+        """Test that --verify fails when aggregates disagree with the scores."""
+        with self.assertRaises(CommandError):
+            call_command("rebuild_aggregates", "--verify", stderr=StringIO())
+
+    def test_rebuild(self):
+        """Test that rebuilding fixes aggregates for scores written in bulk."""
+        call_command("rebuild_aggregates", stdout=StringIO())
+
+        self.assertEqual(PlayerTotal.objects.get(player=self.player).total, 6)
+        self.assertEqual(RoomAggregate.objects.get(room=self.room).total_rounds, 3)
+        call_command("rebuild_aggregates", "--verify", stdout=StringIO())
@@ -0,0 +1,197 @@
+"""
+Tests for streaming room export and import.
+"""
+
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api import archive
+from api.aggregates import verify_room
+from api.history import verify_history
+from api.models import Room, Player, PlayerTotal, Score
+
+
+class ArchiveTest(TestCase):
+    """Test exporting rooms and importing them back."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Yahtzee Night", game_type="yahtzee")
+        self.alice = Player.objects.create(name="Alice", room=self.room)
+        self.bob = Player.objects.create(name="Bob", room=self.room)
+        Score.objects.create(
+            player=self.alice, room=self.room, round_number=1, score_value=25,
+            category="full_house", notes='Rolled "late",\nsecond try',
+        )
+        Score.objects.create(
+            player=self.bob, room=self.room, round_number=1, score_value=3, category="ones"
+        )
+        self.old_room = Room.objects.create(
+            name="Old", game_type="tally", created_at=timezone.now() - timedelta(days=30)
+        )
+
+    def export(self, **params):
+        response = self.client.get(reverse("export"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def wipe(self):
+        Room.objects.all().delete()
+
+    def test_export_ndjson(self):
+        """Test a room is exported with its players and scores, one per line."""
+        body = self.export(room=str(self.room.pk))
+
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            [record["type"] for record in records],
+            ["room", "player", "player", "score", "score"],
+        )
+        self.assertEqual(records[0]["room_code"], self.room.room_code)
+        self.assertEqual(records[4]["player"], str(self.bob.pk))
+
+    def test_export_date_range(self):
+        """Test only rooms created in the range are exported."""
+        start = (timezone.now() - timedelta(days=1)).date().isoformat()
+
+        body = self.export(**{"from": start})
+
+        rooms = [
+            record["id"]
+            for record in map(json.loads, body.splitlines())
+            if record["type"] == "room"
+        ]
+        self.assertEqual(rooms, [str(self.room.pk)])
+
+    def test_export_rejects_bad_parameters(self):
+        """Test unknown formats and malformed filters are rejected."""
+        self.assertEqual(self.client.get(reverse("export"), {"as": "xml"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse("export"), {"from": "yesterday"}).status_code, 400
+        )
+
+    def test_round_trip(self):
+        """Test importing an export restores rooms, totals and history."""
+        for as_format in archive.FORMATS:
+            with self.subTest(as_format=as_format):
+                body = self.export(**{"as": as_format})
+                self.wipe()
+
+                response = self.client.generic(
+                    "POST", reverse("import"), body, archive.FORMATS[as_format]
+                )
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json(), {"room": 2, "player": 2, "score": 2}
+                )
+                room = Room.objects.get(pk=self.room.pk)
+                self.assertEqual(room.room_code, self.room.room_code)
+                score = Score.objects.get(player=self.alice)
+                self.assertEqual(
+                    (score.category, score.notes),
+                    ("full_house", 'Rolled "late",\nsecond try'),
+                )
+                self.assertEqual(Score.objects.get(player=self.bob).notes, "")
+                self.assertEqual(PlayerTotal.objects.get(player=self.alice).total, 25)
+                self.assertEqual(verify_room(room.pk), [])
+                self.assertEqual(verify_history(room.pk), [])
+
+    def test_import_is_idempotent(self):
+        """Test importing the same export twice upserts instead of duplicating."""
+        body = self.export(room=str(self.room.pk))
+        version = Room.objects.get(pk=self.room.pk).version
+
+        self.client.generic("POST", reverse("import"), body, "application/x-ndjson")
+        self.client.generic("POST", reverse("import"), body, "application/x-ndjson")
+
+        self.assertEqual(Score.objects.filter(room=self.room).count(), 2)
+        self.assertGreater(Room.objects.get(pk=self.room.pk).version, version)
+        self.assertEqual(verify_room(self.room.pk), [])
+
+    def test_import_moves_scores_to_a_new_version(self):
+        """Test a write expecting a score's pre-import version gets 409."""
+        score = Score.objects.get(player=self.alice)
+        body = self.export(room=str(self.room.pk))
+
+        self.client.generic("POST", reverse("import"), body, "application/x-ndjson")
+
+        response = self.client.patch(
+            reverse("score-detail", kwargs={"pk": score.pk}),
+            {"score_value": 30},
+            format="json",
+            HTTP_IF_MATCH=f'"{score.version}"',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Score.objects.get(pk=score.pk).score_value, 25)
+
+    def test_import_empties_undo(self):
+        """Test edits made before an import cannot be undone over it."""
+        score = Score.objects.get(player=self.alice)
+        self.client.patch(
+            reverse("score-detail", kwargs={"pk": score.pk}), {"score_value": 26}, format="json"
+        )
+        body = self.export(room=str(self.room.pk))
+
+        self.client.generic("POST", reverse("import"), body, "application/x-ndjson")
+        response = self.client.post(reverse("room-undo", kwargs={"pk": self.room.pk}))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Score.objects.get(pk=score.pk).score_value, 26)
+        self.assertEqual(verify_history(self.room.pk), [])
+
+    def test_imported_rows_show_in_delta_sync(self):
+        """Test imported players and scores are newer than the room's old version."""
+        body = self.export(room=str(self.room.pk))
+        version = Room.objects.get(pk=self.room.pk).version
+
+        self.client.generic("POST", reverse("import"), body, "application/x-ndjson")
+
+        changes = self.client.get(
+            reverse("room-changes", kwargs={"pk": self.room.pk}), {"since": version}
+        )
+        self.assertEqual(len(changes.data["scores"]), 2)
+
+    def test_import_rejects_bad_records(self):
+        """Test malformed records are reported with their position."""
+        bad = [
+            b'{"type": "room", "id": "not a uuid"}\n',
+            b'{"type": "planet"}\n',
+            b"not json\n",
+            b'{"type": "player", "id": "%s", "room": "%s", "name": "Eve"}\n'
+            % (str(self.alice.pk).encode(), b"00000000-0000-0000-0000-000000000000"),
+        ]
+        for body in bad:
+            with self.subTest(body=body):
+                response = self.client.generic(
+                    "POST", reverse("import"), body, "application/x-ndjson"
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Player.objects.get(pk=self.alice.pk).name, "Alice")
+
+    def test_commands(self):
+        """Test the export and import commands round-trip through a file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rooms.csv")
+            call_command("export_rooms", "--as", "csv", "-o", path)
+            self.wipe()
+
+            call_command("import_rooms", path, "--batch-size", "2", stdout=StringIO())
+
+            self.assertEqual(Room.objects.count(), 2)
+            self.assertEqual(Score.objects.count(), 2)
+            self.assertEqual(verify_room(self.room.pk), [])
+            with open(path, "w") as broken:
+                broken.write("type,id\nroom,nope\n")
+            with self.assertRaises(CommandError):
+                call_command("import_rooms", path, stdout=StringIO())
@@ -0,0 +1,124 @@
+"""
+Tests for the room code lookup cache.
+"""
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api import code_cache
+from api.code_cache import RoomCodeCache
+from api.metrics import registry
+from api.models import Room
+
+
+class RoomCodeCacheTest(SimpleTestCase):
+    """Test the LRU's eviction and expiry."""
+
+    def setUp(self):
+        """Set up a cache with a clock the tests move."""
+        self.now = 0
+        self.cache = RoomCodeCache(2, ttl=60, negative_ttl=5, clock=lambda: self.now)
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry read longest ago goes first."""
+        self.cache.set("AAAA", ("a", True))
+        self.cache.set("BBBB", ("b", True))
+        self.cache.get("AAAA")
+        self.cache.set("CCCC", ("c", True))
+
+        self.assertEqual(self.cache.get("AAAA"), (True, ("a", True)))
+        self.assertEqual(self.cache.get("BBBB"), (False, None))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_misses_expire_sooner(self):
+        """Test negative entries live for the shorter TTL."""
+        self.cache.set("AAAA", ("a", True))
+        self.cache.set("NONE", None)
+
+        self.assertEqual(self.cache.get("NONE"), (True, None))
+        self.now = 10
+        self.assertEqual(self.cache.get("NONE"), (False, None))
+        self.assertEqual(self.cache.get("AAAA"), (True, ("a", True)))
+        self.now = 60
+        self.assertEqual(self.cache.get("AAAA"), (False, None))
+
+
+class CodeLookupTest(TestCase):
+    """Test by_code lookups through the cache."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        code_cache.clear()
+        registry.clear()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+
+    def by_code(self, code):
+        return self.client.get(reverse("room-by-code"), {"code": code})
+
+    def lookups(self):
+        text = self.client.get(reverse("metrics")).content.decode()
+        return {
+            result: int(line.rsplit(" ", 1)[1])
+            for line in text.splitlines()
+            for result in ["hit", "negative_hit", "shared_hit", "miss"]
+            if line.startswith(f'{code_cache.LOOKUPS}{{result="{result}"}}')
+        }
+
+    def test_found_codes_are_cached(self):
+        """Test a repeated lookup does not query the database."""
+        self.assertEqual(self.by_code(self.room.room_code).status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.by_code(self.room.room_code)
+
+        self.assertEqual(response.data["id"], str(self.room.pk))
+        self.assertEqual(self.lookups(), {"miss": 1, "hit": 1})
+
+    def test_unknown_codes_are_cached(self):
+        """Test guessed codes are answered from the cache after the first miss."""
+        self.assertEqual(self.by_code("ZZZZZZZZ").status_code, 404)
+
+        with self.assertNumQueries(0):
+            response = self.by_code("ZZZZZZZZ")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.lookups(), {"miss": 1, "negative_hit": 1})
+
+    def test_deactivated_room(self):
+        """Test deactivating a room takes its code out of the cache."""
+        self.by_code(self.room.room_code)
+
+        self.client.patch(
+            reverse("room-detail", args=[self.room.pk]), {"is_active": False}, format="json"
+        )
+
+        self.assertEqual(self.by_code(self.room.room_code).status_code, 404)
+
+    def test_deleted_room(self):
+        """Test deleting a room takes its code out of the cache."""
+        self.by_code(self.room.room_code)
+
+        self.room.delete()
+
+        self.assertEqual(self.by_code(self.room.room_code).status_code, 404)
+
+    def test_new_room_replaces_negative_entry(self):
+        """Test creating a room under a code cached as unknown makes it findable."""
+        self.by_code("NEWCODE1")
+
+        room = Room.objects.create(name="New", game_type="tally", room_code="NEWCODE1")
+
+        self.assertEqual(self.by_code("NEWCODE1").data["id"], str(room.pk))
+
+    @override_settings(ROOM_CODE_SHARED_CACHE="default")
+    def test_shared_cache(self):
+        """Test a process with an empty cache finds codes in the shared cache."""
+        self.by_code(self.room.room_code)
+        code_cache.clear()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                code_cache.lookup(self.room.room_code), (self.room.pk, True)
+            )
+        self.assertEqual(self.lookups(), {"miss": 1, "shared_hit": 1})
@@ -0,0 +1,137 @@
+"""
+Tests for live room event streams.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.events import RoomEventBroker, broker
+from api.models import Room, Player
+
+
+class RoomEventBrokerTest(TestCase):
+    """Test cases for RoomEventBroker."""
+
+    def test_publish_reaches_room_subscribers_only(self):
+        """Test that events are delivered only to the room's subscribers."""
+        events = RoomEventBroker(queue_size=10)
+        subscription = events.subscribe("room-a")
+        other = events.subscribe("room-b")
+
+        events.publish("room-a", "score.created", {"score_value": 10}, 1)
+
+        event = subscription.get(timeout=0)
+        self.assertEqual(event["type"], "score.created")
+        self.assertEqual(event["data"], {"score_value": 10})
+        self.assertIsNone(other.get(timeout=0))
+
+    def test_unsubscribe(self):
+        """Test that closed subscriptions are removed from the broker."""
+        events = RoomEventBroker(queue_size=10)
+        subscription = events.subscribe("room-a")
+        self.assertEqual(events.subscriber_count("room-a"), 1)
+
+        subscription.close()
+
+        self.assertEqual(events.subscriber_count("room-a"), 0)
+
+    def test_slow_subscriber_gets_resync(self):
+        """Test that an overflowing queue is replaced by a resync event."""
+        events = RoomEventBroker(queue_size=2)
+        subscription = events.subscribe("room-a")
+
+        for value in range(3):
+            events.publish("room-a", "score.created", {"score_value": value}, value)
+
+        self.assertEqual(subscription.get(timeout=0)["type"], "resync")
+        self.assertIsNone(subscription.get(timeout=0))
+
+
+class RoomEventStreamTest(TestCase):
+    """Test cases for the room event stream endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="John Doe", room=self.room)
+
+    def open_stream(self):
+        """Open the room's event stream and return its chunk iterator."""
+        url = reverse("room-events", kwargs={"pk": self.room.pk})
+        response = self.client.get(url)
+        self.addCleanup(response.close)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b"retry:"))
+        return stream
+
+    def test_unknown_room(self):
+        """Test that streaming a missing room returns 404."""
+        url = reverse(
+            "room-events", kwargs={"pk": "00000000-0000-0000-0000-000000000000"}
+        )
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_score_created_event(self):
+        """Test that creating a score is pushed to the room stream."""
+        stream = self.open_stream()
+        data = {
+            "player": self.player.pk,
+            "room": self.room.pk,
+            "round_number": 1,
+            "score_value": 42,
+            "category": "chance",
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("score-list"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        lines = next(stream).decode().splitlines()
+        self.assertEqual(lines[1], "event: score.created")
+        payload = json.loads(lines[2][len("data: ") :])
+        self.assertEqual(payload["score_value"], 42)
+        self.assertEqual(payload["player_name"], "John Doe")
+
+    def test_join_event(self):
+        """Test that joining a room is pushed to the room stream."""
+        stream = self.open_stream()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("room-join", kwargs={"pk": self.room.pk}),
+                {"name": "Jane"},
+                format="json",
+            )
+
+        self.assertIn(b"event: player.created", next(stream))
+
+    def test_stream_closes_subscription(self):
+        """Test that closing the response releases the subscription."""
+        url = reverse("room-events", kwargs={"pk": self.room.pk})
+        response = self.client.get(url)
+        next(iter(response.streaming_content))
+        self.assertEqual(broker.subscriber_count(self.room.pk), 1)
+
+        response.close()
+
+        self.assertEqual(broker.subscriber_count(self.room.pk), 0)
+
+    async def test_asgi_stream(self):
+        """Test that ASGI requests are served by the async event stream."""
+        url = reverse("room-events", kwargs={"pk": self.room.pk})
+        response = await AsyncClient().get(url)
+        stream = response.streaming_content.__aiter__()
+        self.assertTrue((await stream.__anext__()).startswith(b"retry:"))
+
+        await sync_to_async(broker.publish)(self.room.pk, "score.updated", {}, 1)
+
+        self.assertIn(b"event: score.updated", await stream.__anext__())
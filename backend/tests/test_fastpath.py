@@ -0,0 +1,116 @@
+"""
+Tests for the fast serialization path.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from api.models import Room, Player, Score
+from api.renderers import FastJSONRenderer
+
+
+class FastSerializationTest(TestCase):
+    """Test that the fast path returns exactly what the serializers return."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Ünïcode   room", game_type="yahtzee")
+        Room.objects.create(name="Empty room", game_type="tally")
+        alice = Player.objects.create(name="Alice 🎲", room=self.room)
+        bob = Player.objects.create(name='Bob "B"', room=self.room, is_active=False)
+        for round_number in range(1, 4):
+            Score.objects.create(
+                player=alice,
+                room=self.room,
+                round_number=round_number,
+                score_value=round_number * 7,
+                category="chance",
+                notes="line break\n",
+            )
+            Score.objects.create(
+                player=bob, room=self.room, round_number=round_number, score_value=-3
+            )
+
+    def fetch_both(self, url, **headers):
+        """Return the response bodies with the fast path off and on."""
+        bodies = []
+        for enabled in (False, True):
+            cache.clear()
+            with override_settings(FAST_SERIALIZATION=enabled):
+                response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 200)
+            bodies.append(response.content)
+        return bodies
+
+    def test_room_detail(self):
+        """Test room detail output is byte-identical."""
+        slow, fast = self.fetch_both(reverse("room-detail", args=[self.room.pk]))
+
+        self.assertEqual(slow, fast)
+        self.assertIn(b"\\u2028", fast)
+
+    def test_room_by_code(self):
+        """Test room by code output is byte-identical."""
+        url = f"{reverse('room-by-code')}?code={self.room.room_code}"
+
+        slow, fast = self.fetch_both(url)
+
+        self.assertEqual(slow, fast)
+
+    def test_room_list(self):
+        """Test room list output is byte-identical."""
+        slow, fast = self.fetch_both(reverse("room-list"))
+
+        self.assertEqual(slow, fast)
+
+    def test_score_lists(self):
+        """Test score list output is byte-identical, with and without a room."""
+        for url in (
+            reverse("score-list"),
+            f"{reverse('score-list')}?room_id={self.room.pk}&page_size=2",
+            f"{reverse('score-list')}?room_id={self.room.pk}&pagination=cursor",
+        ):
+            slow, fast = self.fetch_both(url)
+            self.assertEqual(slow, fast, url)
+
+    def test_indented_output(self):
+        """Test that indented JSON still comes from the standard renderer."""
+        slow, fast = self.fetch_both(
+            reverse("room-detail", args=[self.room.pk]),
+            HTTP_ACCEPT="application/json; indent=2",
+        )
+
+        self.assertEqual(slow, fast)
+
+    @override_settings(FAST_SERIALIZATION=True)
+    def test_room_detail_queries(self):
+        """Test that a cold room read takes a constant four queries."""
+        cache.clear()
+
+        with self.assertNumQueries(4):
+            self.client.get(reverse("room-detail", args=[self.room.pk]))
+
+    @override_settings(FAST_SERIALIZATION=True)
+    def test_missing_room(self):
+        """Test that a missing room is still a 404."""
+        response = self.client.get(reverse("room-detail", args=[Player.objects.first().pk]))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class FastJSONRendererTest(TestCase):
+    """Test cases for FastJSONRenderer."""
+
+    def test_matches_json_renderer(self):
+        """Test that output matches JSONRenderer, falling back for floats."""
+        for data in (
+            {"a": [1, None, True, "x y z"], "é": {"n": -2**40}},
+            {"float": 1e16},
+            [],
+        ):
+            self.assertEqual(
+                FastJSONRenderer().render(data), JSONRenderer().render(data)
+            )
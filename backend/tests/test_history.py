@@ -0,0 +1,276 @@
+"""
+Tests for the score history, its snapshots and undo/redo.
+"""
+
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.aggregates import verify_room
+from api.history import room_state, take_snapshot, verify_history
+from api.models import Room, Player, RoomScoreSnapshot, Score, ScoreEvent
+
+
+class ScoreHistoryTest(TestCase):
+    """Test recording and replaying score history."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="Alice", room=self.room)
+        self.score = Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+
+    def history(self, **params):
+        return self.client.get(
+            reverse("room-history", kwargs={"pk": self.room.pk}), params
+        ).data
+
+    def test_every_write_is_logged(self):
+        """Test saves, bulk writes, increments and deletes append events."""
+        self.client.patch(
+            reverse("score-detail", args=[self.score.pk]),
+            {"score_value": 12},
+            format="json",
+        )
+        self.client.post(
+            reverse("score-bulk"),
+            {
+                "room": str(self.room.pk),
+                "scores": [
+                    {"player": str(self.player.pk), "round_number": 1, "score_value": 7},
+                    {"player": str(self.player.pk), "round_number": 2, "score_value": 3},
+                ],
+            },
+            format="json",
+        )
+        self.client.post(
+            reverse("score-increment", args=[self.score.pk]), {"delta": 2}, format="json"
+        )
+        self.client.delete(reverse("score-detail", args=[self.score.pk]))
+
+        events = self.history()["events"]
+        self.assertEqual(
+            [(event["action"], event["origin"]) for event in events],
+            [("create", "edit")] + [("update", "edit")] * 2 + [("create", "edit")]
+            + [("update", "edit"), ("delete", "edit")],
+        )
+        self.assertEqual([event["sequence"] for event in events], list(range(1, 7)))
+        increment = events[4]
+        self.assertEqual(
+            (increment["previous"]["score_value"], increment["state"]["score_value"]),
+            (7, 9),
+        )
+        self.assertEqual(verify_history(self.room.pk), [])
+
+    def test_history_pages(self):
+        """Test the history is read in pages after a sequence number."""
+        for value in range(5):
+            self.score.score_value = value
+            self.score.save()
+
+        page = self.history(limit=4)
+        self.assertEqual(page["next"], 4)
+        rest = self.history(after=page["next"])
+        self.assertEqual([event["sequence"] for event in rest["events"]], [5, 6])
+        self.assertIsNone(rest["next"])
+
+    def test_replay_from_snapshot(self):
+        """Test a room's scores are rebuilt from a snapshot plus the tail."""
+        take_snapshot(self.room.pk)
+        self.score.score_value = 30
+        self.score.save()
+
+        with self.assertNumQueries(2):
+            scores = room_state(self.room.pk)
+
+        self.assertEqual(scores[str(self.score.pk)]["score_value"], 30)
+        self.assertEqual(verify_history(self.room.pk), [])
+
+    @override_settings(SCORE_SNAPSHOT_INTERVAL=3)
+    def test_long_replay_saves_snapshot(self):
+        """Test rebuilding past the interval leaves a snapshot behind."""
+        for value in range(3):
+            self.score.score_value = value
+            self.score.save()
+
+        room_state(self.room.pk)
+
+        snapshot = RoomScoreSnapshot.objects.get(room=self.room)
+        self.assertEqual(snapshot.sequence, 4)
+        self.assertEqual(snapshot.scores[str(self.score.pk)]["score_value"], 2)
+
+    def test_snapshot_command(self):
+        """Test the command snapshots and verifies every room."""
+        stdout, stderr = StringIO(), StringIO()
+        call_command("snapshot_rooms", verbosity=0, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(RoomScoreSnapshot.objects.get(room=self.room).sequence, 1)
+        self.assertEqual(stdout.getvalue(), "")
+        Score.objects.filter(pk=self.score.pk).update(score_value=99)
+        with self.assertRaises(CommandError):
+            call_command(
+                "snapshot_rooms", "--verify", verbosity=0, stdout=stdout, stderr=stderr
+            )
+        self.assertIn(
+            f"{self.room.pk}: score {self.score.pk}: history has", stderr.getvalue()
+        )
+        self.assertIn("'score_value': 99", stderr.getvalue())
+
+
+class UndoRedoTest(TestCase):
+    """Test undoing and redoing score edits."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="Alice", room=self.room)
+        response = self.client.post(
+            reverse("score-list"),
+            {
+                "player": str(self.player.pk),
+                "room": str(self.room.pk),
+                "round_number": 1,
+                "score_value": 10,
+                "category": None,
+            },
+            format="json",
+        )
+        self.score_id = response.data["id"]
+        self.client.patch(
+            reverse("score-detail", args=[self.score_id]),
+            {"score_value": 15},
+            format="json",
+        )
+
+    def post(self, name, **data):
+        return self.client.post(
+            reverse(f"room-{name}", kwargs={"pk": self.room.pk}), data, format="json"
+        )
+
+    def score_value(self):
+        score = Score.objects.filter(pk=self.score_id).first()
+        return score and score.score_value
+
+    def test_undo_and_redo(self):
+        """Test undo walks back through edits and redo replays them."""
+        response = self.post("undo")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(event["action"], event["origin"]) for event in response.data["events"]],
+            [("update", "undo")],
+        )
+        self.assertEqual(self.score_value(), 10)
+
+        self.post("undo")
+        self.assertIsNone(self.score_value())
+
+        self.post("redo", steps=2)
+        self.assertEqual(self.score_value(), 15)
+        self.assertEqual(verify_room(self.room.pk), [])
+        self.assertEqual(verify_history(self.room.pk), [])
+
+    def test_undo_delete(self):
+        """Test an undone delete brings the score back as it was."""
+        created_at = timezone.now().replace(microsecond=123456)
+        Score.objects.filter(pk=self.score_id).update(created_at=created_at)
+        self.client.delete(reverse("score-detail", args=[self.score_id]))
+
+        self.post("undo")
+
+        score = Score.objects.get(pk=self.score_id)
+        self.assertEqual((score.score_value, score.player_id), (15, self.player.pk))
+        self.assertEqual(score.created_at, created_at)
+        self.assertEqual(verify_room(self.room.pk), [])
+
+    def test_undo_shows_in_delta_sync(self):
+        """Test undo writes bump the room version like any other write."""
+        before = Room.objects.get(pk=self.room.pk).version
+
+        response = self.post("undo")
+
+        changes = self.client.get(
+            reverse("room-changes", kwargs={"pk": self.room.pk}), {"since": before}
+        )
+        self.assertEqual(changes.data["version"], response.data["version"])
+        self.assertEqual([s["score_value"] for s in changes.data["scores"]], [10])
+
+    def test_new_edit_clears_redo(self):
+        """Test redo is only possible until the next edit."""
+        self.post("undo")
+        self.client.patch(
+            reverse("score-detail", args=[self.score_id]),
+            {"score_value": 20},
+            format="json",
+        )
+
+        response = self.post("redo")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.score_value(), 20)
+
+    def test_undo_reads_one_event(self):
+        """Test undo costs the same however long the history is."""
+        def undo_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post("undo").status_code, 200)
+            self.post("redo")
+            return len(queries)
+
+        short = undo_queries()
+        for value in range(20):
+            self.client.patch(
+                reverse("score-detail", args=[self.score_id]),
+                {"score_value": value},
+                format="json",
+            )
+
+        self.assertEqual(undo_queries(), short)
+        self.assertEqual(self.score_value(), 19)
+
+    def test_too_many_steps(self):
+        """Test undoing more than the history holds changes nothing."""
+        version = Room.objects.get(pk=self.room.pk).version
+
+        response = self.post("undo", steps=3)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.score_value(), 15)
+        self.assertEqual(Room.objects.get(pk=self.room.pk).version, version)
+        self.assertEqual(ScoreEvent.objects.filter(room=self.room).count(), 2)
+
+    def test_undo_after_unlogged_write(self):
+        """Test a score changed around the history is not reverted over."""
+        Score.objects.filter(pk=self.score_id).update(score_value=100)
+
+        response = self.post("undo")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.score_value(), 100)
+
+    def test_redo_after_unlogged_write(self):
+        """Test redo also refuses a score changed since the undo."""
+        self.post("undo")
+        Score.objects.filter(pk=self.score_id).update(notes="edited")
+
+        response = self.post("redo")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.score_value(), 10)
+
+    def test_undo_after_player_left(self):
+        """Test undoing a deletion whose player is gone is refused."""
+        self.player.delete()
+
+        response = self.post("undo")
+
+        self.assertEqual(response.status_code, 409)
@@ -0,0 +1,144 @@
+"""
+Tests for score increments and their coalescing buffer.
+"""
+
+import threading
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.aggregates import verify_room
+from api.increments import IncrementBuffer
+from api.models import Room, Player, PlayerTotal, Score
+
+
+class ScoreIncrementTest(TestCase):
+    """Test the score increment endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Tally", game_type="tally")
+        self.player = Player.objects.create(name="Alice", room=self.room)
+        self.score = Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+        self.url = reverse("score-increment", args=[self.score.pk])
+
+    def test_increment(self):
+        """Test increments add their delta and keep the aggregates in step."""
+        response = self.client.post(self.url, {"delta": 5}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["score_value"], 15)
+        self.score.refresh_from_db()
+        self.assertEqual(self.score.score_value, 15)
+        self.assertEqual(PlayerTotal.objects.get(player=self.player).total, 15)
+        self.assertEqual(verify_room(self.room.pk), [])
+
+    def test_default_delta(self):
+        """Test a missing delta counts as +1."""
+        self.client.post(self.url, {}, format="json")
+        response = self.client.post(self.url, {"delta": -3}, format="json")
+
+        self.assertEqual(response.data["score_value"], 8)
+
+    def test_bumps_room_version(self):
+        """Test increments show up in delta sync."""
+        before = Room.objects.get(pk=self.room.pk).version
+        self.client.post(self.url, format="json")
+
+        changes = self.client.get(
+            reverse("room-changes", kwargs={"pk": self.room.pk}), {"since": before}
+        )
+        self.assertEqual(changes.data["version"], before + 1)
+        self.assertEqual([s["score_value"] for s in changes.data["scores"]], [11])
+
+    def test_invalid_delta(self):
+        """Test non-integer deltas are rejected."""
+        response = self.client.post(self.url, {"delta": "lots"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_out_of_range(self):
+        """Test deltas that would overflow the score are rejected."""
+        for delta in (2**63, 2**31 - 1):
+            response = self.client.post(self.url, {"delta": delta}, format="json")
+
+            self.assertEqual(response.status_code, 400)
+        self.score.refresh_from_db()
+        self.assertEqual(self.score.score_value, 10)
+
+    def test_unknown_score(self):
+        """Test incrementing a missing score returns 404."""
+        url = reverse("score-increment", args=["00000000-0000-0000-0000-000000000000"])
+
+        response = self.client.post(url, format="json")
+
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(SCORE_INCREMENT_WINDOW_MS=1)
+    def test_coalesced_increment_is_committed(self):
+        """Test a coalesced increment is written before the response."""
+        response = self.client.post(self.url, {"delta": 2}, format="json")
+
+        self.assertEqual(response.data["score_value"], 12)
+        self.score.refresh_from_db()
+        self.assertEqual(self.score.score_value, 12)
+
+
+class IncrementBufferTest(SimpleTestCase):
+    """Test merging concurrent increments into one batch."""
+
+    def run_concurrently(self, buffer, calls):
+        results = [None] * len(calls)
+        errors = [None] * len(calls)
+
+        def call(index, args):
+            try:
+                results[index] = buffer.add(*args, window=0.2)
+            except Exception as exc:
+                errors[index] = exc
+
+        threads = [
+            threading.Thread(target=call, args=(index, args))
+            for index, args in enumerate(calls)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_merges_deltas(self):
+        """Test one apply per room, with deltas summed per score."""
+        applied = []
+
+        def apply(room_id, deltas):
+            applied.append((room_id, deltas))
+            return {score_id: f"{score_id}{delta:+d}" for score_id, delta in deltas.items()}
+
+        buffer = IncrementBuffer(apply)
+        calls = [("room", "a", 1)] * 6 + [("room", "b", -2)] * 2 + [("other", "a", 1)]
+
+        results, errors = self.run_concurrently(buffer, calls)
+
+        self.assertEqual(errors, [None] * len(calls))
+        self.assertEqual(
+            sorted(applied), [("other", {"a": 1}), ("room", {"a": 6, "b": -4})]
+        )
+        self.assertEqual(results, ["a+6"] * 6 + ["b-4"] * 2 + ["a+1"])
+
+    def test_failed_batch(self):
+        """Test every caller in a failed batch gets the error."""
+
+        def apply(room_id, deltas):
+            raise RuntimeError("disk full")
+
+        buffer = IncrementBuffer(apply)
+
+        results, errors = self.run_concurrently(buffer, [("room", "a", 1)] * 3)
+
+        self.assertEqual([str(error) for error in errors], ["disk full"] * 3)
+        buffer.apply = lambda room_id, deltas: {"a": deltas["a"]}
+        self.assertEqual(buffer.add("room", "a", 1, window=0), 1)
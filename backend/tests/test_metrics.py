@@ -0,0 +1,113 @@
+"""
+Tests for request metrics.
+"""
+
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.serializers import BaseSerializer
+from api.metrics import Histogram, registry
+from api.models import Room
+
+# DRF's own property, captured before any middleware is loaded.
+BASE_SERIALIZER_DATA = BaseSerializer.__dict__["data"]
+
+
+def sample(text, name, **labels):
+    """Return the value of one series in Prometheus text output."""
+    le = labels.pop("le", None)
+    pairs = sorted(labels.items()) + ([("le", le)] if le else [])
+    label_text = ",".join(f'{key}="{value}"' for key, value in pairs)
+    match = re.search(rf"^{name}{{{re.escape(label_text)}}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+class RequestMetricsTest(TestCase):
+    """Test cases for the metrics middleware and endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        registry.clear()
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+
+    def metrics(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode()
+
+    def test_records_per_action(self):
+        """Test that requests are recorded under their viewset action."""
+        self.client.get(reverse("room-detail", args=[self.room.pk]))
+        self.client.post(
+            reverse("room-join", args=[self.room.pk]), {"name": "Alice"}, format="json"
+        )
+
+        text = self.metrics()
+
+        retrieve = {"action": "RoomViewSet.retrieve", "method": "GET"}
+        join = {"action": "RoomViewSet.join", "method": "POST"}
+        self.assertEqual(sample(text, "scorecard_request_duration_seconds_count", **retrieve), 1)
+        self.assertEqual(sample(text, "scorecard_request_duration_seconds_count", **join), 1)
+        self.assertEqual(sample(text, "scorecard_request_sql_queries_sum", **retrieve), 4)
+        self.assertGreater(
+            sample(text, "scorecard_request_serializer_duration_seconds_sum", **retrieve), 0
+        )
+        self.assertGreater(sample(text, "scorecard_response_size_bytes_sum", **retrieve), 0)
+        self.assertEqual(
+            sample(
+                text, "scorecard_request_sql_queries_bucket", le="+Inf", **retrieve
+            ),
+            1,
+        )
+
+    def test_times_list_serializers(self):
+        """Test many=True reads are timed, without patching DRF's serializers."""
+        self.client.get(reverse("room-list"))
+
+        text = self.metrics()
+
+        listing = {"action": "RoomViewSet.list", "method": "GET"}
+        self.assertGreater(
+            sample(text, "scorecard_request_serializer_duration_seconds_sum", **listing), 0
+        )
+        self.assertIs(BaseSerializer.__dict__["data"], BASE_SERIALIZER_DATA)
+
+    def test_metrics_endpoint_is_not_recorded(self):
+        """Test that scraping does not show up in the metrics."""
+        self.metrics()
+
+        self.assertNotIn("metrics", self.metrics())
+
+    @override_settings(REQUEST_SLOW_LOG_MS=0.001)
+    def test_slow_request_log(self):
+        """Test that slow requests are logged with their SQL."""
+        client = APIClient()
+
+        with self.assertLogs("api.middleware", "WARNING") as logs:
+            client.get(reverse("room-detail", args=[self.room.pk]))
+
+        self.assertIn("RoomViewSet.retrieve", logs.output[0])
+        self.assertIn('FROM "api_room"', logs.output[0])
+
+
+class HistogramTest(TestCase):
+    """Test cases for the histogram."""
+
+    def test_cumulative_buckets(self):
+        """Test that bucket counts are cumulative and +Inf counts everything."""
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 10):
+            histogram.observe(value)
+
+        buckets, total, count = histogram.snapshot()
+
+        self.assertEqual([count for _, count in buckets], [2, 3, 4])
+        self.assertEqual(total, 14)
+        self.assertEqual(count, 4)
@@ -3,8 +3,12 @@ Tests for the API models.
 """
 
 import pytest
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from api.codes import ALPHABET, FeistelPermutation, RoomCodeAllocator
 from api.models import Room, Player, Score
 
 
@@ -107,3 +111,49 @@ class ScoreModelTest(TestCase):
             Score.objects.create(
                 player=self.player, room=self.room, round_number=1, score_value=200
             )
+
+
+class RoomCodeAllocatorTest(TestCase):
+    """Test cases for the room code allocator."""
+
+    def test_permutation_is_bijective(self):
+        """Test that the keyed permutation maps a domain onto itself."""
+        permutation = FeistelPermutation(b"key", 1000)
+
+        self.assertEqual(sorted(permutation(n) for n in range(1000)), list(range(1000)))
+
+    def test_codes_are_unique_without_selects(self):
+        """Test that allocation only touches the database once per block."""
+        allocator = RoomCodeAllocator(block_size=50, key="test")
+
+        with CaptureQueriesContext(connection) as queries:
+            codes = [allocator.allocate() for _ in range(100)]
+
+        statements = [query["sql"] for query in queries.captured_queries]
+        self.assertEqual(sum(sql.startswith("UPDATE") for sql in statements), 2)
+        self.assertFalse(any('"api_room"' in sql for sql in statements))
+        self.assertEqual(len(set(codes)), 100)
+        self.assertTrue(all(len(code) == 8 for code in codes))
+        self.assertTrue(all(set(code) <= set(ALPHABET) for code in codes))
+
+    def test_allocators_share_the_sequence(self):
+        """Test that two allocators never hand out the same code."""
+        first = RoomCodeAllocator(block_size=3, key="test")
+        second = RoomCodeAllocator(block_size=3, key="test")
+
+        codes = [first.allocate() for _ in range(5)] + [
+            second.allocate() for _ in range(5)
+        ]
+
+        self.assertEqual(len(set(codes)), 10)
+
+    def test_save_retries_on_existing_code(self):
+        """Test that a clash with a pre-existing code allocates another one."""
+        taken = Room.objects.create(name="Legacy", game_type="tally").room_code
+
+        with mock.patch(
+            "api.codes.allocate_room_code", side_effect=[taken, "FRESH001"]
+        ):
+            room = Room.objects.create(name="New", game_type="tally")
+
+        self.assertEqual(room.room_code, "FRESH001")
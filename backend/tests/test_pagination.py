@@ -0,0 +1,105 @@
+"""
+Tests for keyset pagination.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import Room, Player, Score
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cases for cursor pagination of scores and players."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        created_at = timezone.now()
+        self.players = Player.objects.bulk_create(
+            Player(name=f"Player {n}", room=self.room, joined_at=created_at)
+            for n in range(5)
+        )
+        # Many ties on round_number and created_at, which the id breaks.
+        Score.objects.bulk_create(
+            Score(
+                player=self.players[n % 5],
+                room=self.room,
+                round_number=n // 5 + 1,
+                score_value=n,
+                created_at=created_at + timedelta(seconds=n // 10),
+            )
+            for n in range(47)
+        )
+        self.url = f"{reverse('score-list')}?room_id={self.room.pk}&pagination=cursor"
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            url = response.data["next"]
+        return pages
+
+    def expected_ids(self):
+        return [
+            str(pk)
+            for pk in Score.objects.filter(room=self.room)
+            .order_by("round_number", "created_at", "id")
+            .values_list("pk", flat=True)
+        ]
+
+    def test_walks_every_score_once(self):
+        """Test that following `next` returns every score exactly once, in order."""
+        pages = self.walk(self.url)
+
+        ids = [score["id"] for page in pages for score in page["results"]]
+        self.assertEqual([len(page["results"]) for page in pages], [20, 20, 7])
+        self.assertEqual(ids, self.expected_ids())
+        self.assertNotIn("count", pages[0])
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_previous_page(self):
+        """Test that `previous` returns to the page before."""
+        pages = self.walk(self.url)
+
+        response = self.client.get(pages[2]["previous"])
+
+        self.assertEqual(response.data["results"], pages[1]["results"])
+
+    def test_deep_pages_do_not_count(self):
+        """Test that a deep page costs one version lookup and one page query."""
+        pages = self.walk(self.url)
+        cache.clear()
+
+        with self.assertNumQueries(2):
+            self.client.get(pages[1]["next"])
+        self.assertIsNone(pages[-1]["next"])
+
+    def test_players(self):
+        """Test cursor pagination of players with tied join times."""
+        url = f"{reverse('player-list')}?pagination=cursor&page_size=2"
+
+        pages = self.walk(url)
+
+        names = [player["name"] for page in pages for player in page["results"]]
+        self.assertEqual(sorted(names), [f"Player {n}" for n in range(5)])
+        self.assertEqual(len(names), 5)
+
+    def test_invalid_cursor(self):
+        """Test that a corrupt cursor returns 404."""
+        response = self.client.get(f"{self.url}&cursor=not-a-cursor")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_default(self):
+        """Test that requests without a cursor keep page number pagination."""
+        response = self.client.get(f"{reverse('score-list')}?room_id={self.room.pk}")
+
+        self.assertEqual(response.data["count"], 47)
@@ -0,0 +1,115 @@
+"""
+Regression tests for the number of SQL queries per read endpoint.
+
+Every endpoint must run a constant number of queries however many players
+and scores the room holds. Counts are for a cold snapshot cache; a repeated
+request with a matching If-None-Match must not query at all.
+"""
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.aggregates import rebuild_room
+from api.models import Room, Player, Score
+
+ROOM_SIZES = [1, 10, 1000]
+
+
+class QueryCountTest(TestCase):
+    """Test cases asserting query counts with rooms of 1, 10 and 1,000 scores."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+
+    def make_room(self, score_count):
+        """Create a room with up to 10 players and `score_count` scores."""
+        room = Room.objects.create(name=f"Room {score_count}", game_type="tally")
+        players = Player.objects.bulk_create(
+            Player(name=f"Player {n}", room=room) for n in range(min(score_count, 10))
+        )
+        Score.objects.bulk_create(
+            Score(
+                player=players[n % len(players)],
+                room=room,
+                round_number=n // len(players) + 1,
+                score_value=n,
+            )
+            for n in range(score_count)
+        )
+        rebuild_room(room.pk)
+        return room
+
+    def assertQueriesPerSize(self, expected, url_for, revalidate=0):
+        for size in ROOM_SIZES:
+            with self.subTest(scores=size):
+                room = self.make_room(size)
+                url = url_for(room)
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                if response.has_header("ETag"):
+                    with self.assertNumQueries(revalidate):
+                        cached = self.client.get(
+                            url, HTTP_IF_NONE_MATCH=response["ETag"]
+                        )
+                    self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_room_retrieve(self):
+        """Test GET /api/rooms/{id}/."""
+        self.assertQueriesPerSize(
+            4, lambda room: reverse("room-detail", kwargs={"pk": room.pk})
+        )
+
+    def test_room_by_code(self):
+        """Test GET /api/rooms/by_code/."""
+        # The code, then the room's version, are read once and then cached.
+        self.assertQueriesPerSize(
+            5, lambda room: f"{reverse('room-by-code')}?code={room.room_code}"
+        )
+
+    def test_room_list(self):
+        """Test GET /api/rooms/ (rooms accumulate across sizes)."""
+        self.assertQueriesPerSize(4, lambda room: reverse("room-list"))
+
+    def test_room_grid(self):
+        """Test GET /api/rooms/{id}/grid/."""
+        self.assertQueriesPerSize(
+            4, lambda room: reverse("room-grid", kwargs={"pk": room.pk})
+        )
+
+    def test_room_timeline(self):
+        """Test GET /api/rooms/{id}/timeline/ (the version, then one window query)."""
+        self.assertQueriesPerSize(
+            2, lambda room: reverse("room-timeline", kwargs={"pk": room.pk})
+        )
+
+    def test_room_lobby(self):
+        """Test GET /api/rooms/lobby/ (one query, leaders read by subquery)."""
+        self.assertQueriesPerSize(1, lambda room: reverse("room-lobby"))
+
+    def test_room_changes(self):
+        """Test GET /api/rooms/{id}/changes/ (4 reads inside a savepoint)."""
+        self.assertQueriesPerSize(
+            6,
+            lambda room: f"{reverse('room-changes', kwargs={'pk': room.pk})}?since=0",
+        )
+
+    def test_score_list(self):
+        """Test GET /api/scores/?room_id=."""
+        self.assertQueriesPerSize(
+            3, lambda room: f"{reverse('score-list')}?room_id={room.pk}"
+        )
+
+    def test_room_summary(self):
+        """Test GET /api/scores/room_summary/."""
+        self.assertQueriesPerSize(
+            3, lambda room: f"{reverse('score-room-summary')}?room_id={room.pk}"
+        )
+
+    def test_player_list(self):
+        """Test GET /api/players/?room_id=."""
+        self.assertQueriesPerSize(
+            2, lambda room: f"{reverse('player-list')}?room_id={room.pk}"
+        )
@@ -0,0 +1,51 @@
+"""
+Tests for the explain_queries management command.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from api.management.commands.explain_queries import full_scans
+from api.models import Room
+
+
+class ExplainQueriesTest(TestCase):
+    """Test cases for checking endpoint query plans."""
+
+    def test_endpoints_use_indexes(self):
+        """Test that no endpoint query falls back to a full table scan."""
+        out = StringIO()
+
+        call_command("explain_queries", rooms=3, stdout=out, stderr=StringIO())
+
+        self.assertIn("All endpoint queries use an index", out.getvalue())
+
+    def test_seed_data_is_rolled_back(self):
+        """Test that the seeded rooms are not left behind."""
+        call_command("explain_queries", rooms=2, stdout=StringIO())
+
+        self.assertFalse(Room.objects.exists())
+
+    def test_full_scans(self):
+        """Test which plan steps count as full scans."""
+        tables = {"api_room", "api_score"}
+
+        self.assertEqual(full_scans(["SCAN api_score"], tables), ["SCAN api_score"])
+        self.assertEqual(
+            full_scans(["SEARCH api_score USING INDEX idx (room_id=?)"], tables), []
+        )
+        index_scan = "SCAN api_room USING INDEX api_room_created_idx"
+        self.assertEqual(full_scans([index_scan], tables), [index_scan])
+        self.assertEqual(full_scans([index_scan], tables, limited=True), [])
+        self.assertEqual(
+            full_scans(
+                [index_scan, "USE TEMP B-TREE FOR ORDER BY"], tables, limited=True
+            ),
+            [index_scan],
+        )
+        self.assertEqual(
+            full_scans(["SCAN api_room USING COVERING INDEX api_room_created_idx"], tables),
+            [],
+        )
+        self.assertEqual(full_scans(["SCAN subquery"], tables), [])
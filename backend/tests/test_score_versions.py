@@ -0,0 +1,123 @@
+"""
+Tests for optimistic concurrency control of score updates.
+"""
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.aggregates import verify_room
+from api.models import Room, Player, Score, VersionConflict
+
+
+class ScoreVersionTest(TestCase):
+    """Test conditional score updates."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="Alice", room=self.room)
+        self.score = Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+        self.url = reverse("score-detail", args=[self.score.pk])
+
+    def test_etag(self):
+        """Test reads expose the score version as an ETag."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["version"], 1)
+        self.assertEqual(response["ETag"], '"1"')
+
+    def test_update_with_if_match(self):
+        """Test an update at the current version succeeds and bumps it."""
+        response = self.client.patch(
+            self.url, {"score_value": 12}, format="json", HTTP_IF_MATCH='"1"'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["version"], 2)
+        self.assertEqual(response["ETag"], '"2"')
+
+    def test_stale_if_match(self):
+        """Test a stale If-Match gets 409 with the current score."""
+        self.client.patch(self.url, {"score_value": 12}, format="json")
+
+        response = self.client.patch(
+            self.url, {"score_value": 20}, format="json", HTTP_IF_MATCH='"1"'
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["current"]["score_value"], 12)
+        self.assertEqual(response.data["current"]["version"], 2)
+        self.assertEqual(response["ETag"], '"2"')
+        self.score.refresh_from_db()
+        self.assertEqual(self.score.score_value, 12)
+        self.assertEqual(verify_room(self.room.pk), [])
+
+    def test_stale_version_field(self):
+        """Test a stale version in the body is rejected the same way."""
+        self.client.patch(self.url, {"score_value": 12}, format="json")
+        room_version = Room.objects.get(pk=self.room.pk).version
+
+        response = self.client.put(
+            self.url, {"score_value": 20, "version": 1}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 409)
+        # The failed write left no trace in the room's change log either.
+        self.assertEqual(Room.objects.get(pk=self.room.pk).version, room_version)
+
+    def test_unconditional_update(self):
+        """Test updates without a version still overwrite."""
+        self.client.patch(self.url, {"score_value": 12}, format="json")
+
+        response = self.client.patch(self.url, {"score_value": 20}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["version"], 3)
+
+    def test_malformed_if_match(self):
+        """Test If-Match must name one strong score ETag."""
+        response = self.client.patch(
+            self.url, {"score_value": 12}, format="json", HTTP_IF_MATCH='W/"1"'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SCORE_UPDATES_REQUIRE_VERSION=True)
+    def test_version_required(self):
+        """Test unconditional updates can be refused."""
+        response = self.client.patch(self.url, {"score_value": 12}, format="json")
+
+        self.assertEqual(response.status_code, 428)
+
+    def test_stale_instance(self):
+        """Test the model refuses to save over a newer version."""
+        stale = Score.objects.get(pk=self.score.pk)
+        self.score.score_value = 11
+        self.score.save()
+
+        stale.score_value = 30
+        stale.expected_version = stale.version
+        with self.assertRaises(VersionConflict):
+            stale.save()
+        self.score.refresh_from_db()
+        self.assertEqual((self.score.score_value, self.score.version), (11, 2))
+
+    def test_other_writes_bump_version(self):
+        """Test increments and bulk updates also move the version on."""
+        self.client.post(reverse("score-increment", args=[self.score.pk]), format="json")
+        self.client.post(
+            reverse("score-bulk"),
+            {
+                "room": str(self.room.pk),
+                "scores": [
+                    {"player": str(self.player.pk), "round_number": 1, "score_value": 5}
+                ],
+            },
+            format="json",
+        )
+
+        self.score.refresh_from_db()
+        self.assertEqual((self.score.score_value, self.score.version), (5, 3))
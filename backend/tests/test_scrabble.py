@@ -0,0 +1,115 @@
+"""
+Tests for Scrabble word checks and the compiled lexicon.
+"""
+
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api import scrabble
+
+WORDS = ["cat", "cats", "car", "cars", "bat", "bats", "quiz", "zax", "at", "Tax"]
+
+
+class LexiconTest(SimpleTestCase):
+    """Test compiling and reading the DAWG."""
+
+    def setUp(self):
+        """Compile the word list into a temporary file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "words.dawg")
+        data, self.count = scrabble.compile_words(WORDS + ["don't", "café", ""])
+        scrabble.save(data, self.path)
+        self.lexicon = scrabble.Lexicon(self.path)
+        self.addCleanup(self.lexicon.close)
+
+    def test_membership(self):
+        """Test exactly the listed words are found."""
+        for word in WORDS:
+            self.assertIn(word.upper(), self.lexicon)
+        for word in ["", "C", "CA", "CATSS", "BAR", "TAXI", "QUIZZ", "cat", "DON'T"]:
+            self.assertNotIn(word, self.lexicon)
+        self.assertEqual(len(self.lexicon), len(WORDS))
+
+    def test_suffixes_are_shared(self):
+        """Test the automaton is smaller than a trie of the same words."""
+        trie_edges = len({word.upper()[:n] for word in WORDS for n in range(1, len(word) + 1)})
+
+        edges = (os.path.getsize(self.path) - scrabble.HEADER.size) // 4 - 1
+
+        self.assertLess(edges, trie_edges)
+
+    def test_check(self):
+        """Test words are normalized and scored by letter values."""
+        self.assertEqual(self.lexicon.check(" quiz "), ("QUIZ", True, 22))
+        self.assertEqual(self.lexicon.check("cab"), ("CAB", False, 7))
+        self.assertEqual(self.lexicon.check("x-ray"), (None, False, None))
+
+    def test_rejects_other_files(self):
+        """Test a file that is not a lexicon is refused."""
+        path = os.path.join(os.path.dirname(self.path), "other")
+        for content in [b"", b"not a lexicon at all"]:
+            with open(path, "wb") as f:
+                f.write(content)
+
+            with self.assertRaises(scrabble.LexiconUnavailable):
+                scrabble.Lexicon(path)
+
+
+class ScrabbleEndpointTest(TestCase):
+    """Test the word check endpoint."""
+
+    def setUp(self):
+        """Build a lexicon with the command."""
+        self.client = APIClient()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "words.dawg")
+        word_list = os.path.join(directory.name, "words.txt")
+        with open(word_list, "w") as f:
+            f.write("\n".join(WORDS))
+        call_command("build_scrabble_lexicon", word_list, "-o", self.path, stdout=StringIO())
+        self.settings = override_settings(SCRABBLE_LEXICON_PATH=self.path)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.addCleanup(scrabble.clear)
+
+    def check(self, words):
+        return self.client.post(reverse("scrabble-words"), {"words": words}, format="json")
+
+    def test_check_and_score_words(self):
+        """Test each word is checked and scored, and valid ones are totalled."""
+        response = self.check(["Cats", "zax", "cab", "x-ray"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["words"],
+            [
+                {"word": "CATS", "valid": True, "score": 6},
+                {"word": "ZAX", "valid": True, "score": 19},
+                {"word": "CAB", "valid": False, "score": 7},
+                {"word": "x-ray", "valid": False, "score": None},
+            ],
+        )
+        self.assertEqual(response.data["total"], 25)
+
+    @override_settings(SCRABBLE_MAX_WORDS=2)
+    def test_rejects_bad_requests(self):
+        """Test empty and oversized batches are rejected."""
+        self.assertEqual(self.check([]).status_code, 400)
+        self.assertEqual(self.check(["at", "cat", "bat"]).status_code, 400)
+
+    def test_missing_lexicon(self):
+        """Test checks are unavailable until the lexicon is built."""
+        with override_settings(SCRABBLE_LEXICON_PATH="/nonexistent/words.dawg"):
+            self.assertEqual(self.check(["cat"]).status_code, 503)
+
+    def test_empty_word_list(self):
+        """Test the command refuses a word list with no usable words."""
+        with self.assertRaises(CommandError):
+            call_command("build_scrabble_lexicon", os.devnull, "-o", self.path)
@@ -0,0 +1,316 @@
+"""
+Tests for room sharding.
+
+The routing tests need shard databases, which only exist when the settings
+are loaded with ROOM_SHARDS set:
+
+    ROOM_SHARDS=2 python manage.py test tests.test_sharding
+"""
+
+import unittest
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api import sharding
+from api.models import Player, Room, RoomDirectory, Score, ScoreEvent
+
+
+class ShardPlacementTest(SimpleTestCase):
+    """Test room placement and the router's migration rules."""
+
+    def test_jump_hash_moves_few_keys(self):
+        """Test growing the shard count moves about 1/n of the keys."""
+        keys = range(0, 2**64, 2**64 // 10000)
+        before = [sharding.jump_hash(key, 4) for key in keys]
+        after = [sharding.jump_hash(key, 5) for key in keys]
+
+        self.assertEqual(set(before), {0, 1, 2, 3})
+        moved = [new for old, new in zip(before, after) if old != new]
+        self.assertEqual(set(moved), {4})
+        self.assertAlmostEqual(len(moved) / len(keys), 1 / 5, delta=0.02)
+        self.assertLess(max(Counter(after).values()), len(keys) / 5 * 1.1)
+
+    def test_shard_for_is_stable(self):
+        """Test a room always hashes to the same shard."""
+        room_id = "3f1a9b52-6c9d-4d7e-9a51-0c3b2d4e5f60"
+
+        self.assertEqual(
+            sharding.shard_for(room_id, 8), sharding.shard_for(room_id.upper(), 8)
+        )
+        self.assertIn(sharding.shard_for(room_id, 8), range(8))
+
+    @override_settings(ROOM_SHARDS=0)
+    def test_disabled(self):
+        """Test everything stays on the default database without shards."""
+        self.assertEqual(sharding.room_db("3f1a9b52-6c9d-4d7e-9a51-0c3b2d4e5f60"), "default")
+
+    def test_allow_migrate(self):
+        """Test room tables go to the shards and everything else to default."""
+        router = sharding.RoomShardRouter()
+
+        self.assertTrue(router.allow_migrate("shard_1", "api", "score"))
+        self.assertFalse(router.allow_migrate("default", "api", "score"))
+        self.assertTrue(router.allow_migrate("default", "api", "roomdirectory"))
+        self.assertFalse(router.allow_migrate("shard_1", "api", "roomcodesequence"))
+        self.assertFalse(router.allow_migrate("shard_1", "auth", "user"))
+        self.assertTrue(router.allow_migrate("default", "auth", "user"))
+
+
+@unittest.skipUnless(settings.ROOM_SHARDS >= 2, "needs ROOM_SHARDS >= 2")
+class ShardedRoomTest(TestCase):
+    """Test the API with rooms spread over several shards."""
+
+    databases = "__all__"
+
+    def setUp(self):
+        """Create rooms until every shard holds some."""
+        self.client = APIClient()
+        self.rooms = []
+        while len({room["shard"] for room in self.rooms}) < settings.ROOM_SHARDS:
+            response = self.client.post(
+                reverse("room-list"),
+                {"name": f"Room {len(self.rooms)}", "game_type": "tally"},
+                format="json",
+            )
+            room = response.data
+            room["shard"] = sharding.shard_for(room["id"])
+            self.rooms.append(room)
+
+    def room_on(self, shard):
+        return next(room for room in self.rooms if room["shard"] == shard)
+
+    def test_rooms_placed_by_hash(self):
+        """Test each room and its aggregate live only on their hashed shard."""
+        for room in self.rooms:
+            alias = sharding.shard_alias(room["shard"])
+            for other in sharding.shard_aliases():
+                self.assertEqual(
+                    Room.objects.using(other).filter(pk=room["id"]).exists(),
+                    other == alias,
+                )
+            directory = RoomDirectory.objects.get(room_id=room["id"])
+            self.assertEqual(directory.shard, room["shard"])
+            self.assertEqual(directory.room_code, room["room_code"])
+
+    def test_list_merges_shards(self):
+        """Test the room list pages through every shard, newest first."""
+        response = self.client.get(reverse("room-list"), {"page_size": 2})
+
+        self.assertEqual(response.data["count"], len(self.rooms))
+        names = [room["name"] for room in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            names += [room["name"] for room in response.data["results"]]
+        self.assertEqual(names, [room["name"] for room in reversed(self.rooms)])
+
+    def test_members_found_on_their_shard(self):
+        """Test a player is located by its id without asking the other shards."""
+        room = self.room_on(settings.ROOM_SHARDS - 1)
+        join = self.client.post(
+            reverse("room-join", kwargs={"pk": room["id"]}), {"name": "Alice"}, format="json"
+        )
+        with ExitStack() as stack:
+            others = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in sharding.shard_aliases()[:-1]
+            ]
+            room_id = sharding.locate(Player, join.data["id"])
+
+        self.assertEqual(str(room_id), room["id"])
+        self.assertEqual(sum(len(context) for context in others), 0)
+
+        # Rows without a shard in their id are still found.
+        player = Player.objects.using(sharding.shard_alias(room["shard"])).create(
+            id=uuid.uuid4(), name="Bob", room_id=room["id"]
+        )
+        self.assertEqual(str(sharding.locate(Player, player.pk)), room["id"])
+
+    def test_lobby_merges_shards(self):
+        """Test the lobby pages through every shard, most recently active first."""
+        first = self.rooms[0]
+        join = self.client.post(
+            reverse("room-join", kwargs={"pk": first["id"]}), {"name": "Alice"}, format="json"
+        )
+        score = self.client.post(
+            reverse("score-list"),
+            {
+                "player": join.data["id"],
+                "room": first["id"],
+                "round_number": 1,
+                "score_value": 7,
+                "category": None,
+            },
+            format="json",
+        )
+        self.assertEqual(score.status_code, 201)
+
+        response = self.client.get(reverse("room-lobby"), {"page_size": 2})
+        results = response.data["results"]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            results += response.data["results"]
+
+        self.assertEqual(
+            [room["name"] for room in results],
+            [first["name"]] + [room["name"] for room in reversed(self.rooms[1:])],
+        )
+        self.assertEqual(
+            (results[0]["player_count"], results[0]["leader"], results[0]["leader_total"]),
+            (1, "Alice", 7),
+        )
+
+    def test_play_in_a_room(self):
+        """Test joining, scoring and reading a room on the last shard."""
+        room = self.room_on(settings.ROOM_SHARDS - 1)
+        join = self.client.post(
+            reverse("room-join", kwargs={"pk": room["id"]}),
+            {"name": "Alice"},
+            format="json",
+        )
+        self.assertEqual(join.status_code, 201)
+        score = self.client.post(
+            reverse("score-list"),
+            {
+                "player": join.data["id"],
+                "room": room["id"],
+                "round_number": 1,
+                "score_value": 12,
+                "category": None,
+            },
+            format="json",
+        )
+        self.assertEqual(score.status_code, 201)
+
+        detail = self.client.get(
+            reverse("room-by-code"), {"code": room["room_code"]}
+        )
+        self.assertEqual(detail.data["version"], 2)
+        self.assertEqual([s["score_value"] for s in detail.data["scores"]], [12])
+        summary = self.client.get(
+            reverse("score-room-summary"), {"room_id": room["id"]}
+        )
+        self.assertEqual(summary.data["player_totals"], {"Alice": 12})
+        timeline = self.client.get(reverse("room-timeline", args=[room["id"]]))
+        self.assertEqual(timeline.data["players"][0]["totals"], [12])
+        update = self.client.patch(
+            reverse("score-detail", args=[score.data["id"]]),
+            {"score_value": 15},
+            format="json",
+        )
+        self.assertEqual(update.status_code, 200)
+        self.assertEqual(
+            Score.objects.using(sharding.shard_alias(room["shard"]))
+            .get(pk=score.data["id"])
+            .score_value,
+            15,
+        )
+
+    def test_room_required(self):
+        """Test listing players or scores needs a room when sharded."""
+        response = self.client.get(reverse("player-list"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("room_id", response.data)
+
+    def test_unknown_code(self):
+        """Test codes missing from the directory are not found."""
+        response = self.client.get(reverse("room-by-code"), {"code": "ZZZZZZZZ"})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_code(self):
+        """Test a lookup without a code is a bad request, as without sharding."""
+        response = self.client.get(reverse("room-by-code"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Room code is required"})
+
+    def test_delete_room(self):
+        """Test deleting a room removes it from the directory."""
+        room = self.rooms[0]
+        response = self.client.delete(reverse("room-detail", args=[room["id"]]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(RoomDirectory.objects.filter(room_id=room["id"]).exists())
+
+    def test_rebalance(self):
+        """Test rebalancing moves misplaced rooms back with all their rows."""
+        room = self.room_on(0)
+        self.client.post(
+            reverse("room-join", kwargs={"pk": room["id"]}),
+            {"name": "Alice"},
+            format="json",
+        )
+        sharding.move_room(room["id"], "shard_0", "shard_1")
+        self.assertEqual(sharding.room_db(room["id"]), "shard_1")
+        self.assertEqual(
+            self.client.get(reverse("room-detail", args=[room["id"]])).data["players"][0]["name"],
+            "Alice",
+        )
+
+        stdout = StringIO()
+        call_command("rebalance_shards", verbosity=0, stdout=stdout)
+
+        self.assertEqual(sharding.room_db(room["id"]), "shard_0")
+        self.assertFalse(Room.objects.using("shard_1").filter(pk=room["id"]).exists())
+        self.assertEqual(stdout.getvalue(), "")
+        moved = Room.objects.using("shard_0").get(pk=room["id"])
+        self.assertEqual([player.name for player in moved.players.all()], ["Alice"])
+        self.assertEqual(moved.aggregate.score_count, 0)
+
+    def test_history_moves_with_room(self):
+        """Test a room's score history is kept on its shard and when it moves."""
+        room = self.room_on(0)
+        join = self.client.post(
+            reverse("room-join", kwargs={"pk": room["id"]}),
+            {"name": "Alice"},
+            format="json",
+        )
+        self.client.post(
+            reverse("score-list"),
+            {
+                "player": join.data["id"],
+                "room": room["id"],
+                "round_number": 1,
+                "score_value": 12,
+                "category": None,
+            },
+            format="json",
+        )
+        sharding.move_room(room["id"], "shard_0", "shard_1")
+
+        undo = self.client.post(reverse("room-undo", kwargs={"pk": room["id"]}))
+
+        self.assertEqual(undo.status_code, 200)
+        self.assertEqual(
+            ScoreEvent.objects.using("shard_1").filter(room_id=room["id"]).count(), 2
+        )
+        self.assertFalse(Score.objects.using("shard_1").filter(room_id=room["id"]).exists())
+
+    def test_export_and_import(self):
+        """Test an export of every shard imports back to the rooms' shards."""
+        response = self.client.get(reverse("export"))
+        body = b"".join(response.streaming_content)
+        for room in self.rooms:
+            self.client.delete(reverse("room-detail", args=[room["id"]]))
+
+        response = self.client.generic(
+            "POST", reverse("import"), body, "application/x-ndjson"
+        )
+
+        self.assertEqual(response.json()["room"], len(self.rooms))
+        for room in self.rooms:
+            self.assertEqual(sharding.room_db(room["id"]), sharding.shard_alias(room["shard"]))
+            self.assertEqual(
+                self.client.get(reverse("room-by-code"), {"code": room["room_code"]}).data["id"],
+                room["id"],
+            )
@@ -0,0 +1,217 @@
+"""
+Tests for sparse fieldsets and response compression.
+"""
+
+import gzip
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Room, Player, Score
+
+
+class SparseFieldsetTest(TestCase):
+    """Test ?fields= and ?omit= on the room, player and score endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Lobby room", game_type="tally")
+        self.alice = Player.objects.create(name="Alice", room=self.room)
+        Player.objects.create(name="Bob", room=self.room, is_active=False)
+        for round_number in range(1, 4):
+            Score.objects.create(
+                player=self.alice,
+                room=self.room,
+                round_number=round_number,
+                score_value=round_number * 5,
+            )
+
+    def test_room_list_fields(self):
+        """Test the lobby can fetch only room names and player counts."""
+        response = self.client.get(
+            reverse("room-list"), {"fields": "name,player_count"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["results"], [{"name": "Lobby room", "player_count": 1}]
+        )
+
+    def test_room_detail_omit(self):
+        """Test omitting the nested scores from a room."""
+        response = self.client.get(
+            reverse("room-detail", args=[self.room.pk]), {"omit": "scores,players"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("scores", response.data)
+        self.assertNotIn("players", response.data)
+        self.assertEqual(response.data["player_count"], 1)
+        self.assertEqual(response.data["room_code"], self.room.room_code)
+
+    def test_room_by_code_fields(self):
+        """Test fields apply to the by-code lookup."""
+        response = self.client.get(
+            reverse("room-by-code"), {"code": self.room.room_code, "fields": "id,name"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data, {"id": str(self.room.pk), "name": "Lobby room"}
+        )
+
+    def test_omit_scores_skips_prefetch(self):
+        """Test omitted nested fields are not loaded at all."""
+        url = reverse("room-list")
+        with CaptureQueriesContext(connection) as full:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as narrow:
+            self.client.get(url, {"omit": "scores,players,player_count"})
+
+        self.assertEqual(len(narrow), len(full) - 2)
+        sql = narrow.captured_queries[-1]["sql"]
+        self.assertNotIn("api_score", sql)
+        self.assertNotIn("api_player", sql)
+
+    def test_only_selected_columns_loaded(self):
+        """Test the queryset is narrowed to the selected columns."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("score-list"),
+                {"room_id": str(self.room.pk), "fields": "id,score_value,player_name"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        first = response.data["results"][0]
+        self.assertEqual(
+            first, {"id": first["id"], "score_value": 5, "player_name": "Alice"}
+        )
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertNotIn('"notes"', sql)
+        self.assertIn('"api_player"."name"', sql)
+
+    def test_player_fields(self):
+        """Test fields on the player list."""
+        response = self.client.get(
+            reverse("player-list"), {"room_id": str(self.room.pk), "fields": "name"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["results"], [{"name": "Alice"}, {"name": "Bob"}]
+        )
+
+    def test_fields_with_cursor_pagination(self):
+        """Test a narrowed queryset still pages by its keyset."""
+        response = self.client.get(
+            reverse("score-list"),
+            {
+                "room_id": str(self.room.pk),
+                "fields": "score_value",
+                "pagination": "cursor",
+                "page_size": 2,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["results"], [{"score_value": 5}, {"score_value": 10}]
+        )
+        next_page = self.client.get(response.data["next"])
+        self.assertEqual(next_page.data["results"], [{"score_value": 15}])
+
+    @override_settings(FAST_SERIALIZATION=True)
+    def test_fields_with_fast_serialization(self):
+        """Test sparse fieldsets take precedence over the fast path."""
+        response = self.client.get(
+            reverse("room-detail", args=[self.room.pk]), {"fields": "name"}
+        )
+
+        self.assertEqual(json.loads(response.content), {"name": "Lobby room"})
+
+    def test_unknown_field(self):
+        """Test unknown field names are rejected."""
+        response = self.client.get(reverse("room-list"), {"fields": "name,secret"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["fields"], ["Unknown field: secret"])
+
+    def test_writes_ignore_fields(self):
+        """Test fields do not restrict what a write returns."""
+        response = self.client.patch(
+            f"{reverse('room-detail', args=[self.room.pk])}?fields=name",
+            {"name": "Renamed"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("scores", response.data)
+
+
+class CompressionTest(TestCase):
+    """Test negotiated compression of large responses."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Big room", game_type="tally")
+        player = Player.objects.create(name="Alice", room=self.room)
+        Score.objects.bulk_create(
+            Score(player=player, room=self.room, round_number=n, score_value=n)
+            for n in range(1, 60)
+        )
+        self.url = reverse("room-detail", args=[self.room.pk])
+
+    def test_gzip(self):
+        """Test large responses are gzipped for clients that accept it."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        body = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(body["scores"]), 59)
+
+    def test_not_accepted(self):
+        """Test responses are sent as-is without Accept-Encoding."""
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_small_responses_uncompressed(self):
+        """Test responses under COMPRESSION_MIN_SIZE are sent as-is."""
+        response = self.client.get(
+            self.url, {"fields": "name"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_weak_etag_revalidates(self):
+        """Test the weakened ETag of a compressed response still gets 304."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_event_stream_uncompressed(self):
+        """Test server-sent events are never compressed."""
+        response = self.client.get(
+            reverse("room-events", kwargs={"pk": self.room.pk}),
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.addCleanup(response.close)
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertTrue(next(iter(response.streaming_content)).startswith(b"retry:"))
@@ -0,0 +1,109 @@
+"""
+Tests for the Yahtzee strategy table and move hints.
+"""
+
+import os
+import tempfile
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api import strategy
+from api.grid import YAHTZEE_CATEGORIES
+from api.models import Room, Player, Score
+
+
+class StrategyHintTest(TestCase):
+    """Test hints from an endgame table."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Build a table covering cards with up to two open boxes."""
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "strategy.npy")
+        call_command(
+            "build_yahtzee_strategy", "--max-open", "2", "-o", cls.path, stdout=StringIO()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        strategy.clear()
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        """Set up a player with every box but chance and Yahtzee filled."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Yahtzee Night", game_type="yahtzee")
+        self.player = Player.objects.create(name="Alice", room=self.room)
+        for n, category in enumerate(YAHTZEE_CATEGORIES[:11], 1):
+            Score.objects.create(
+                player=self.player, room=self.room, round_number=n,
+                category=category, score_value=0,
+            )
+        self.settings = override_settings(YAHTZEE_STRATEGY_PATH=self.path)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def hint(self, **params):
+        return self.client.get(
+            reverse("player-hint", kwargs={"pk": self.player.pk}), params
+        )
+
+    def test_table_is_memory_mapped(self):
+        """Test the table is opened as a memory map and covers the endgame only."""
+        table = strategy.load(self.path)
+
+        self.assertIsInstance(table, np.memmap)
+        self.assertEqual(table.shape, strategy.SHAPE)
+        self.assertEqual(table[strategy.FULL, 63, 0], 35)
+        self.assertTrue(np.isnan(table[0, 0, 0]))
+
+    def test_keeps_dice_for_yahtzee(self):
+        """Test four of a kind is kept when chasing the Yahtzee."""
+        response = self.hint(dice="3,3,3,3,1", rolls_left=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["action"], "reroll")
+        self.assertEqual(response.data["keep"], [3, 3, 3, 3])
+
+    def test_scores_a_yahtzee(self):
+        """Test a rolled Yahtzee is scored at once."""
+        response = self.hint(dice="5,5,5,5,5", rolls_left=2)
+
+        self.assertEqual(response.data["action"], "score")
+        self.assertEqual(response.data["category"], "yahtzee")
+        self.assertGreater(response.data["expected_value"], 50)
+
+    def test_last_roll(self):
+        """Test the final roll goes in the box worth more, chance here."""
+        response = self.hint(dice="6,6,5,5,4", rolls_left=0)
+
+        self.assertEqual(response.data["category"], "chance")
+        self.assertEqual(response.data["keep"], [4, 5, 5, 6, 6])
+
+    def test_card_outside_the_table(self):
+        """Test cards the table does not cover are answered with 503."""
+        Score.objects.filter(player=self.player, category="ones").delete()
+        Score.objects.filter(player=self.player, category="twos").delete()
+
+        self.assertEqual(self.hint(dice="1,2,3,4,5").status_code, 503)
+
+    def test_rejects_bad_requests(self):
+        """Test malformed dice and non-Yahtzee rooms are rejected."""
+        self.assertEqual(self.hint(dice="1,2,3").status_code, 400)
+        self.assertEqual(self.hint(dice="1,2,3,4,5", rolls_left=3).status_code, 400)
+
+        tally = Room.objects.create(name="Tally", game_type="tally")
+        self.player.room = tally
+        self.player.save()
+        self.assertEqual(self.hint(dice="1,2,3,4,5").status_code, 400)
+
+    @override_settings(YAHTZEE_STRATEGY_PATH="/nonexistent/strategy.npy")
+    def test_missing_table(self):
+        """Test hints are unavailable until the table is built."""
+        self.assertEqual(self.hint(dice="1,2,3,4,5").status_code, 503)
@@ -2,8 +2,11 @@
 Tests for the API views.
 """
 
+from datetime import timedelta
+
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 from api.models import Room, Player, Score
@@ -120,3 +123,492 @@ class ScoreViewSetTest(TestCase):
         self.assertEqual(response.data["room_name"], "Test Room")
         self.assertEqual(response.data["player_totals"]["John Doe"], 250)
         self.assertEqual(response.data["total_rounds"], 2)
+
+    def test_list_scores_of_unknown_room(self):
+        """Test an unknown room lists no scores, and a malformed id is rejected."""
+        url = reverse("score-list")
+
+        response = self.client.get(url, {"room_id": str(self.player.pk)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get(url, {"room_id": "not-a-room"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RoomChangesTest(TestCase):
+    """Test cases for the room delta sync endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="John Doe", room=self.room)
+        self.url = reverse("room-changes", kwargs={"pk": self.room.pk})
+
+    def test_writes_bump_room_version(self):
+        """Test that player and score writes bump the room version."""
+        score = Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.version, 2)
+        self.assertEqual(score.room_version, 2)
+
+        score.score_value = 20
+        score.save()
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.version, 3)
+
+    def test_changes_since_version(self):
+        """Test that only rows changed after `since` are returned."""
+        Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+        self.room.refresh_from_db()
+        since = self.room.version
+        newer = Score.objects.create(
+            player=self.player, room=self.room, round_number=2, score_value=5
+        )
+
+        response = self.client.get(f"{self.url}?since={since}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["version"], since + 1)
+        self.assertEqual(response.data["players"], [])
+        self.assertEqual([s["id"] for s in response.data["scores"]], [str(newer.pk)])
+
+    def test_changes_report_deletions(self):
+        """Test that deleted players and their scores come back as tombstones."""
+        score = Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+        self.room.refresh_from_db()
+        since = self.room.version
+        player_id, score_id = self.player.pk, score.pk
+
+        self.player.delete()
+        response = self.client.get(f"{self.url}?since={since}")
+
+        self.assertEqual(response.data["deleted"]["players"], [player_id])
+        self.assertEqual(response.data["deleted"]["scores"], [score_id])
+        self.assertEqual(response.data["scores"], [])
+
+    def test_changes_requires_since(self):
+        """Test that a missing or malformed `since` is rejected."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(f"{self.url}?since=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_room_delete_leaves_no_tombstones(self):
+        """Test that deleting a room cascades without recording tombstones."""
+        Score.objects.create(
+            player=self.player, room=self.room, round_number=1, score_value=10
+        )
+
+        self.room.delete()
+
+        self.assertFalse(Room.objects.exists())
+        self.assertFalse(Score.objects.exists())
+
+
+class BulkScoreTest(TestCase):
+    """Test cases for the bulk score endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="scrabble")
+        self.players = [
+            Player.objects.create(name=f"Player {n}", room=self.room) for n in range(3)
+        ]
+        self.url = reverse("score-bulk")
+
+    def submit(self, round_number, values, **extra):
+        scores = [
+            {"player": player.pk, "round_number": round_number, "score_value": value}
+            for player, value in zip(self.players, values)
+        ]
+        return self.client.post(
+            self.url, {"room": self.room.pk, "scores": scores, **extra}, format="json"
+        )
+
+    def test_bulk_create(self):
+        """Test submitting a whole round at once."""
+        response = self.submit(1, [10, 20, 30])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(Score.objects.filter(room=self.room).count(), 3)
+        self.assertEqual(response.data["scores"][1]["player_name"], "Player 1")
+
+    def test_bulk_upsert(self):
+        """Test that resubmitting a round updates the existing scores."""
+        self.submit(1, [10, 20, 30])
+        original = Score.objects.get(player=self.players[0])
+
+        response = self.submit(1, [11, 20, 30])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(Score.objects.filter(room=self.room).count(), 3)
+        updated = Score.objects.get(player=self.players[0])
+        self.assertEqual(updated.pk, original.pk)
+        self.assertEqual(updated.score_value, 11)
+
+        summary = self.client.get(
+            f"{reverse('score-room-summary')}?room_id={self.room.pk}"
+        )
+        self.assertEqual(summary.data["player_totals"]["Player 0"], 11)
+        self.assertEqual(summary.data["total_rounds"], 1)
+
+    def test_bulk_rejects_foreign_player(self):
+        """Test that players from another room are rejected."""
+        other_room = Room.objects.create(name="Other", game_type="scrabble")
+        self.players[2] = Player.objects.create(name="Stranger", room=other_room)
+
+        response = self.submit(1, [10, 20, 30])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("player", response.data["scores"][2])
+        self.assertFalse(Score.objects.exists())
+
+    def test_bulk_rejects_duplicates(self):
+        """Test that the same player and round twice in one request is rejected."""
+        self.players[1] = self.players[0]
+
+        response = self.submit(1, [10, 20, 30])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the batch size."""
+        self.players = [
+            Player.objects.create(name=f"Extra {n}", room=self.room) for n in range(12)
+        ]
+        # Includes the two queries that append the writes to the room's history.
+        with self.assertNumQueries(12):
+            self.submit(1, [1, 2])
+        with self.assertNumQueries(12):
+            self.submit(2, list(range(12)))
+
+
+class RoomSnapshotTest(TestCase):
+    """Test cases for ETags and versioned room snapshots."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Test Room", game_type="tally")
+        self.player = Player.objects.create(name="John Doe", room=self.room)
+        self.url = reverse("room-detail", kwargs={"pk": self.room.pk})
+
+    def test_not_modified(self):
+        """Test that a matching If-None-Match gets 304 with the same ETag."""
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_write_invalidates_snapshot(self):
+        """Test that a score write changes the ETag and the served data."""
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.create(
+                player=self.player, room=self.room, round_number=1, score_value=9
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["scores"]), 1)
+
+    def test_room_update_invalidates_snapshot(self):
+        """Test that renaming the room is visible on the next read."""
+        self.client.get(self.url)
+
+        self.client.patch(self.url, {"name": "Renamed"}, format="json")
+
+        self.assertEqual(self.client.get(self.url).data["name"], "Renamed")
+
+    def test_query_string_varies_etag(self):
+        """Test that different representations get different ETags."""
+        url = reverse("score-list")
+        first = self.client.get(f"{url}?room_id={self.room.pk}")
+        second = self.client.get(f"{url}?room_id={self.room.pk}&page=1")
+
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_deleted_room(self):
+        """Test that a deleted room is no longer served from the cache."""
+        self.client.get(self.url)
+
+        self.client.delete(self.url)
+
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+
+class RoomGridTest(TestCase):
+    """Test cases for the compact grid representation of a room."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Dice", game_type="yahtzee")
+        self.alice = Player.objects.create(name="Alice", room=self.room)
+        self.bob = Player.objects.create(name="Bob", room=self.room)
+        for category, value in [
+            ("ones", 3), ("twos", 6), ("threes", 9), ("fours", 12),
+            ("fives", 15), ("sixes", 18), ("chance", 22),
+        ]:
+            Score.objects.create(
+                player=self.alice,
+                room=self.room,
+                category=category,
+                score_value=value,
+            )
+        Score.objects.create(
+            player=self.bob, room=self.room, category="yahtzee", score_value=50
+        )
+
+    def test_yahtzee_grid(self):
+        """Test the grid cells, section totals and upper bonus."""
+        url = reverse("room-grid", args=[self.room.pk])
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        grid = response.data
+        self.assertEqual(grid["players"]["name"], ["Alice", "Bob"])
+        self.assertEqual(grid["axis"], "category")
+        self.assertEqual(len(grid["columns"]), 13)
+        cells = list(
+            zip(grid["cells"]["player"], grid["cells"]["column"], grid["cells"]["value"])
+        )
+        self.assertIn((1, grid["columns"].index("yahtzee"), 50), cells)
+        self.assertEqual(len(cells), 8)
+        self.assertEqual(grid["upper_total"], [63, 0])
+        self.assertEqual(grid["upper_bonus"], [35, 0])
+        self.assertEqual(grid["lower_total"], [22, 50])
+        self.assertEqual(grid["totals"], [120, 50])
+
+    def test_round_grid(self):
+        """Test that other games use rounds as columns."""
+        room = Room.objects.create(name="Tally", game_type="tally")
+        player = Player.objects.create(name="Carol", room=room)
+        for round_number in (1, 3):
+            Score.objects.create(
+                player=player, room=room, round_number=round_number, score_value=4
+            )
+
+        response = self.client.get(reverse("room-grid", args=[room.pk]))
+
+        self.assertEqual(response.data["axis"], "round")
+        self.assertEqual(response.data["columns"], [1, 3])
+        self.assertEqual(response.data["cells"]["column"], [0, 1])
+        self.assertEqual(response.data["totals"], [8])
+        self.assertNotIn("upper_bonus", response.data)
+
+    def test_grid_is_smaller(self):
+        """Test that the grid is several times smaller than the room detail."""
+        grid = self.client.get(reverse("room-grid", args=[self.room.pk]))
+        detail = self.client.get(reverse("room-detail", args=[self.room.pk]))
+
+        self.assertLess(len(grid.content) * 3, len(detail.content))
+
+    def test_grid_etag(self):
+        """Test that an unchanged grid revalidates with 304."""
+        url = reverse("room-grid", args=[self.room.pk])
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_room(self):
+        """Test that a missing room returns 404."""
+        response = self.client.get(reverse("room-grid", args=[self.alice.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RoomTimelineTest(TestCase):
+    """Test cases for per-round running totals and ranks."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.room = Room.objects.create(name="Tally", game_type="tally")
+        self.alice = Player.objects.create(name="Alice", room=self.room)
+        self.bob = Player.objects.create(name="Bob", room=self.room)
+        self.carol = Player.objects.create(name="Carol", room=self.room)
+        for player, round_number, value in [
+            (self.alice, 1, 5), (self.bob, 1, 3), (self.carol, 1, 5),
+            (self.alice, 2, 1), (self.bob, 2, 10),
+            (self.alice, 4, 2), (self.bob, 4, -4), (self.carol, 4, 4),
+        ]:
+            Score.objects.create(
+                player=player, room=self.room, round_number=round_number,
+                score_value=value,
+            )
+        self.url = reverse("room-timeline", args=[self.room.pk])
+
+    def test_timeline(self):
+        """Test running totals, with missed rounds as 0 and ties sharing a rank."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rounds"], [1, 2, 4])
+        players = {player["name"]: player for player in response.data["players"]}
+        self.assertEqual(list(players), ["Alice", "Bob", "Carol"])
+        self.assertEqual(players["Alice"]["id"], str(self.alice.pk))
+        self.assertEqual(players["Carol"]["points"], [5, 0, 4])
+        self.assertEqual(players["Alice"]["totals"], [5, 6, 8])
+        self.assertEqual(players["Bob"]["totals"], [3, 13, 9])
+        self.assertEqual(players["Carol"]["totals"], [5, 5, 9])
+        self.assertEqual(players["Alice"]["ranks"], [1, 2, 3])
+        self.assertEqual(players["Bob"]["ranks"], [3, 1, 1])
+        self.assertEqual(players["Carol"]["ranks"], [1, 3, 1])
+
+    def test_timeline_follows_writes(self):
+        """Test the cached timeline is replaced when a score changes."""
+        etag = self.client.get(self.url)["ETag"]
+
+        Score.objects.create(
+            player=self.carol, room=self.room, round_number=5, score_value=1
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rounds"], [1, 2, 4, 5])
+
+    def test_room_without_scores(self):
+        """Test players are listed with empty timelines before any score."""
+        room = Room.objects.create(name="New", game_type="tally")
+        Player.objects.create(name="Dave", room=room)
+
+        response = self.client.get(reverse("room-timeline", args=[room.pk]))
+
+        self.assertEqual(response.data["rounds"], [])
+        self.assertEqual(response.data["players"][0]["totals"], [])
+
+    def test_missing_room(self):
+        """Test that a missing room returns 404."""
+        response = self.client.get(reverse("room-timeline", args=[self.alice.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LobbyTest(TestCase):
+    """Test cases for the lobby listing of active rooms."""
+
+    def setUp(self):
+        """Set up rooms last active an hour, two hours and three hours ago."""
+        self.client = APIClient()
+        self.url = reverse("room-lobby")
+        now = timezone.now()
+        self.rooms = {}
+        for hours, name, game_type in [
+            (1, "Friday Tally", "tally"),
+            (2, "Yahtzee Night", "yahtzee"),
+            (3, "friday scrabble", "scrabble"),
+        ]:
+            room = Room.objects.create(name=name, game_type=game_type)
+            Room.objects.filter(pk=room.pk).update(
+                last_activity=now - timedelta(hours=hours)
+            )
+            self.rooms[name] = room
+        Room.objects.create(name="Finished", game_type="tally", is_active=False)
+
+    def names(self, response):
+        return [room["name"] for room in response.data["results"]]
+
+    def test_lists_active_rooms_by_recent_activity(self):
+        """Test closed rooms are left out and a score write moves a room to the top."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.names(response), ["Friday Tally", "Yahtzee Night", "friday scrabble"]
+        )
+
+        room = self.rooms["friday scrabble"]
+        player = Player.objects.create(name="Alice", room=room)
+        Score.objects.create(player=player, room=room, round_number=1, score_value=4)
+
+        self.assertEqual(self.names(self.client.get(self.url))[0], "friday scrabble")
+
+    def test_player_count_and_leader(self):
+        """Test each room carries its player count and current leader."""
+        room = self.rooms["Friday Tally"]
+        alice = Player.objects.create(name="Alice", room=room)
+        bob = Player.objects.create(name="Bob", room=room)
+        Player.objects.create(name="Carol", room=room)
+        Score.objects.create(player=alice, room=room, round_number=1, score_value=3)
+        Score.objects.create(player=bob, room=room, round_number=1, score_value=8)
+        Player.objects.create(name="Dave", room=self.rooms["Yahtzee Night"]).delete()
+
+        results = {
+            result["name"]: result
+            for result in self.client.get(self.url).data["results"]
+        }
+
+        tally = results["Friday Tally"]
+        self.assertEqual(tally["id"], str(room.pk))
+        self.assertEqual(tally["room_code"], room.room_code)
+        self.assertEqual(tally["player_count"], 3)
+        self.assertEqual((tally["leader"], tally["leader_total"]), ("Bob", 8))
+        empty = results["Yahtzee Night"]
+        self.assertEqual(empty["player_count"], 0)
+        self.assertEqual((empty["leader"], empty["leader_total"]), (None, None))
+
+    def test_filter_and_search(self):
+        """Test filtering by game type and case-insensitive name prefix search."""
+        response = self.client.get(self.url, {"game_type": "scrabble"})
+        self.assertEqual(self.names(response), ["friday scrabble"])
+
+        response = self.client.get(self.url, {"search": "FRI"})
+        self.assertEqual(self.names(response), ["Friday Tally", "friday scrabble"])
+
+        response = self.client.get(self.url, {"search": "fri", "game_type": "tally"})
+        self.assertEqual(self.names(response), ["Friday Tally"])
+
+        response = self.client.get(self.url, {"search": "night"})
+        self.assertEqual(self.names(response), [])
+
+    def test_search_folds_ascii_only(self):
+        """Test search folds A-Z like SQLite's LOWER() and other letters not at all."""
+        Room.objects.create(name="Éclair Night", game_type="tally")
+        Room.objects.create(name="éclair club", game_type="tally")
+
+        response = self.client.get(self.url, {"search": "ÉCL"})
+        self.assertEqual(self.names(response), ["Éclair Night"])
+
+        response = self.client.get(self.url, {"search": "éCLAIR"})
+        self.assertEqual(self.names(response), ["éclair club"])
+
+    def test_cursor_pagination(self):
+        """Test pages follow each other without gaps or repeats."""
+        first = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(self.names(first), ["Friday Tally", "Yahtzee Night"])
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual(self.names(second), ["friday scrabble"])
+        self.assertIsNone(second.data["next"])
+
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(self.names(back), ["Friday Tally", "Yahtzee Night"])
+
+    def test_rejects_bad_filters(self):
+        """Test an unknown game type is rejected."""
+        response = self.client.get(self.url, {"game_type": "chess"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,215 @@
+"""
+Tests for server-side Yahtzee scoring.
+"""
+
+import itertools
+import random
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api import yahtzee
+from api.grid import YAHTZEE_CATEGORIES
+
+
+class ScoringTableTest(SimpleTestCase):
+    """Test the precomputed table and batch scoring."""
+
+    def test_table_covers_every_outcome(self):
+        """Test there is one row of 13 scores per sorted outcome."""
+        self.assertEqual(len(yahtzee.OUTCOMES), 252)
+        self.assertTrue(all(len(row) == 13 for row in yahtzee.TABLE))
+
+    def test_score_outcome(self):
+        """Test each category's scoring rules."""
+        cases = {
+            (1, 1, 1, 2, 2): {"ones": 3, "twos": 4, "three_of_a_kind": 7, "full_house": 25},
+            (3, 3, 3, 3, 5): {"threes": 12, "four_of_a_kind": 17, "three_of_a_kind": 17},
+            (1, 2, 3, 4, 6): {"small_straight": 30, "large_straight": 0},
+            (2, 3, 4, 5, 6): {"small_straight": 30, "large_straight": 40},
+            (6, 6, 6, 6, 6): {"yahtzee": 50, "full_house": 0, "sixes": 30, "chance": 30},
+        }
+        for dice, expected in cases.items():
+            with self.subTest(dice=dice):
+                scores = dict(zip(YAHTZEE_CATEGORIES, yahtzee.score_outcome(dice)))
+                for category, value in expected.items():
+                    self.assertEqual(scores[category], value, category)
+
+    def test_batch_matches_table_in_any_order(self):
+        """Test unsorted rolls are scored like their sorted outcome."""
+        rolls = [list(roll) for roll in itertools.product(range(1, 7), repeat=5)]
+
+        scores = yahtzee.score_rolls(rolls)
+
+        for roll, row in zip(rolls, scores):
+            self.assertEqual(tuple(row), yahtzee.score_outcome(roll))
+
+    def test_without_numpy(self):
+        """Test the pure Python fallback scores and checks the same."""
+        rolls = [[random.randint(1, 6) for _ in range(5)] for _ in range(200)]
+        categories = random.choices(YAHTZEE_CATEGORIES, k=len(rolls))
+        scores = yahtzee.score_rolls(rolls)
+        expected = yahtzee.expected_scores(rolls, categories)
+
+        with mock.patch.object(yahtzee, "np", None):
+            self.assertEqual(yahtzee.score_rolls(rolls), scores)
+            self.assertEqual(yahtzee.expected_scores(rolls, categories), expected)
+            with self.assertRaises(ValueError):
+                yahtzee.check_rolls([[1, 2, 3, 4, 7]])
+
+    def test_check_rolls(self):
+        """Test malformed rolls are rejected, with and without NumPy."""
+        bad = (
+            [[1, 2, 3, 4]],
+            [[0, 1, 2, 3, 4]],
+            [[1, 2, 3, 4, "x"]],
+            [[True, 2, 3, 4, 5]],
+            [[True, True, True, True, True]],
+            [[1, 2, 3, 4, 5.0]],
+            [1, 2],
+        )
+        for numpy in (yahtzee.np, None):
+            with mock.patch.object(yahtzee, "np", numpy):
+                yahtzee.check_rolls([])
+                yahtzee.check_rolls([[1, 2, 3, 4, 5]])
+                for rolls in bad:
+                    with self.subTest(numpy=numpy is not None, rolls=rolls):
+                        with self.assertRaises(ValueError):
+                            yahtzee.check_rolls(rolls)
+
+
+class GameScoringTest(SimpleTestCase):
+    """Test bonuses and joker rules over a whole game."""
+
+    def test_upper_bonus(self):
+        """Test 63 or more in the upper section earns 35."""
+        turns = [
+            ([face] * 3 + [7 - face] * 2, category)
+            for face, category in zip(range(1, 7), yahtzee.UPPER_CATEGORIES)
+        ]
+
+        result = yahtzee.score_game(turns)
+
+        self.assertEqual(result["upper_total"], 63)
+        self.assertEqual(result["upper_bonus"], 35)
+        self.assertEqual(result["total"], 98)
+
+    def test_yahtzee_bonus_and_joker(self):
+        """Test extra Yahtzees earn 100 and score full house as a joker."""
+        turns = [
+            ([4, 4, 4, 4, 4], "yahtzee"),
+            ([4, 4, 4, 4, 4], "fours"),
+            ([4, 4, 4, 4, 4], "full_house"),
+        ]
+
+        result = yahtzee.score_game(turns)
+
+        self.assertEqual(result["scores"], [50, 20, 25])
+        self.assertEqual(result["errors"], [None, None, None])
+        self.assertEqual(result["yahtzee_bonus"], 200)
+        self.assertEqual(result["total"], 50 + 20 + 25 + 200)
+
+    def test_joker_rules(self):
+        """Test an extra Yahtzee must use its own upper box first."""
+        turns = [([2] * 5, "yahtzee"), ([2] * 5, "chance")]
+
+        result = yahtzee.score_game(turns)
+
+        self.assertIsNotNone(result["errors"][1])
+
+    def test_no_bonus_after_scratched_yahtzee(self):
+        """Test a zero in the Yahtzee box earns no bonus."""
+        result = yahtzee.score_game([([1, 2, 3, 4, 6], "yahtzee"), ([5] * 5, "fives")])
+
+        self.assertEqual(result["yahtzee_bonus"], 0)
+        self.assertEqual(result["total"], 25)
+
+    def test_category_used_twice(self):
+        """Test a category can only be scored once."""
+        result = yahtzee.score_game([([1] * 5, "chance"), ([6] * 5, "chance")])
+
+        self.assertEqual(result["errors"][0], None)
+        self.assertIsNotNone(result["errors"][1])
+        self.assertEqual(result["total"], 5)
+
+
+class YahtzeeEndpointTest(TestCase):
+    """Test the scoring endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+
+    def test_score_rolls(self):
+        """Test rolls are scored in every category."""
+        response = self.client.post(
+            reverse("yahtzee-score"), {"rolls": [[6, 6, 6, 6, 6], [1, 3, 2, 5, 4]]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["categories"], YAHTZEE_CATEGORIES)
+        self.assertEqual(response.data["scores"][0][YAHTZEE_CATEGORIES.index("yahtzee")], 50)
+        self.assertEqual(
+            response.data["scores"][1][YAHTZEE_CATEGORIES.index("large_straight")], 40
+        )
+
+    def test_validate_submitted_scores(self):
+        """Test submitted scores are checked against their categories."""
+        response = self.client.post(
+            reverse("yahtzee-score"),
+            {
+                "rolls": [[2, 2, 3, 3, 3], [2, 2, 3, 3, 3]],
+                "categories": ["full_house", "threes"],
+                "scores": [25, 12],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.data["expected"], [25, 9])
+        self.assertEqual(response.data["valid"], [True, False])
+
+    def test_thousands_of_rolls(self):
+        """Test a large batch is scored in one call."""
+        rolls = [[random.randint(1, 6) for _ in range(5)] for _ in range(5000)]
+
+        response = self.client.post(reverse("yahtzee-score"), {"rolls": rolls}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["scores"]), 5000)
+
+    @override_settings(YAHTZEE_MAX_ROLLS=2)
+    def test_rejects_bad_requests(self):
+        """Test malformed dice, mismatched lists and oversized batches are rejected."""
+        bad = [
+            {"rolls": [[1, 2, 3, 4, 9]]},
+            {"rolls": [[1, 2, 3]]},
+            {"rolls": [[1, 2, 3, 4, 5]] * 3},
+            {"rolls": [[1, 2, 3, 4, 5]], "categories": ["ones", "twos"]},
+            {"rolls": [[1, 2, 3, 4, 5]], "scores": [1]},
+        ]
+        for body in bad:
+            with self.subTest(body=body):
+                response = self.client.post(reverse("yahtzee-score"), body, format="json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_score_games(self):
+        """Test games are totalled with bonuses and submitted scores checked."""
+        game = [
+            {"dice": [5, 5, 5, 5, 5], "category": "yahtzee", "score": 50},
+            {"dice": [5, 5, 5, 5, 5], "category": "fives", "score": 25},
+            {"dice": [5, 5, 5, 5, 5], "category": "large_straight", "score": 0},
+        ]
+
+        response = self.client.post(
+            reverse("yahtzee-games"), {"games": [game]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        result = response.data["games"][0]
+        self.assertEqual(result["scores"], [50, 25, 40])
+        self.assertEqual(result["valid"], [True, True, False])
+        self.assertEqual(result["yahtzee_bonus"], 200)
+        self.assertEqual(result["upper_bonus"], 0)
+        self.assertEqual(result["total"], 315)
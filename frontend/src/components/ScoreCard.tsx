@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from 'react';
-import { scoreApi, playerApi, roomApi } from '../services/api';
+import { scoreApi, playerApi, roomApi, applyRoomEvent } from '../services/api';
 import { Room, Score, Player, CreateScoreData } from '../types';
 import YahtzeeScoreCard from './YahtzeeScoreCard';
 
@@ -64,6 +64,18 @@ const ScoreCard: React.FC<ScoreCardProps> = ({ room, currentPlayer }) => {
     loadData();
   }, [loadData]);
 
+  useEffect(() => {
+    return roomApi.subscribe(room.id, event => {
+      if (event.type.startsWith('score.')) {
+        setScores(prev => applyRoomEvent(prev, event));
+      } else if (event.type.startsWith('player.')) {
+        setPlayers(prev => applyRoomEvent(prev, event));
+      } else {
+        loadData();
+      }
+    });
+  }, [room.id, loadData]);
+
   const handleAddScore = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newScore.player || newScore.score_value === 0) return;
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from 'react';
-import { scoreApi, playerApi, roomApi } from '../services/api';
+import { scoreApi, playerApi, roomApi, applyRoomEvent } from '../services/api';
 import { Room, Score, Player, CreateScoreData, YahtzeeCategory } from '../types';
 
 interface YahtzeeScoreCardProps {
@@ -83,6 +83,18 @@ const YahtzeeScoreCard: React.FC<YahtzeeScoreCardProps> = ({ room, currentPlayer
     loadData();
   }, [loadData]);
 
+  useEffect(() => {
+    return roomApi.subscribe(room.id, event => {
+      if (event.type.startsWith('score.')) {
+        setScores(prev => applyRoomEvent(prev, event));
+      } else if (event.type.startsWith('player.')) {
+        setPlayers(prev => applyRoomEvent(prev, event));
+      } else {
+        loadData();
+      }
+    });
+  }, [room.id, loadData]);
+
   const handleAddPlayer = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newPlayerName.trim()) return;
@@ -4,9 +4,12 @@ import {
   Player,
   Score,
   RoomSummary,
+  RoomGrid,
   CreateRoomData,
   JoinRoomData,
   CreateScoreData,
+  RoomEvent,
+  RoomEventType,
 } from '../types';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
@@ -42,6 +45,34 @@ export const roomApi = {
     const response = await api.get(`/rooms/${roomId}/`);
     return response.data;
   },
+
+  // Get the room's scorecard as a compact grid
+  getGrid: async (roomId: string): Promise<RoomGrid> => {
+    const response = await api.get(`/rooms/${roomId}/grid/`);
+    return response.data;
+  },
+
+  // Subscribe to live room events; returns an unsubscribe function
+  subscribe: (roomId: string, onEvent: (event: RoomEvent) => void): (() => void) => {
+    if (typeof EventSource === 'undefined') return () => {};
+    const source = new EventSource(`${API_BASE_URL}/rooms/${roomId}/events/`);
+    const types: RoomEventType[] = [
+      'player.created', 'player.updated', 'player.deleted',
+      'score.created', 'score.updated', 'score.deleted', 'resync',
+    ];
+    types.forEach(type => {
+      source.addEventListener(type, (message: MessageEvent) => {
+        onEvent({ type, data: JSON.parse(message.data) });
+      });
+    });
+    return () => source.close();
+  },
+};
+
+// Apply a created/updated/deleted event to a list of players or scores
+export const applyRoomEvent = <T extends { id: string }>(items: T[], event: RoomEvent): T[] => {
+  const rest = items.filter(item => item.id !== event.data.id);
+  return event.type.endsWith('.deleted') ? rest : [...rest, event.data as T];
 };
 
 export const playerApi = {
@@ -59,8 +90,11 @@ export const scoreApi = {
     return response.data;
   },
 
-  // Update an existing score
-  update: async (scoreId: string, data: Partial<CreateScoreData>): Promise<Score> => {
+  // Update an existing score; with a version, fails with 409 if someone else changed it
+  update: async (
+    scoreId: string,
+    data: Partial<CreateScoreData> & { version?: number }
+  ): Promise<Score> => {
     const response = await api.put(`/scores/${scoreId}/`, data);
     return response.data;
   },
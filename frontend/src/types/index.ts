@@ -8,6 +8,7 @@ export interface Room {
   players: Player[];
   scores: Score[];
   player_count: number;
+  version: number;
 }
 
 export interface Player {
@@ -33,6 +34,23 @@ export interface Score {
   notes: string;
   created_at: string;
   category?: YahtzeeCategory; // For Yahtzee-specific scoring
+  version: number; // Send back on update to detect concurrent edits (409)
+}
+
+// Compact scorecard: cells are parallel arrays indexing into players and columns
+export interface RoomGrid {
+  id: string;
+  name: string;
+  game_type: 'yahtzee' | 'scrabble' | 'tally';
+  version: number;
+  players: { id: string[]; name: string[]; is_active: boolean[] };
+  axis: 'category' | 'round';
+  columns: (YahtzeeCategory | number)[];
+  cells: { player: number[]; column: (number | null)[]; value: number[] };
+  totals: number[];
+  upper_total?: number[];
+  upper_bonus?: number[];
+  lower_total?: number[];
 }
 
 export interface RoomSummary {
@@ -42,6 +60,16 @@ export interface RoomSummary {
   total_rounds: number;
 }
 
+export type RoomEventType =
+  | 'player.created' | 'player.updated' | 'player.deleted'
+  | 'score.created' | 'score.updated' | 'score.deleted'
+  | 'resync';
+
+export interface RoomEvent {
+  type: RoomEventType;
+  data: any;
+}
+
 export interface CreateRoomData {
   name: string;
   game_type: 'yahtzee' | 'scrabble' | 'tally';